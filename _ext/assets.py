@@ -0,0 +1,277 @@
+"""Bundle, fingerprint and precompress the static assets of the built site.
+
+Every page of ``_build/html`` loads about fifteen separate stylesheets and
+scripts from ``_static``, some of them twice (``sphinx-book-theme.js``),
+none minified except jQuery. After ``jb build`` this script rewrites each
+page so that:
+
+- consecutive local stylesheets, and consecutive local scripts, are
+  concatenated into one minified bundle, with repeated files dropped;
+- bundles and the remaining local assets are referenced by a
+  content-hashed name (``bundle.<hash>.js``), so they can be served with
+  a long-lived cache header and change name whenever they change;
+- text files get ``.gz`` siblings, and ``.br`` ones when ``brotli`` is
+  installed, for servers that serve precompressed files.
+
+CSS is minified by a small built-in minifier, or by ``rcssmin`` when it
+is installed; scripts are only minified when ``rjsmin`` is installed.
+``rjsmin`` and ``brotli`` are in ``requirements.txt``; when either is
+missing the script says which step it skips.
+The original files are left in ``_static`` because scripts load some of
+them by name. Running the script again, e.g. after an incremental build
+that rewrote a few pages, only processes what has not been processed.
+
+Usage, from the book root::
+
+    python _ext/assets.py [HTML_DIR]
+"""
+import gzip
+import hashlib
+import importlib.util
+import os
+import re
+import sys
+from pathlib import Path
+
+HTML_DIR = Path("_build") / "html"
+COMPRESS = {".html", ".css", ".js", ".svg", ".json", ".txt", ".xml", ".inv"}
+MIN_COMPRESS_BYTES = 256
+# Optional modules, and what is skipped without them.
+OPTIONAL = {
+    "rjsmin": "scripts are bundled without being minified",
+    "brotli": "only .gz files are written, no .br",
+}
+FINGERPRINT = re.compile(r"\.[0-9a-f]{12}\.(css|js)$")
+# Names that already carry a content hash, ours or another tool's
+# (``mystnb.<sha256>.css``).
+HASHED = re.compile(r"\.[0-9a-f]{12,}\.(css|js)$")
+
+TAG = re.compile(r"<link\b[^>]*>|<script\b[^>]*>\s*</script>", re.IGNORECASE)
+ATTRIBUTE = re.compile(r"""([\w-]+)(?:\s*=\s*("[^"]*"|'[^']*'|[^\s>"']+))?""")
+CSS_TOKEN = re.compile(r""""(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*'|/\*.*?\*/""", re.DOTALL)
+CSS_URL = re.compile(r"""url\(\s*(["']?)([^"')]+)\1\s*\)""")
+CSS_IMPORT = re.compile(r"@import\s[^;]+;")
+
+
+def digest(data):
+    return hashlib.sha256(data).hexdigest()[:12]
+
+
+def attributes(tag):
+    body = re.sub(r"^<\w+|/?>(\s*</script>)?$", "", tag.strip(), flags=re.IGNORECASE)
+    return {name.lower(): (value or "").strip("\"'") for name, value in ATTRIBUTE.findall(body)}
+
+
+def minify_css(text):
+    try:
+        import rcssmin
+    except ImportError:
+        pass
+    else:
+        return rcssmin.cssmin(text, keep_bang_comments=True)
+    parts, last = [], 0
+    for match in CSS_TOKEN.finditer(text):
+        parts.append(_squeeze_css(text[last:match.start()]))
+        token = match.group()
+        # Keep strings, and /*! ... */ license comments, verbatim.
+        if not token.startswith("/*") or token.startswith("/*!"):
+            parts.append(token)
+        last = match.end()
+    parts.append(_squeeze_css(text[last:]))
+    return "".join(parts).strip()
+
+
+def _squeeze_css(text):
+    text = re.sub(r"\s+", " ", text)
+    # Spaces before ":" are kept: "a :hover" and "a:hover" differ.
+    text = re.sub(r"\s*([{};,>])\s*", r"\1", text)
+    text = re.sub(r":\s+", ":", text)
+    return text.replace(";}", "}")
+
+
+def minify_js(text):
+    try:
+        import rjsmin
+    except ImportError:
+        return text
+    return rjsmin.jsmin(text, keep_bang_comments=True)
+
+
+def rebase_css(text, source, static):
+    """Rewrite relative ``url()``s of ``source`` to be relative to ``static``."""
+    def rebase(match):
+        url = match.group(2)
+        if re.match(r"^([a-z]+:|/|#)", url, re.IGNORECASE):
+            return match.group()
+        target = os.path.relpath(source.parent / url, static)
+        return f'url("{Path(target).as_posix()}")'
+
+    return CSS_URL.sub(rebase, text)
+
+
+class Assets:
+    """Bundles and fingerprinted copies written to ``_static``."""
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.static = (self.root / "_static").resolve()
+        self.referenced = set()
+        self.written = 0
+
+    def store(self, directory, name, suffix, data):
+        """Write ``data`` as ``<name>.<hash><suffix>`` unless it exists."""
+        path = directory / f"{name}.{digest(data)}{suffix}"
+        if not path.exists():
+            path.write_bytes(data)
+            self.written += 1
+        self.referenced.add(path)
+        return path
+
+    def fingerprint(self, path):
+        """Return a content-hashed copy of ``path``, next to the original."""
+        if HASHED.search(path.name):
+            self.referenced.add(path)
+            return path
+        return self.store(path.parent, path.stem, path.suffix, path.read_bytes())
+
+    def bundle(self, kind, paths):
+        seen, texts, imports = set(), [], []
+        for path in paths:
+            data = path.read_bytes()
+            if digest(data) in seen:
+                continue
+            seen.add(digest(data))
+            text = data.decode("utf8")
+            if kind == "css":
+                text = rebase_css(text, path, self.static)
+                # @import is only valid at the top of a stylesheet.
+                imports.extend(CSS_IMPORT.findall(text))
+                texts.append(minify_css(CSS_IMPORT.sub("", text)))
+            else:
+                texts.append(minify_js(text))
+        separator = "\n" if kind == "css" else "\n;\n"
+        data = separator.join(imports + texts).encode("utf8")
+        return self.store(self.static, "bundle", f".{kind}", data)
+
+    def prune(self):
+        """Remove bundles and fingerprinted copies no page references any more."""
+        removed = 0
+        for path in list(self.static.rglob("*")):
+            original = path.with_name(re.sub(r"\.(gz|br)$", "", path.name))
+            if FINGERPRINT.search(original.name) and original not in self.referenced:
+                path.unlink()
+                removed += 1
+        return removed
+
+
+def local_asset(tag, page, root):
+    """Describe the ``_static`` file ``tag`` loads, or return None.
+
+    Returns ``(kind, path, url, plain)``: "css" or "js", the resolved file,
+    the URL as written, and whether the tag has no attributes besides the
+    URL and type, which makes it safe to merge into a bundle.
+    """
+    attrs = attributes(tag)
+    if tag.lower().startswith("<link"):
+        kind, url = "css", attrs.get("href", "")
+        if attrs.get("rel", "").lower() != "stylesheet":
+            return None
+    else:
+        kind, url = "js", attrs.get("src", "")
+    if not url or re.match(r"^([a-z]+:|//|/)", url, re.IGNORECASE):
+        return None
+    # Sphinx adds ``?v=<hash>`` (or ``?digest=``) for cache busting; the
+    # fingerprinted name takes its place.
+    path = (page.parent / re.split(r"[?#]", url)[0]).resolve()
+    static = (root / "_static").resolve()
+    if static not in path.parents or not path.is_file():
+        return None
+    plain = set(attrs) <= ({"rel", "href", "type"} if kind == "css" else {"src", "type"})
+    return kind, path, url, plain
+
+
+def process_page(page, root, assets):
+    html = page.read_text(encoding="utf8")
+    tags = [(m, local_asset(m.group(), page, root)) for m in TAG.finditer(html)]
+    out, last, i = [], 0, 0
+    while i < len(tags):
+        match, asset = tags[i]
+        out.append(html[last:match.start()])
+        run = [i]
+        # Extend the run over plain tags of the same kind separated only by whitespace.
+        while (
+            asset and asset[3]
+            and run[-1] + 1 < len(tags)
+            and tags[run[-1] + 1][1]
+            and tags[run[-1] + 1][1][3]
+            and tags[run[-1] + 1][1][0] == asset[0]
+            and not html[tags[run[-1]][0].end():tags[run[-1] + 1][0].start()].strip()
+        ):
+            run.append(run[-1] + 1)
+        if asset is None:
+            out.append(match.group())
+        elif len(run) > 1:
+            kind = asset[0]
+            target = assets.bundle(kind, [tags[j][1][1] for j in run])
+            href = Path(os.path.relpath(target, page.parent)).as_posix()
+            out.append(
+                f'<link rel="stylesheet" href="{href}" type="text/css" />' if kind == "css"
+                else f'<script src="{href}"></script>'
+            )
+        else:
+            target = assets.fingerprint(asset[1])
+            href = Path(os.path.relpath(target, page.parent)).as_posix()
+            out.append(match.group().replace(asset[2], href))
+        last = tags[run[-1]][0].end()
+        i = run[-1] + 1
+    out.append(html[last:])
+    result = "".join(out)
+    if result != html:
+        page.write_text(result, encoding="utf8")
+        return True
+    return False
+
+
+def compress(root):
+    """Write ``.gz`` (and ``.br``) siblings of text files that lack a fresh one."""
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+    written = 0
+    for path in root.rglob("*"):
+        if path.suffix not in COMPRESS or not path.is_file():
+            continue
+        if path.stat().st_size < MIN_COMPRESS_BYTES:
+            continue
+        data = None
+        for suffix, encode in ((".gz", lambda d: gzip.compress(d, 9, mtime=0)),
+                               (".br", brotli and brotli.compress)):
+            target = path.with_name(path.name + suffix)
+            if not encode or (target.exists() and target.stat().st_mtime_ns >= path.stat().st_mtime_ns):
+                continue
+            data = data if data is not None else path.read_bytes()
+            target.write_bytes(encode(data))
+            written += 1
+    return written
+
+
+def main(argv):
+    for name, skipped in OPTIONAL.items():
+        if importlib.util.find_spec(name) is None:
+            print(f"warning: {name} is not installed; {skipped}", file=sys.stderr)
+    root = (Path(argv[0]) if argv else HTML_DIR).resolve()
+    assets = Assets(root)
+    pages = sorted(root.rglob("*.html"))
+    rewritten = sum(process_page(page, root, assets) for page in pages)
+    removed = assets.prune()
+    compressed = compress(root)
+    print(
+        f"{rewritten} of {len(pages)} page(s) rewritten, {assets.written} asset(s) written, "
+        f"{removed} stale asset(s) removed, {compressed} compressed file(s) written"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,34 @@
+"""Sphinx extension caching what every build would otherwise redo.
+
+- Notebook cells are highlighted as ``ipython3``, a lexer Pygments only
+  finds through a plugin entry point. Sphinx caches the lexers registered
+  with it but looks any other one up again for every code cell, and each
+  plugin lookup reads the metadata of every installed package (about
+  30 ms a cell), so the IPython lexers are registered here.
+- The theme's Jinja templates are compiled afresh by every build; their
+  bytecode is kept in ``_build/.jinja-cache`` instead.
+"""
+from pathlib import Path
+
+
+def builder_inited(app):
+    from jinja2 import FileSystemBytecodeCache
+
+    environment = getattr(getattr(app.builder, "templates", None), "environment", None)
+    if environment is None:
+        return
+    directory = Path(app.doctreedir).parent / ".jinja-cache"
+    directory.mkdir(parents=True, exist_ok=True)
+    environment.bytecode_cache = FileSystemBytecodeCache(str(directory))
+
+
+def setup(app):
+    try:
+        from IPython.lib.lexers import IPython3Lexer, IPythonLexer
+    except ImportError:
+        pass
+    else:
+        app.add_lexer("ipython3", IPython3Lexer)
+        app.add_lexer("ipython", IPythonLexer)
+    app.connect("builder-inited", builder_inited)
+    return {"parallel_read_safe": True, "parallel_write_safe": True}
@@ -0,0 +1,83 @@
+"""Sphinx extension recording the time and memory of each build phase.
+
+Does nothing unless ``BOOK_PROFILE`` is set. Reading and writing are timed
+per document as well as as a whole. Environment pickling has no hook of its
+own, so it is recorded as the gap between the end of reading and the start
+of writing.
+"""
+import time
+
+from profiling import Profiler, enabled
+
+# Builder methods timed as a whole, with the phase name they are reported as.
+PHASES = {
+    "read": "read",
+    "write": "write HTML",
+    "finish": "finish",
+    "copy_image_files": "copy images",
+    "copy_static_files": "copy _static",
+    "copy_extra_files": "copy extra files",
+    "dump_search_index": "search index",
+    "dump_inventory": "inventory",
+}
+
+
+def _timed(profiler, method, name):
+    def wrapper(*args, **kwargs):
+        with profiler.span(name, "sphinx"):
+            return method(*args, **kwargs)
+
+    return wrapper
+
+
+def builder_inited(app):
+    profiler = app.book_profiler = Profiler("sphinx")
+    profiler.doc_starts = {}
+    builder = app.builder
+    for attr, name in PHASES.items():
+        if hasattr(builder, attr):
+            setattr(builder, attr, _timed(profiler, getattr(builder, attr), name))
+
+    write = builder.write
+
+    def write_after_pickle(*args, **kwargs):
+        read = [s for s in profiler.spans if s["name"] == "read"]
+        if read:
+            end = read[-1]["start_s"] + read[-1]["duration_s"]
+            profiler.add("pickle environment", "sphinx", end, time.time())
+        return write(*args, **kwargs)
+
+    builder.write = write_after_pickle
+
+    if hasattr(builder, "write_doc"):
+        write_doc = builder.write_doc
+
+        def write_doc_timed(docname, doctree, *args, **kwargs):
+            with profiler.span(f"write {docname}", "sphinx-doc"):
+                return write_doc(docname, doctree, *args, **kwargs)
+
+        builder.write_doc = write_doc_timed
+
+
+def source_read(app, docname, source):
+    app.book_profiler.doc_starts[docname] = time.time()
+
+
+def doctree_read(app, doctree):
+    docname = app.env.docname
+    start = app.book_profiler.doc_starts.pop(docname, None)
+    if start is not None:
+        app.book_profiler.add(f"read {docname}", "sphinx-doc", start, time.time())
+
+
+def build_finished(app, exception):
+    app.book_profiler.save()
+
+
+def setup(app):
+    if enabled():
+        app.connect("builder-inited", builder_inited)
+        app.connect("source-read", source_read)
+        app.connect("doctree-read", doctree_read)
+        app.connect("build-finished", build_finished)
+    return {"parallel_read_safe": True, "parallel_write_safe": True}
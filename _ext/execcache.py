@@ -0,0 +1,226 @@
+"""A content-addressed, per-cell cache of notebook outputs.
+
+Each code cell is keyed on its own source, the key of the code cell before
+it and a digest of the execution environment (Python version, kernel name
+and the installed versions of the packages in ``requirements.txt``). A cell
+key therefore only matches when the cell and everything that ran before it
+are unchanged. When every cell of a notebook matches, its outputs, including
+the base64 figures that become ``_build/jupyter_execute/*_NN_0.png``, are
+replayed without starting a kernel.
+
+Entries live in ``objects/<key[:2]>/<key>.json`` below the cache root, with
+sizes and last-access times in ``index.json``. Output data of
+``blob_min_bytes`` or more (figures, large HTML tables) is kept out of the
+entry in a ``BlobStore`` under ``blobs/``: one file per distinct content,
+named by its hash and holding the decoded bytes rather than base64, so a
+figure that several cell keys produced is stored once. The cache is
+trimmed to ``max_bytes`` by evicting the least recently used entries,
+then removing the blobs no entry refers to.
+
+Only this cache is deduplicated: the notebooks handed to jupyter-cache,
+which myst-nb reads, keep their outputs inline.
+"""
+import base64
+import hashlib
+import json
+import os
+import platform
+import re
+import tempfile
+import time
+from importlib import metadata
+from pathlib import Path
+
+# Bytes per read or write; a multiple of 3 so binary chunks encode to whole
+# base64 quads.
+CHUNK = 3 * 2**16
+
+
+def environment_digest(requirements="requirements.txt", kernel_name=""):
+    """Hash the interpreter, kernel and installed requirement versions."""
+    parts = [platform.python_version(), kernel_name]
+    try:
+        lines = Path(requirements).read_text().splitlines()
+    except FileNotFoundError:
+        lines = []
+    for line in lines:
+        name = re.split(r"[\s<>=!~;\[]", line.strip(), maxsplit=1)[0]
+        if not name or name.startswith("#"):
+            continue
+        try:
+            parts.append(f"{name}=={metadata.version(name)}")
+        except metadata.PackageNotFoundError:
+            parts.append(f"{name}==missing")
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+
+def cell_keys(nb, env_digest):
+    """Return the chained cache key of every code cell, by cell index."""
+    keys, previous = {}, env_digest
+    for index, cell in enumerate(nb.cells):
+        if cell.cell_type != "code":
+            continue
+        source = cell.source if isinstance(cell.source, str) else "".join(cell.source)
+        previous = hashlib.sha256(f"{previous}\0{source}".encode()).hexdigest()
+        keys[index] = previous
+    return keys
+
+
+def is_binary(mimetype):
+    """Whether notebook output data of ``mimetype`` is base64-encoded bytes."""
+    if mimetype.startswith("image/"):
+        return not mimetype.endswith(("+xml", "+json"))
+    return mimetype in ("application/pdf", "application/octet-stream")
+
+
+class BlobStore:
+    """Content-addressed files of cached output data, written and read in chunks.
+
+    Binary (base64) data is stored decoded. ``write`` hashes while it
+    writes, so no encoded or decoded copy of the whole value is made.
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+
+    def path(self, digest):
+        return self.root / digest[:2] / digest
+
+    def _encoded(self, text, binary):
+        if not binary:
+            for start in range(0, len(text), CHUNK):
+                yield text[start:start + CHUNK].encode("utf8")
+            return
+        if any(c in text for c in "\n\r "):
+            text = "".join(text.split())
+        step = CHUNK // 3 * 4
+        for start in range(0, len(text), step):
+            yield base64.b64decode(text[start:start + step])
+
+    def write(self, text, binary):
+        """Store ``text``; returns ``(digest, size in bytes)``."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        hasher, size = hashlib.sha256(), 0
+        with tempfile.NamedTemporaryFile(dir=self.root, delete=False) as out:
+            for chunk in self._encoded(text, binary):
+                hasher.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+        digest = hasher.hexdigest()
+        path = self.path(digest)
+        if path.exists():
+            os.unlink(out.name)
+        else:
+            path.parent.mkdir(exist_ok=True)
+            os.replace(out.name, path)
+        return digest, size
+
+    def read(self, digest, binary):
+        """Return the stored value as it was given to ``write``, base64 without line breaks."""
+        with open(self.path(digest), "rb") as stored:
+            if not binary:
+                return stored.read().decode("utf8")
+            parts = []
+            while chunk := stored.read(CHUNK):
+                parts.append(base64.b64encode(chunk).decode("ascii"))
+        return "".join(parts)
+
+    def prune(self, keep):
+        """Remove the stored values whose digest is not in ``keep``."""
+        removed = 0
+        for path in self.root.glob("*/*"):
+            if path.name not in keep:
+                path.unlink()
+                removed += 1
+        return removed
+
+
+class CellCache:
+    """Persistent store of cell outputs with LRU eviction and hit counters."""
+
+    def __init__(self, root, max_bytes=512 * 2**20, blob_min_bytes=16 * 2**10):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.blob_min_bytes = blob_min_bytes
+        self.blobs = BlobStore(self.root / "blobs")
+        self.hits = self.misses = self.evictions = 0
+        try:
+            self._index = json.loads((self.root / "index.json").read_text())
+        except (FileNotFoundError, ValueError):
+            self._index = {}
+
+    def _path(self, key):
+        return self.root / "objects" / key[:2] / f"{key}.json"
+
+    def get(self, key):
+        """Return the stored outputs for ``key`` or None, counting the lookup."""
+        entry = self._index.get(key)
+        if entry is None or not self._path(key).exists():
+            self.misses += 1
+            return None
+        with open(self._path(key), encoding="utf8") as stored:
+            data = json.load(stored)
+        outputs, refs = data["outputs"], data["blobs"]
+        try:
+            for index, mimetype, digest in refs:
+                outputs[index]["data"][mimetype] = self.blobs.read(digest, is_binary(mimetype))
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        entry["atime"] = time.time()
+        return outputs
+
+    def put(self, key, outputs):
+        stored, refs, size = [], [], 0
+        for index, output in enumerate(outputs):
+            output = dict(output)
+            if isinstance(output.get("data"), dict):
+                output["data"] = dict(output["data"])
+                for mimetype, value in output["data"].items():
+                    if isinstance(value, list) and all(isinstance(v, str) for v in value):
+                        value = "".join(value)
+                    if isinstance(value, str) and len(value) >= self.blob_min_bytes:
+                        digest, blob_size = self.blobs.write(value, is_binary(mimetype))
+                        refs.append([index, mimetype, digest])
+                        output["data"][mimetype] = ""
+                        size += blob_size
+            stored.append(output)
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf8") as out:
+            json.dump({"outputs": stored, "blobs": refs}, out)
+        self._index[key] = {
+            "size": size + path.stat().st_size,
+            "atime": time.time(),
+            "blobs": [digest for _, _, digest in refs],
+        }
+
+    @property
+    def size(self):
+        """Bytes used, counting a blob once for every entry that refers to it."""
+        return sum(entry["size"] for entry in self._index.values())
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits ``max_bytes``."""
+        total = self.size
+        for key in sorted(self._index, key=lambda k: self._index[k]["atime"]):
+            if total <= self.max_bytes:
+                break
+            total -= self._index.pop(key)["size"]
+            self._path(key).unlink(missing_ok=True)
+            self.evictions += 1
+
+    def save(self):
+        """Evict down to the size limit, drop unreferenced blobs and write the index."""
+        self.evict()
+        self.blobs.prune({d for entry in self._index.values() for d in entry.get("blobs", ())})
+        self.root.mkdir(parents=True, exist_ok=True)
+        (self.root / "index.json").write_text(json.dumps(self._index))
+
+    def report(self):
+        return (
+            f"cell cache: {self.hits} hit(s), {self.misses} miss(es), "
+            f"{self.evictions} eviction(s), {len(self._index)} entries, "
+            f"{self.size / 2**20:.1f} MiB of {self.max_bytes / 2**20:.0f} MiB"
+        )
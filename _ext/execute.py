@@ -0,0 +1,395 @@
+"""Execute the book's notebooks ahead of ``jb build``.
+
+Outputs come from the per-cell cache in ``execcache`` when every code cell
+of a notebook is unchanged. The remaining notebooks are run concurrently in
+a pool of worker processes, and their cells are stored again.
+
+With ``warm_kernels`` on, each worker keeps its kernel between notebooks:
+the kernel is started when the worker starts, imports the ``preload``
+modules (pandas, NumPy, SciPy, matplotlib) once, and before each notebook
+its namespace, working directory, execution count and matplotlib state
+are reset. A notebook then only pays for its own cells; ``import pandas``
+finds the module already loaded. A kernel whose notebook failed is shut
+down and replaced.
+
+Every executed notebook is handed to the jupyter-cache used by
+``jb build`` in ``cache`` mode, so Sphinx renders it without executing
+anything itself and only starts once all notebooks have finished.
+
+Each notebook logs to ``_build/logs/<notebook>.log``. With ``BOOK_PROFILE``
+set, the time and kernel memory of every notebook and cell are written to
+``_build/profile/execute.*`` (see ``profiling``).
+
+Usage, from the book root::
+
+    python _ext/execute.py [NOTEBOOK ...]
+
+Settings are read from the ``execute`` section of ``_config.yml``.
+"""
+import logging
+import multiprocessing.util
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import nbformat
+import yaml
+from execcache import CellCache, cell_keys, environment_digest
+from profiling import Profiler, enabled, reset_peak
+
+PRELOAD = ["numpy", "pandas", "scipy.stats", "matplotlib.pyplot"]
+
+# Imports the preload modules, skipping missing ones, and snapshots the
+# matplotlib settings in effect after the inline backend has been set up.
+PRELOAD_CODE = """
+import importlib as _importlib
+for _name in {modules!r}:
+    try:
+        _importlib.import_module(_name)
+    except ImportError:
+        pass
+import sys as _sys
+if "matplotlib" in _sys.modules:
+    # dict.items reads the raw values. "backend" and "interactive" belong to
+    # the inline backend, which sets them when the first figure is shown;
+    # restoring them would stop figures from being displayed.
+    _rc = _sys.modules["matplotlib"].rcParams
+    _sys.modules["matplotlib"]._warm_rcparams = dict(
+        (_key, _value) for _key, _value in dict.items(_rc)
+        if _key not in ("backend", "interactive")
+    )
+"""
+
+# A new session also restarts the execution count and the (in-memory) history.
+RESET_CODE = """
+get_ipython().reset(new_session=True)
+import os as _os, sys as _sys
+_os.chdir({cwd!r})
+if "matplotlib.pyplot" in _sys.modules:
+    _sys.modules["matplotlib.pyplot"].close("all")
+    _sys.modules["matplotlib"].rcParams.update(_sys.modules["matplotlib"]._warm_rcparams)
+if "matplotlib_inline.backend_inline" in _sys.modules:
+    # Clearing figure_format too lets a notebook's "%config
+    # InlineBackend.figure_format" take effect when the last one set the same.
+    _inline = _sys.modules["matplotlib_inline.backend_inline"].InlineBackend.instance()
+    _inline.figure_format = ""
+    _inline.figure_formats = {{"png"}}
+    del _inline
+del _os, _sys
+"""
+
+# Warm kernels of this worker process, by kernel name.
+_kernels = {}
+
+
+def load_config(root="."):
+    config = yaml.safe_load((Path(root) / "_config.yml").read_text()) or {}
+    execute = config.get("execute") or {}
+    return {
+        "cache": execute.get("cache") or "_build/.jupyter_cache",
+        "cell_cache": execute.get("cell_cache") or "_build/.cell_cache",
+        "cell_cache_limit_mb": execute.get("cell_cache_limit_mb", 512),
+        "timeout": execute.get("timeout", 30),
+        "notebook_timeout": execute.get("notebook_timeout", -1),
+        "workers": execute.get("workers", "auto"),
+        "logs": execute.get("logs") or "_build/logs",
+        "warm_kernels": execute.get("warm_kernels", True),
+        "preload": execute.get("preload", PRELOAD),
+        "profile": enabled(),
+    }
+
+
+def toc_notebooks(root="."):
+    """Return the notebooks listed in ``_toc.yml``, in table-of-contents order."""
+    toc = yaml.safe_load((Path(root) / "_toc.yml").read_text()) or []
+    entries = toc if isinstance(toc, list) else [toc]
+    notebooks = []
+    while entries:
+        entry = entries.pop(0)
+        path = Path(root) / f"{entry.get('file', '')}.ipynb"
+        if path.exists():
+            notebooks.append(path)
+        entries[:0] = entry.get("sections", [])
+    return notebooks
+
+
+def kernel_name(nb):
+    """Use the notebook's kernel when installed, else the default ``python3``."""
+    from jupyter_client.kernelspec import find_kernel_specs
+
+    name = nb.metadata.get("kernelspec", {}).get("name", "python3")
+    return name if name in find_kernel_specs() else "python3"
+
+
+def notebook_logger(path, log_dir):
+    logger = logging.getLogger(f"execute.{path.stem}")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    if not logger.handlers:
+        Path(log_dir).mkdir(parents=True, exist_ok=True)
+        handler = logging.FileHandler(Path(log_dir) / f"{path.stem}.log", mode="w")
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+        logger.addHandler(handler)
+    return logger
+
+
+def replay_notebook(path, cell_cache):
+    """Return ``path`` filled from the cell cache, or None on any cell miss."""
+    nb = nbformat.read(str(path), as_version=4)
+    keys = cell_keys(nb, environment_digest(kernel_name=kernel_name(nb)))
+    cached = {index: cell_cache.get(key) for index, key in keys.items()}
+    if any(outputs is None for outputs in cached.values()):
+        return None
+    for index, outputs in cached.items():
+        nb.cells[index].outputs = [nbformat.from_dict(o) for o in outputs]
+    return nb
+
+
+def _run_code(km, code, timeout=60):
+    """Run ``code`` in the kernel of ``km`` without recording it in its history."""
+    from jupyter_core.utils import run_sync
+
+    async def run():
+        kc = km.client()
+        kc.start_channels()
+        try:
+            await kc.wait_for_ready(timeout=timeout)
+            reply = await kc.execute_interactive(
+                code, store_history=False, timeout=timeout, output_hook=lambda msg: None
+            )
+        finally:
+            kc.stop_channels()
+        if reply["content"]["status"] != "ok":
+            raise RuntimeError(f"kernel setup failed: {reply['content'].get('evalue')}")
+
+    run_sync(run)()
+
+
+def warm_kernel(name, config):
+    """Return this worker's running kernel ``name``, starting and preloading it once."""
+    from jupyter_client import AsyncKernelManager
+    from jupyter_core.utils import run_sync
+
+    km = _kernels.get(name)
+    if km is not None and run_sync(km.is_alive)():
+        return km
+    km = AsyncKernelManager(kernel_name=name)
+    run_sync(km.start_kernel)(
+        cwd=os.getcwd(), extra_arguments=["--HistoryManager.hist_file=:memory:"]
+    )
+    _run_code(km, PRELOAD_CODE.format(modules=list(config["preload"])))
+    _kernels[name] = km
+    return km
+
+
+def discard_kernel(name):
+    from jupyter_core.utils import run_sync
+
+    km = _kernels.pop(name, None)
+    if km is not None:
+        run_sync(km.shutdown_kernel)(now=True)
+
+
+def shutdown_kernels():
+    for name in list(_kernels):
+        discard_kernel(name)
+
+
+def init_worker(config):
+    """Pool initializer: start a warm default kernel while notebooks are queued."""
+    if config["warm_kernels"]:
+        # Pool workers leave through multiprocessing, which skips atexit
+        # handlers but runs finalizers.
+        multiprocessing.util.Finalize(None, shutdown_kernels, exitpriority=10)
+        try:
+            warm_kernel("python3", config)
+        except Exception:
+            # run_notebook starts the kernel again and reports the error
+            # against the notebook that needed it.
+            pass
+
+
+def run_notebook(path, config):
+    """Execute ``path`` in a warm or fresh kernel; runs inside a pool worker.
+
+    Every cell gets ``timeout`` seconds and the notebook as a whole gets
+    ``notebook_timeout`` seconds; either is disabled when negative, zero
+    or None, as ``timeout: -1`` is in Jupyter Book. Returns the
+    executed notebook as JSON, which pickles faster than a NotebookNode,
+    the run time and the profiled cell spans.
+    """
+    from nbclient import NotebookClient
+
+    logger = notebook_logger(path, config["logs"])
+    nb = nbformat.read(str(path), as_version=4)
+    start = time.perf_counter()
+    # Like nbclient, a missing, zero or negative limit means none.
+    per_cell = config["timeout"] if config["timeout"] and config["timeout"] > 0 else None
+    budget = config["notebook_timeout"]
+    if not budget or budget < 0:
+        budget = None
+
+    def cell_timeout(cell):
+        if budget is None:
+            return per_cell
+        remaining = start + budget - time.perf_counter()
+        if remaining <= 0:
+            raise TimeoutError(f"{path} exceeded notebook_timeout={budget}s")
+        return max(1, remaining if per_cell is None else min(per_cell, remaining))
+
+    profiler = Profiler("execute")
+    cell_starts = {}
+
+    def kernel_pid():
+        return getattr(getattr(client.km, "provisioner", None), "pid", None)
+
+    def cell_started(cell, cell_index):
+        # So that the peak recorded for the cell is its own, not the
+        # kernel's since it started.
+        pid = kernel_pid()
+        if pid is not None:
+            reset_peak(pid)
+        cell_starts[cell_index] = time.time()
+
+    def cell_executed(cell, cell_index, execute_reply):
+        figure = any(
+            key.startswith("image/")
+            for output in cell.outputs
+            for key in output.get("data", {})
+        )
+        name = f"cell {cell_index}: {cell.source.strip().splitlines()[0][:60]}"
+        profiler.add(
+            name,
+            "figure" if figure else "cell",
+            cell_starts.pop(cell_index),
+            time.time(),
+            lane=path.stem,
+            pid=kernel_pid(),
+        )
+
+    name = kernel_name(nb)
+    km = None
+    if config["warm_kernels"]:
+        km = warm_kernel(name, config)
+        _run_code(km, RESET_CODE.format(cwd=str(path.parent.resolve())))
+    client = NotebookClient(
+        nb,
+        km=km,
+        timeout_func=cell_timeout,
+        kernel_name=name,
+        resources={"metadata": {"path": str(path.parent)}},
+        log=logger,
+        record_timing=False,
+    )
+    if config["profile"]:
+        client.on_cell_execute = cell_started
+        client.on_cell_executed = cell_executed
+
+    logger.info("executing %s with %s kernel %s", path, "warm" if km else "fresh", name)
+    kernelspec = nb.metadata.get("kernelspec")
+    try:
+        client.execute()
+    except Exception:
+        logger.exception("execution failed")
+        if km is not None:
+            discard_kernel(name)
+        raise
+    finally:
+        if km is not None and client.kc is not None:
+            client.kc.stop_channels()
+    # jupyter-cache matches notebooks on their kernelspec and cell metadata,
+    # so keep the original kernelspec even when a fallback kernel was used;
+    # timings are not written into the cells for the same reason.
+    if kernelspec is not None:
+        nb.metadata.kernelspec = kernelspec
+    seconds = time.perf_counter() - start
+    logger.info("finished in %.1fs", seconds)
+    profiler.add(str(path), "notebook", time.time() - seconds, time.time(), lane=path.stem)
+    return nbformat.writes(nb), seconds, profiler.spans
+
+
+def pool_size(workers, jobs):
+    """Resolve the ``workers`` setting ("auto" or a count) for ``jobs`` notebooks."""
+    if workers == "auto":
+        workers = os.cpu_count() or 1
+    return max(1, min(int(workers), jobs))
+
+
+def store_executed(nb, path, cache_path, seconds):
+    """Hand an executed notebook to the jupyter-cache read by ``jb build``."""
+    from jupyter_cache import get_cache
+    from jupyter_cache.base import CacheBundleIn
+
+    get_cache(cache_path).cache_notebook_bundle(
+        CacheBundleIn(nb, str(path.resolve()), data={"execution_seconds": seconds}),
+        check_validity=False,
+        overwrite=True,
+    )
+
+
+def execute_notebooks(notebooks, config, pool=None):
+    """Replay or execute ``notebooks``; returns those that failed.
+
+    Notebooks run in ``pool`` when given, which lets a caller that executes
+    repeatedly (``watch``) keep its workers and their warm kernels, or else
+    in a pool sized for them.
+    """
+    cell_cache = CellCache(
+        config["cell_cache"], max_bytes=config["cell_cache_limit_mb"] * 2**20
+    )
+    profiler = Profiler("execute")
+
+    pending = []
+    for path in notebooks:
+        with profiler.span(f"replay {path}", "notebook", lane=path.stem):
+            nb = replay_notebook(path, cell_cache)
+        if nb is None:
+            pending.append(path)
+        else:
+            store_executed(nb, path, config["cache"], 0.0)
+            print(f"{path}: replayed from cell cache")
+
+    failed = []
+    if pending:
+        executor = pool or ProcessPoolExecutor(
+            pool_size(config["workers"], len(pending)),
+            initializer=init_worker,
+            initargs=(config,),
+        )
+        try:
+            futures = {path: executor.submit(run_notebook, path, config) for path in pending}
+            for path, future in futures.items():
+                try:
+                    text, seconds, spans = future.result()
+                except Exception as exc:
+                    failed.append(path)
+                    print(f"{path}: FAILED ({exc.__class__.__name__}), see {config['logs']}")
+                    continue
+                profiler.spans.extend(spans)
+                nb = nbformat.reads(text, as_version=4)
+                keys = cell_keys(nb, environment_digest(kernel_name=kernel_name(nb)))
+                for index, key in keys.items():
+                    cell_cache.put(key, nb.cells[index].outputs)
+                store_executed(nb, path, config["cache"], seconds)
+                print(f"{path}: executed in {seconds:.1f}s")
+        finally:
+            if pool is None:
+                executor.shutdown()
+
+    cell_cache.save()
+    print(cell_cache.report())
+    if config["profile"]:
+        profiler.save()
+    return failed
+
+
+def main(argv):
+    config = load_config()
+    notebooks = [Path(p) for p in argv] or toc_notebooks()
+    return 1 if execute_notebooks(notebooks, config) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
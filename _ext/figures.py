@@ -0,0 +1,167 @@
+"""Responsive, deduplicated figures for the built site.
+
+Chapter 2 sets ``%config InlineBackend.figure_format='retina'``, so every
+plot is a PNG at twice its display size. Sphinx copies it from
+``_build/jupyter_execute`` to ``_build/html/_images`` and every visitor
+downloads the full retina file. After ``jb build`` this script:
+
+- hardlinks identical copies of each image between those two directories
+  (and within ``_images``), so each figure is stored once;
+- writes WebP and 256-colour palette PNG variants of each PNG figure
+  at its display width, 1.5x and its full resolution;
+- wraps each ``<img>`` in a ``<picture>`` with ``srcset``s, explicit
+  dimensions and lazy loading, so browsers pick the smallest file that
+  is sharp on their screen.
+
+The display width is read from the PNG's DPI: retina figures are saved at
+144 DPI and shown at 72. Variants need Pillow; without it only the
+deduplication runs. Images already rewritten are skipped, so running the
+script again after an incremental build only processes new figures.
+
+Usage, from the book root::
+
+    python _ext/figures.py [BUILD_DIR]
+"""
+import hashlib
+import html
+import os
+import re
+import sys
+from pathlib import Path
+
+BUILD_DIR = Path("_build")
+SCALES = (1, 1.5)
+WEBP_QUALITY = 85
+IMG = re.compile(r"<img\b[^>]*>", re.IGNORECASE)
+ATTRIBUTE = re.compile(r"""([\w-]+)\s*=\s*("[^"]*"|'[^']*')""")
+
+
+def file_digest(path):
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def link_duplicates(*directories):
+    """Replace identical image files by hardlinks to one copy.
+
+    Returns the number of files replaced.
+    """
+    first, linked = {}, 0
+    for directory in directories:
+        for path in sorted(directory.glob("*")):
+            if path.suffix.lower() not in (".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp"):
+                continue
+            stat = path.stat()
+            key = (stat.st_size, file_digest(path))
+            original = first.setdefault(key, path)
+            if original == path or os.path.samefile(original, path):
+                continue
+            temporary = path.with_name(path.name + ".tmp")
+            os.link(original, temporary)
+            os.replace(temporary, path)
+            linked += 1
+    return linked
+
+
+def variant_widths(image):
+    """Return ``(display width, [widths to write])`` for a figure."""
+    width = image.size[0]
+    dpi = image.info.get("dpi", (72, 72))[0] or 72
+    display = max(1, round(width * 72 / dpi)) if dpi > 72 else width
+    widths = {min(width, round(display * scale)) for scale in SCALES}
+    widths.add(width)
+    return display, sorted(widths)
+
+
+def write_variants(source):
+    """Write WebP and PNG variants of ``source``.
+
+    Returns ``(display width, display height, [(width, webp, png), ...])``.
+    """
+    from PIL import Image
+
+    with Image.open(source) as image:
+        display, widths = variant_widths(image)
+        height = round(image.size[1] * display / image.size[0])
+        variants = []
+        for width in widths:
+            webp = source.with_name(f"{source.stem}.{width}w.webp")
+            png = source.with_name(f"{source.stem}.{width}w.png")
+            variants.append((width, webp, png))
+            if webp.exists() and png.exists() and webp.stat().st_mtime >= source.stat().st_mtime:
+                continue
+            size = (width, round(image.size[1] * width / image.size[0]))
+            resized = image if size == image.size else image.resize(size, Image.LANCZOS)
+            resized.save(webp, "WEBP", quality=WEBP_QUALITY, method=6)
+            # A 256-colour palette is lossless for most plots and invisible
+            # on the antialiased edges of the rest.
+            resized.quantize(256, method=Image.Quantize.FASTOCTREE).save(png, "PNG", optimize=True)
+    return display, height, variants
+
+
+def srcset(variants, index, page_dir):
+    return ", ".join(
+        f"{Path(os.path.relpath(variant[index], page_dir)).as_posix()} {variant[0]}w"
+        for variant in variants
+    )
+
+
+def rewrite_page(page, images, cache):
+    """Wrap the page's PNG figures in ``<picture>`` elements."""
+    text = page.read_text(encoding="utf8")
+
+    def picture(match):
+        tag = match.group()
+        attrs = {k.lower(): html.unescape(v[1:-1]) for k, v in ATTRIBUTE.findall(tag)}
+        src = attrs.get("src", "")
+        if "srcset" in attrs or not src.lower().endswith(".png"):
+            return tag
+        source = (page.parent / src).resolve()
+        if source.parent != images or not source.is_file():
+            return tag
+        if source not in cache:
+            cache[source] = write_variants(source)
+        display, height, variants = cache[source]
+        sizes = f"(max-width: {display}px) 100vw, {display}px"
+        img = tag[:-2].rstrip() if tag.endswith("/>") else tag[:-1]
+        img += (
+            f' srcset="{srcset(variants, 2, page.parent)}" sizes="{sizes}"'
+            f' width="{display}" height="{height}" loading="lazy" decoding="async" />'
+        )
+        return (
+            f'<picture><source type="image/webp" srcset="{srcset(variants, 1, page.parent)}"'
+            f' sizes="{sizes}" />{img}</picture>'
+        )
+
+    result = IMG.sub(picture, text)
+    if result != text:
+        page.write_text(result, encoding="utf8")
+        return True
+    return False
+
+
+def main(argv):
+    build = Path(argv[0]) if argv else BUILD_DIR
+    images = (build / "html" / "_images").resolve()
+    executed = build / "jupyter_execute"
+    directories = [d for d in (executed, images) if d.is_dir()]
+    linked = link_duplicates(*directories)
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        print(f"{linked} duplicate image(s) linked; install Pillow for responsive variants")
+        return 0
+    cache = {}
+    pages = sorted((build / "html").rglob("*.html"))
+    rewritten = sum(rewrite_page(page, images, cache) for page in pages)
+    before = sum(source.stat().st_size for source in cache)
+    after = sum(variants[0][1].stat().st_size for _, _, variants in cache.values())
+    print(
+        f"{linked} duplicate image(s) linked, {len(cache)} figure(s) in {rewritten} page(s) "
+        f"made responsive; smallest WebP variants total {after / 1024:.0f} KiB "
+        f"against {before / 1024:.0f} KiB of originals"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
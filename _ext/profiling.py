@@ -0,0 +1,126 @@
+"""Wall-time and memory spans for profiling book builds.
+
+Profiling is switched on by setting ``BOOK_PROFILE`` in the environment
+(``build-book.sh --profile`` does). Each build step records spans with a
+``Profiler`` and saves them under ``_build/profile/``:
+
+- ``<step>.json`` and ``<step>.csv``: one row per span, with wall time,
+  resident memory at the end of the span and the peak resident memory of
+  the process that did the work;
+- ``trace.json``: every span of every step in Chrome trace-event format,
+  which Perfetto, speedscope and chrome://tracing show as a flame graph.
+
+The peak of a notebook cell is the kernel's high-water mark since the
+cell started: ``reset_peak`` clears it first, which Linux allows through
+``/proc/<pid>/clear_refs``. Elsewhere, and for the other spans, the peak
+is the process's since it started, which for a warm kernel includes the
+notebooks it ran before. Cells only get spans when they execute, not
+when their outputs are replayed from the cell cache, so profile a
+``build-book.sh --clean --profile`` build to see every cell.
+"""
+import csv
+import json
+import os
+import resource
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+PROFILE_DIR = Path("_build") / "profile"
+FIELDS = ["step", "lane", "category", "name", "start_s", "duration_s", "rss_mb", "peak_rss_mb"]
+
+
+def enabled():
+    return bool(os.environ.get("BOOK_PROFILE"))
+
+
+def process_memory(pid=None):
+    """Return (rss_mb, peak_rss_mb) of ``pid``, or of this process."""
+    try:
+        status = Path(f"/proc/{pid or 'self'}/status").read_text()
+    except OSError:
+        if pid is not None:
+            return float("nan"), float("nan")
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        return float("nan"), peak
+    fields = dict(line.split(":", 1) for line in status.splitlines() if ":" in line)
+    return (
+        int(fields["VmRSS"].split()[0]) / 1024,
+        int(fields["VmHWM"].split()[0]) / 1024,
+    )
+
+
+def reset_peak(pid=None):
+    """Reset the peak resident memory of ``pid`` to its current size.
+
+    Returns whether it was reset; only Linux supports it.
+    """
+    try:
+        Path(f"/proc/{pid or 'self'}/clear_refs").write_text("5")
+    except OSError:
+        return False
+    return True
+
+
+class Profiler:
+    """Collects spans for one build step (e.g. ``execute`` or ``sphinx``)."""
+
+    def __init__(self, step):
+        self.step = step
+        self.spans = []
+
+    def add(self, name, category, start, end, lane="main", pid=None):
+        """Record a span measured elsewhere; ``pid`` is the process it ran in."""
+        rss, peak = process_memory(pid)
+        self.spans.append({
+            "step": self.step,
+            "lane": lane,
+            "category": category,
+            "name": name,
+            "start_s": start,
+            "duration_s": end - start,
+            "rss_mb": round(rss, 1),
+            "peak_rss_mb": round(peak, 1),
+        })
+
+    @contextmanager
+    def span(self, name, category, lane="main"):
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.add(name, category, start, time.time(), lane)
+
+    def save(self, directory=PROFILE_DIR):
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / f"{self.step}.json").write_text(json.dumps(self.spans, indent=1))
+        with open(directory / f"{self.step}.csv", "w", newline="") as f:
+            writer = csv.DictWriter(f, FIELDS)
+            writer.writeheader()
+            writer.writerows(self.spans)
+        write_trace(directory)
+
+
+def write_trace(directory=PROFILE_DIR):
+    """Merge the spans of every saved step into ``trace.json``."""
+    directory = Path(directory)
+    spans = []
+    for path in sorted(directory.glob("*.json")):
+        if path.name != "trace.json":
+            spans.extend(json.loads(path.read_text()))
+    origin = min((s["start_s"] for s in spans), default=0)
+    events = [
+        {
+            "name": s["name"],
+            "cat": s["category"],
+            "ph": "X",
+            "ts": (s["start_s"] - origin) * 1e6,
+            "dur": s["duration_s"] * 1e6,
+            "pid": s["step"],
+            "tid": s["lane"],
+            "args": {"rss_mb": s["rss_mb"], "peak_rss_mb": s["peak_rss_mb"]},
+        }
+        for s in spans
+    ]
+    (directory / "trace.json").write_text(json.dumps({"traceEvents": events}))
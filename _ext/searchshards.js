@@ -0,0 +1,87 @@
+/*
+ * Loader for the sharded search index written by _ext/searchshards.py.
+ *
+ * searchindex.js sets an index whose "shards" lists the first term of each
+ * shard in _search/. Before a query runs, the shards that can hold terms
+ * starting with each query word are fetched, and only the matching terms
+ * are handed to searchtools.js.
+ */
+(function () {
+  var shards = {};
+
+  // Index of the first element of the sorted array that is >= word.
+  function lowerBound(sorted, word) {
+    var lo = 0, hi = sorted.length;
+    while (lo < hi) {
+      var mid = (lo + hi) >> 1;
+      if (sorted[mid] < word) lo = mid + 1; else hi = mid;
+    }
+    return lo;
+  }
+
+  // Shards whose term range overlaps the terms starting with word.
+  function shardsFor(first, word) {
+    var start = Math.max(lowerBound(first, word + "\u0000") - 1, 0);
+    var end = Math.max(lowerBound(first, word + "\uffff") - 1, 0);
+    var found = [];
+    for (var n = start; n <= end; n++) found.push(n);
+    return found;
+  }
+
+  function fetchShard(n) {
+    if (!shards[n]) {
+      shards[n] = fetch(DOCUMENTATION_OPTIONS.URL_ROOT + "_search/" + n + ".json")
+        .then(function (response) { return response.json(); });
+    }
+    return shards[n];
+  }
+
+  function decode(deltas) {
+    var files = [], file = 0;
+    for (var i = 0; i < deltas.length; i++) {
+      file += deltas[i];
+      files.push(file);
+    }
+    return files;
+  }
+
+  // The query words as typed and as stemmed, since either may be indexed.
+  function queryWords(text) {
+    var split = typeof splitQuery === "function" ? splitQuery(text) : text.split(/\s+/);
+    var stemmer = new Stemmer();
+    var words = [];
+    split.forEach(function (raw) {
+      var word = raw.toLowerCase().replace(/^-/, "");
+      if (word) words.push(word, stemmer.stemWord(word));
+    });
+    return words;
+  }
+
+  var query = Search.query;
+  Search.query = function (text) {
+    var index = Search._index;
+    if (!index || !index.shards) return query.apply(Search, arguments);
+    var args = arguments;
+    var words = queryWords(text);
+    var needed = {};
+    words.forEach(function (word) {
+      shardsFor(index.shards, word).forEach(function (n) { needed[n] = true; });
+    });
+    Promise.all(Object.keys(needed).map(fetchShard)).then(function (loaded) {
+      var terms = {}, titleterms = {};
+      loaded.forEach(function (shard) {
+        words.forEach(function (word) {
+          for (var i = lowerBound(shard.terms, word);
+               i < shard.terms.length && shard.terms[i].lastIndexOf(word, 0) === 0; i++) {
+            var term = shard.terms[i];
+            if (shard.postings[i] !== null) terms[term] = decode(shard.postings[i]);
+            if (shard.titles[i] !== null) titleterms[term] = decode(shard.titles[i]);
+          }
+        });
+      });
+      index.terms = terms;
+      index.titleterms = titleterms;
+      query.apply(Search, args);
+    });
+  };
+})();
@@ -0,0 +1,152 @@
+"""Split the Sphinx search index into on-demand, prefix-ordered shards.
+
+``searchindex.js`` holds every term of every page in one
+``Search.setIndex({...})`` call, which the search page downloads and
+parses in full before the first query, and ``searchtools.js`` then scans
+all terms for partial matches. After ``jb build`` this script rewrites it
+as:
+
+- ``searchindex.js``: the page list, titles and object index, plus the
+  first term of each shard;
+- ``_search/<n>.json``: consecutive runs of the sorted term list, with
+  the pages of each term as delta-encoded integer postings.
+
+``searchshards.js`` (copied to ``_static`` and loaded by ``search.html``)
+wraps ``Search.query``: it binary-searches the shard list for the shards
+that can hold terms starting with each query word, fetches only those,
+and hands ``searchtools.js`` the matching terms. The download for a query
+stays at a few shards however large the book grows. Partial matches are
+prefix matches ("distrib" finds "distribut"), not arbitrary substrings.
+
+An incremental Sphinx build loads the previous ``searchindex.js`` and only
+re-indexes the pages it rewrites, so the unsharded index is kept as
+``_build/.searchindex.js`` and put back with ``--restore`` before the next
+build (``build-book.sh`` and ``watch.py`` do).
+
+Usage, from the book root::
+
+    python _ext/searchshards.py [--restore] [HTML_DIR]
+"""
+import json
+import re
+import shutil
+import sys
+from pathlib import Path
+
+HTML_DIR = Path("_build") / "html"
+SHARD_TERMS = 1024
+LOADER = Path(__file__).with_name("searchshards.js")
+BACKUP = ".searchindex.js"
+JS_STRING = re.compile(r'"(?:\\.|[^"\\])*"')
+JS_KEY = re.compile(r"([{,]\s*)([A-Za-z_$][\w$]*)(\s*:)")
+
+
+def parse_index(text):
+    """Parse the object passed to ``Search.setIndex`` in ``searchindex.js``.
+
+    Recent Sphinx versions write JSON; older ones write a JavaScript
+    literal with unquoted keys, which are quoted here.
+    """
+    body = text[text.index("(") + 1:text.rindex(")")]
+    try:
+        return json.loads(body)
+    except ValueError:
+        pass
+    parts, last = [], 0
+    for match in JS_STRING.finditer(body):
+        parts.append(JS_KEY.sub(r'\1"\2"\3', body[last:match.start()]))
+        parts.append(match.group())
+        last = match.end()
+    parts.append(JS_KEY.sub(r'\1"\2"\3', body[last:]))
+    return json.loads("".join(parts))
+
+
+def postings(files):
+    """Delta-encode the sorted page numbers of a term, or return None if it has none."""
+    if files is None:
+        return None
+    files = sorted(files if isinstance(files, list) else [files])
+    if not files:
+        return None
+    return [files[0]] + [b - a for a, b in zip(files, files[1:])]
+
+
+def shard(index, size=SHARD_TERMS):
+    """Return ``(first terms, shards)`` for the terms and title terms of ``index``."""
+    terms, titles = index.pop("terms", {}), index.pop("titleterms", {})
+    # After an incremental build, terms of rewritten pages can be left with
+    # no pages at all.
+    encoded = {}
+    for word in sorted(set(terms) | set(titles)):
+        pages, title_pages = postings(terms.get(word)), postings(titles.get(word))
+        if pages is not None or title_pages is not None:
+            encoded[word] = pages, title_pages
+    words = list(encoded)
+    shards = []
+    for start in range(0, len(words), size):
+        chunk = words[start:start + size]
+        shards.append({
+            "terms": chunk,
+            "postings": [encoded[w][0] for w in chunk],
+            "titles": [encoded[w][1] for w in chunk],
+        })
+    return [s["terms"][0] for s in shards], shards
+
+
+def install_loader(root):
+    """Copy the loader to ``_static`` and load it from ``search.html``."""
+    shutil.copyfile(LOADER, root / "_static" / LOADER.name)
+    page = root / "search.html"
+    if not page.exists():
+        return
+    html = page.read_text(encoding="utf8")
+    if LOADER.name in html:
+        return
+    tag = re.search(r'<script[^>]*src="[^"]*searchtools[^"]*\.js"[^>]*>\s*</script>', html)
+    if tag is None:
+        return
+    loader = f'\n    <script src="_static/{LOADER.name}"></script>'
+    page.write_text(html[:tag.end()] + loader + html[tag.end():], encoding="utf8")
+
+
+def restore(root):
+    """Put the unsharded index back for an incremental Sphinx build.
+
+    Returns whether there was one to restore.
+    """
+    backup = root.parent / BACKUP
+    if not backup.exists() or not root.is_dir():
+        return False
+    shutil.copyfile(backup, root / "searchindex.js")
+    return True
+
+
+def main(argv):
+    paths = [arg for arg in argv if arg != "--restore"]
+    root = Path(paths[0]) if paths else HTML_DIR
+    if "--restore" in argv:
+        restore(root)
+        return 0
+    path = root / "searchindex.js"
+    text = path.read_text(encoding="utf8")
+    index = parse_index(text)
+    if "shards" in index:
+        print("search index already sharded")
+        return 0
+    shutil.copyfile(path, root.parent / BACKUP)
+    first_terms, shards = shard(index)
+    out = root / "_search"
+    shutil.rmtree(out, ignore_errors=True)
+    out.mkdir()
+    for number, data in enumerate(shards):
+        (out / f"{number}.json").write_text(json.dumps(data, separators=(",", ":")), encoding="utf8")
+    index.update(terms={}, titleterms={}, shards=first_terms)
+    path.write_text(f"Search.setIndex({json.dumps(index, separators=(',', ':'))})", encoding="utf8")
+    install_loader(root)
+    print(f"{sum(len(s['terms']) for s in shards)} terms in {len(shards)} shard(s); "
+          f"searchindex.js {len(text) / 1024:.0f} KiB -> {path.stat().st_size / 1024:.0f} KiB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
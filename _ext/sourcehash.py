@@ -0,0 +1,90 @@
+"""Keep Sphinx's incremental build working across fresh checkouts.
+
+Sphinx decides which documents to re-read by comparing file modification
+times with the time it last read them. A CI checkout gives every file a new
+mtime, so every page is re-read and every notebook is re-rendered even when
+nothing changed. This script hashes each book source and, for files whose
+content hash matches the previous build, restores the mtime recorded then.
+Files that really changed keep their new mtime and are rebuilt.
+
+Run it from the book root before ``jb build .`` (``build-book.sh`` does).
+"""
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+
+MANIFEST = Path("_build") / ".source-hashes.json"
+SOURCES = ["*.md", "*.ipynb", "_config.yml", "_toc.yml", "images/*"]
+
+
+def notebook_digest(path):
+    """Hash a notebook, ignoring outputs and execution counts.
+
+    Stored outputs and execution counts do not affect the built page when
+    notebooks are executed at build time, so they are left out of the hash;
+    so are the run timestamps some front ends record in cell metadata.
+    Everything else shapes the page: cell sources, metadata (tags such as
+    ``remove-input``), attachments and the notebook metadata.
+    """
+    nb = json.loads(path.read_text(encoding="utf8"))
+    content = {
+        "metadata": nb.get("metadata", {}),
+        "cells": [
+            {
+                "cell_type": c["cell_type"],
+                "source": "".join(c["source"]),
+                "metadata": {k: v for k, v in c.get("metadata", {}).items() if k != "execution"},
+                "attachments": c.get("attachments"),
+            }
+            for c in nb["cells"]
+        ],
+    }
+    return hashlib.sha256(json.dumps(content, sort_keys=True).encode()).hexdigest()
+
+
+def file_digest(path):
+    if path.suffix == ".ipynb":
+        return notebook_digest(path)
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def book_sources(root):
+    paths = set()
+    for pattern in SOURCES:
+        paths.update(p for p in root.glob(pattern) if p.is_file())
+    return sorted(paths)
+
+
+def restore_mtimes(root="."):
+    """Restore mtimes of unchanged sources and rewrite the manifest.
+
+    Returns the list of sources that changed since the previous build.
+    """
+    root = Path(root)
+    manifest_path = root / MANIFEST
+    try:
+        previous = json.loads(manifest_path.read_text())
+    except (FileNotFoundError, ValueError):
+        previous = {}
+
+    current, changed = {}, []
+    for path in book_sources(root):
+        key = path.relative_to(root).as_posix()
+        digest = file_digest(path)
+        entry = previous.get(key)
+        if entry and entry["sha256"] == digest:
+            os.utime(path, ns=(entry["mtime_ns"], entry["mtime_ns"]))
+        else:
+            changed.append(key)
+        current[key] = {"sha256": digest, "mtime_ns": path.stat().st_mtime_ns}
+
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    manifest_path.write_text(json.dumps(current, indent=1, sort_keys=True))
+    return changed
+
+
+if __name__ == "__main__":
+    changed = restore_mtimes(sys.argv[1] if len(sys.argv) > 1 else ".")
+    print(f"{len(changed)} changed source(s): {', '.join(changed) or 'none'}")
@@ -0,0 +1,345 @@
+"""Rebuild the book while it is being edited, and reload the browser.
+
+Builds the book once, serves ``_build/html`` and then watches the book
+sources (``*.md``, ``*.ipynb``, ``images/*``, ``_toc.yml`` and
+``_config.yml``). After each change:
+
+- ``sourcehash`` finds the files whose content really changed (saving a
+  file unchanged rebuilds nothing);
+- changed notebooks go through ``execute``: one whose code cells are all
+  unchanged is replayed from the cell cache, so prose edits in notebooks
+  run no code, and the others run on the warm kernels of a worker pool
+  kept for the whole session;
+- Sphinx runs in a child forked from this process, which imported it and
+  the book's extensions once at startup, and re-reads and rewrites only
+  the pages that are out of date; the search index is restored unsharded
+  first (see ``searchshards``) so that only the entries of those pages
+  change;
+- the post-build steps of ``build-book.sh`` run again, then every open
+  page reloads through a server-sent event.
+
+A change to ``_toc.yml`` or ``_config.yml`` rebuilds every page. Files
+are watched with ``watchdog`` (inotify on Linux), which is in
+``requirements.txt``; without it they are polled, and the startup message
+says so. A notebook is only re-executed when its cells change, not when a
+data file it reads does.
+
+Usage, from the book root::
+
+    python _ext/watch.py [--host HOST] [--port PORT]
+"""
+import argparse
+import functools
+import importlib
+import multiprocessing
+import pkgutil
+import queue
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import assets
+import execute
+import figures
+import searchshards
+from sourcehash import SOURCES, book_sources, restore_mtimes
+
+BUILD_DIR = Path("_build")
+FULL_REBUILD = {"_toc.yml", "_config.yml"}
+DEBOUNCE = 0.05
+POLL_INTERVAL = 0.25
+KEEPALIVE = 15
+RELOAD_PATH = "/_reload"
+RELOAD_SCRIPT = (
+    f'<script>new EventSource("{RELOAD_PATH}")'
+    '.addEventListener("reload", function () { location.reload(); });</script>'
+).encode()
+
+
+def is_source(root, path):
+    """Whether a changed ``path`` can be a book source (not a build output)."""
+    try:
+        relative = Path(path).resolve().relative_to(root.resolve())
+    except ValueError:
+        return False
+    if any(part.startswith((".", "_build")) for part in relative.parts):
+        return False
+    return any(relative.match(pattern) for pattern in SOURCES)
+
+
+def referencing(root, name):
+    """Return the pages whose source mentions the file ``name``."""
+    pages = []
+    for path in book_sources(root):
+        if path.suffix in (".md", ".ipynb") and Path(name).name in path.read_text(encoding="utf8"):
+            pages.append(path.relative_to(root).as_posix())
+    return pages
+
+
+def affected(root, changed):
+    """Return ``(notebooks to execute, pages to rebuild, whether all pages are)``."""
+    listed = execute.toc_notebooks(root)
+    if FULL_REBUILD & set(changed):
+        return listed, [], True
+    notebooks, pages = [], set()
+    for name in changed:
+        path = root / name
+        if path.suffix in (".md", ".ipynb"):
+            pages.add(name)
+            if path in listed:
+                notebooks.append(path)
+        else:
+            # Sphinx re-reads the pages that include a changed image; the
+            # list is only reported.
+            pages.update(referencing(root, name))
+    return notebooks, sorted(pages), False
+
+
+class Reloads:
+    """A counter of finished builds that server threads can wait on."""
+
+    def __init__(self):
+        self.generation = 0
+        self.condition = threading.Condition()
+
+    def notify(self):
+        with self.condition:
+            self.generation += 1
+            self.condition.notify_all()
+
+    def wait(self, seen, timeout):
+        with self.condition:
+            self.condition.wait_for(lambda: self.generation != seen, timeout)
+            return self.generation
+
+
+class Handler(SimpleHTTPRequestHandler):
+    """Serve the built site, adding the reload script to every page."""
+
+    def do_GET(self):
+        if self.path == RELOAD_PATH:
+            return self.send_reloads()
+        path = Path(self.translate_path(self.path))
+        if path.is_dir() and self.path.split("?")[0].endswith("/"):
+            path = path / "index.html"
+        if path.suffix != ".html" or not path.is_file():
+            return super().do_GET()
+        body = path.read_bytes()
+        end = body.rfind(b"</body>")
+        body = body[:end] + RELOAD_SCRIPT + body[end:] if end >= 0 else body + RELOAD_SCRIPT
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_reloads(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        reloads = self.server.reloads
+        seen = reloads.generation
+        try:
+            while True:
+                generation = reloads.wait(seen, KEEPALIVE)
+                if generation != seen:
+                    self.wfile.write(f"event: reload\ndata: {generation}\n\n".encode())
+                    seen = generation
+                else:
+                    self.wfile.write(b": keepalive\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def end_headers(self):
+        # Pages change under the browser; never let it reuse a stale copy.
+        self.send_header("Cache-Control", "no-cache")
+        super().end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(html, host, port, reloads):
+    handler = functools.partial(Handler, directory=str(html))
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.reloads = reloads
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def watch(root, changes):
+    """Put a token on ``changes`` whenever a book source may have changed."""
+    try:
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+    except ImportError:
+        threading.Thread(target=poll, args=(root, changes), daemon=True).start()
+        return f"polling every {POLL_INTERVAL}s: watchdog is not installed"
+
+    class Events(FileSystemEventHandler):
+        def on_any_event(self, event):
+            paths = [event.src_path, getattr(event, "dest_path", "")]
+            if any(path and is_source(root, path) for path in paths):
+                changes.put(None)
+
+    observer = Observer()
+    observer.schedule(Events(), str(root), recursive=True)
+    observer.daemon = True
+    observer.start()
+    return f"{type(observer).__name__} from watchdog"
+
+
+def poll(root, changes):
+    def snapshot():
+        mtimes = {}
+        for path in book_sources(root):
+            try:
+                mtimes[path] = path.stat().st_mtime_ns
+            except FileNotFoundError:
+                pass
+        return mtimes
+
+    last = snapshot()
+    while True:
+        time.sleep(POLL_INTERVAL)
+        current = snapshot()
+        if current != last:
+            changes.put(None)
+            last = current
+
+
+def sphinx_options(root):
+    """The arguments ``jb build`` passes to ``build_sphinx`` for this book."""
+    return {
+        "noconfig": True,
+        "path_config": str((root / "_config.yml").resolve()),
+        "confoverrides": {
+            "external_toc_path": (root / "_toc.yml").resolve().as_posix(),
+            "latex_individualpages": False,
+        },
+    }
+
+
+def preload_sphinx(root):
+    """Import Sphinx, Jupyter Book and the book's extensions without building."""
+    import sphinx.builders.html  # noqa: F401
+    from jupyter_book.config import get_final_config
+
+    options = sphinx_options(root)
+    sphinx_config, _ = get_final_config(
+        user_yaml=Path(options["path_config"]),
+        cli_config=options["confoverrides"],
+        sourcedir=root.resolve(),
+    )
+    for name in sphinx_config.get("extensions", []) + [sphinx_config.get("html_theme", "")]:
+        try:
+            module = importlib.import_module(name)
+        except ImportError:
+            continue
+        # Extensions such as myst_nb only import most of themselves in setup().
+        for info in pkgutil.walk_packages(getattr(module, "__path__", []), f"{name}."):
+            if info.name.endswith("__main__"):
+                continue
+            try:
+                importlib.import_module(info.name)
+            except Exception:
+                pass
+
+
+def run_sphinx(root, force_all):
+    """Build the site in a child forked from this process; returns whether it succeeded.
+
+    The child finds every module already imported but none of the state a
+    build leaves behind: the themes add their template directories to a
+    list Sphinx shares between applications, which would change the
+    configuration hash and make every later build in one process a full one.
+    """
+    def build():
+        from jupyter_book.sphinx import build_sphinx
+
+        result = build_sphinx(
+            root.resolve(), (root / BUILD_DIR / "html").resolve(),
+            force_all=force_all, quiet=True, **sphinx_options(root),
+        )
+        sys.exit(1 if result else 0)
+
+    process = multiprocessing.get_context("fork").Process(target=build)
+    process.start()
+    process.join()
+    return process.exitcode == 0
+
+
+def build(root, config, pool, notebooks, force_all):
+    """Execute ``notebooks``, then update the site; returns whether it built."""
+    if execute.execute_notebooks(notebooks, config, pool):
+        print("not rebuilding the site until the failed notebook(s) run")
+        return False
+    html = root / BUILD_DIR / "html"
+    searchshards.restore(html)
+    if not run_sphinx(root, force_all):
+        print("Sphinx build failed")
+        return False
+    searchshards.main([str(html)])
+    figures.main([str(root / BUILD_DIR)])
+    assets.main([str(html)])
+    return True
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args(argv)
+
+    root = Path(".")
+    config = execute.load_config(root)
+    listed = execute.toc_notebooks(root)
+    workers = execute.pool_size(config["workers"], len(listed))
+    reloads = Reloads()
+    changes = queue.Queue()
+    with ProcessPoolExecutor(workers, initializer=execute.init_worker, initargs=(config,)) as pool:
+        preload_sphinx(root)
+        restore_mtimes(root)
+        build(root, config, pool, listed, force_all=False)
+        server = serve(root / BUILD_DIR / "html", args.host, args.port, reloads)
+        method = watch(root, changes)
+        print(f"serving http://{args.host}:{server.server_port}/, watching for changes ({method})")
+        try:
+            while True:
+                changes.get()
+                # Editors often write a file in several steps.
+                time.sleep(DEBOUNCE)
+                while not changes.empty():
+                    changes.get_nowait()
+                start = time.perf_counter()
+                changed = restore_mtimes(root)
+                if not changed:
+                    continue
+                notebooks, pages, force_all = affected(root, changed)
+                print(f"changed: {', '.join(changed)}")
+                try:
+                    built = build(root, config, pool, notebooks, force_all)
+                except Exception:
+                    traceback.print_exc()
+                    built = False
+                if built:
+                    reloads.notify()
+                    print(
+                        f"rebuilt {'every page' if force_all else ', '.join(pages) or 'nothing'} "
+                        f"in {time.perf_counter() - start:.2f}s"
+                    )
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,64 @@
+"""Compare ``davpy.describe_wide`` with ``DataFrame.describe()`` on wide tables.
+
+Usage, from the book root::
+
+    python benchmarks/bench_describe.py [--rows 1000 10000] [--columns 10000]
+                                        [--workers N] [--nan 0.01] [--pandas-max 1e8]
+
+Each table has ``--columns`` normal float columns, with a fraction
+``--nan`` of missing values, so the per-column overhead of ``describe()``
+dominates. ``var``/``std`` are the moment part alone. pandas is only run
+up to ``--pandas-max`` cells. Peak memory is measured with ``tracemalloc``,
+which sees NumPy and pandas buffers; it does not include the table itself.
+"""
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from davpy import WideMoments, describe_wide  # noqa: E402
+from suite import measure  # noqa: E402
+
+
+def wide_frame(rows, columns, nan, seed=0):
+    rng = np.random.default_rng(seed)
+    values = rng.normal(20, 5, (rows, columns))
+    if nan:
+        values[rng.random((rows, columns)) < nan] = np.nan
+    return pd.DataFrame(values, columns=[f"Naruto-season-{i}" for i in range(columns)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=float, nargs="+", default=[1e3, 1e4])
+    parser.add_argument("--columns", type=int, default=10_000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--nan", type=float, default=0.01)
+    parser.add_argument("--pandas-max", type=float, default=1e8)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'columns':>8} {'method':>13} {'seconds':>9} {'Mcells/s':>9} {'peak MiB':>9}")
+    for rows in map(int, args.rows):
+        frame = wide_frame(rows, args.columns, args.nan)
+        cells = rows * args.columns
+        runs = [
+            ("describe_wide", lambda: describe_wide(frame, workers=args.workers)),
+            ("WideMoments", lambda: WideMoments(frame.columns).update(frame).std()),
+        ]
+        if cells <= args.pandas_max:
+            runs += [("describe", frame.describe), ("std", frame.std)]
+        results = {}
+        for name, func in runs:
+            seconds, peak = measure(lambda: results.update({name: func()}))
+            print(f"{rows:>10,} {args.columns:>8,} {name:>13} {seconds:>9.2f} "
+                  f"{cells / seconds / 1e6:>9.1f} {peak:>9.1f}")
+        if "describe" in results:
+            pd.testing.assert_frame_equal(results["describe_wide"], results["describe"], rtol=1e-9)
+            pd.testing.assert_series_equal(results["WideMoments"], results["std"], rtol=1e-9)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Compare the ``davpy.join`` paths with ``DataFrame.merge``.
+
+Usage, from the book root::
+
+    python benchmarks/bench_join.py [--sizes 1e5 1e6 1e7] [--dim 1e5]
+
+A fact table of each size (integer key, one float column) is joined to a
+dimension table of ``--dim`` rows. ``merge_indexed`` reuses one
+``KeyIndex`` across calls, as a reused dimension table would, so its
+index build time is reported separately.
+"""
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from davpy import KeyIndex, merge_indexed, merge_partitioned, merge_sorted  # noqa: E402
+from suite import measure  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1e5, 1e6, 1e7])
+    parser.add_argument("--dim", type=float, default=1e5)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    dim_rows = int(args.dim)
+    dim = pd.DataFrame({"key": rng.permutation(dim_rows), "attr": rng.random(dim_rows)})
+    with tempfile.TemporaryDirectory() as tmp:
+        seconds, _ = measure(lambda: KeyIndex.build(dim["key"].to_numpy()).save(tmp))
+        print(f"KeyIndex build + save for {dim_rows:,} keys: {seconds:.3f}s")
+        index = KeyIndex.load(tmp)
+
+        print(f"{'rows':>12} {'method':>18} {'seconds':>9} {'peak MiB':>9}")
+        for rows in map(int, args.sizes):
+            fact = pd.DataFrame({"key": rng.integers(0, dim_rows, rows), "value": rng.random(rows)})
+            presorted = fact.sort_values("key", kind="stable", ignore_index=True)
+            dim_sorted = dim.sort_values("key", ignore_index=True)
+            runs = [
+                ("DataFrame.merge", lambda: fact.merge(dim, on="key")),
+                ("merge_indexed", lambda: merge_indexed(fact, dim, "key", index)),
+                ("merge_sorted", lambda: merge_sorted(presorted, dim_sorted, "key")),
+                ("merge_partitioned", lambda: merge_partitioned(fact, dim, "key", workers=args.workers)),
+            ]
+            for name, func in runs:
+                seconds, peak = measure(func)
+                print(f"{rows:>12,} {name:>18} {seconds:>9.3f} {peak:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Check ``KLLSketch`` accuracy against exact ``Series.quantile``.
+
+Usage, from the book root::
+
+    python benchmarks/bench_quantiles.py [--rows 1e6] [--k 200] [--chunks 20]
+
+Uses the distributions generated in the "Data distribution" section of
+chapter 2 (centred, right- and left-skewed, bimodal, multimodal and
+uniform). Each is split into chunks, sketched chunk by chunk, merged and
+round-tripped through ``to_bytes``. The script reports the worst
+normalized rank error over the percentiles 1..99 and exits with status 1
+if any distribution exceeds the sketch's stated error bound.
+"""
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy.stats import skewnorm
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from davpy import KLLSketch  # noqa: E402
+
+
+def distributions(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    third = rows // 3
+    return {
+        "center": skewnorm.rvs(0, size=rows, random_state=rng),
+        "skewed right": skewnorm.rvs(10, size=rows, random_state=rng),
+        "skewed left": skewnorm.rvs(-10, size=rows, random_state=rng),
+        "bimodal": np.concatenate([rng.normal(0, 0.5, rows // 2), rng.normal(2, 0.5, rows // 2)]),
+        "multimodal": np.concatenate([rng.normal(mu, 0.5, third) for mu in (0, 2, 4)]),
+        "uniform": rng.uniform(-1, 1, rows),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=float, default=1e6)
+    parser.add_argument("--k", type=int, default=200)
+    parser.add_argument("--chunks", type=int, default=20)
+    args = parser.parse_args()
+
+    percentiles = np.arange(1, 100) / 100
+    failed = False
+    print(f"{'distribution':>13} {'max rank err':>13} {'bound':>7} {'IQR exact':>10} {'IQR sketch':>11}")
+    for name, values in distributions(int(args.rows)).items():
+        sketch = KLLSketch(args.k, seed=0)
+        for chunk in np.array_split(values, args.chunks):
+            part = KLLSketch(args.k).update(chunk)
+            sketch.merge(KLLSketch.from_bytes(part.to_bytes()))
+
+        series = pd.Series(values)
+        exact = np.sort(values)
+        ranks = np.searchsorted(exact, sketch.quantile(percentiles), side="right") / exact.size
+        error = np.abs(ranks - percentiles).max()
+        iqr = series.quantile(0.75) - series.quantile(0.25)
+        failed |= error > sketch.rank_error()
+        print(f"{name:>13} {error:>13.4f} {sketch.rank_error():>7.4f} {iqr:>10.4f} {sketch.iqr():>11.4f}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
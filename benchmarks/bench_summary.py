@@ -0,0 +1,51 @@
+"""Compare ``davpy.summarize`` with ``DataFrame.describe()``.
+
+Usage, from the book root::
+
+    python benchmarks/bench_summary.py [--sizes 1e6 1e7 1e8 1e9] [--pandas-max 1e8]
+
+Data is generated in chunks, so the streaming side never holds more than
+one chunk; pandas is only run up to ``--pandas-max`` rows because it needs
+the whole column in memory. Peak memory is measured with ``tracemalloc``,
+which sees NumPy and pandas buffers.
+"""
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from davpy import summarize  # noqa: E402
+from suite import measure  # noqa: E402
+
+CHUNK = 1_000_000
+
+
+def chunks(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    for start in range(0, rows, CHUNK):
+        yield rng.normal(20, 5, min(CHUNK, rows - start))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1e6, 1e7])
+    parser.add_argument("--pandas-max", type=float, default=1e8)
+    args = parser.parse_args()
+
+    print(f"{'rows':>14} {'method':>10} {'seconds':>9} {'Mrows/s':>9} {'peak MiB':>9}")
+    for rows in map(int, args.sizes):
+        runs = [("summarize", lambda: summarize(chunks(rows)).describe())]
+        if rows <= args.pandas_max:
+            runs.append(
+                ("describe", lambda: pd.DataFrame({"v": np.concatenate(list(chunks(rows)))}).describe())
+            )
+        for name, func in runs:
+            seconds, peak = measure(func)
+            print(f"{rows:>14,} {name:>10} {seconds:>9.2f} {rows / seconds / 1e6:>9.1f} {peak:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
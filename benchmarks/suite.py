@@ -0,0 +1,271 @@
+"""Benchmark suite for the computations demonstrated in the chapters.
+
+Usage, from the book root::
+
+    python benchmarks/suite.py [--sizes 1e3 1e4 1e5 1e6] [--only value_counts merge]
+                               [--repeat 3] [--pandas-max 1e7] [--threshold 0.25]
+                               [--results benchmarks/results.json] [--no-save]
+
+Every case pairs the pandas/NumPy call the chapter shows ("naive") with
+its ``davpy`` counterpart and runs both over each size, dtype and
+cardinality in its grid. Time is the best of ``--repeat`` runs; peak
+memory comes from one further run under ``tracemalloc``. Data is built in
+memory before timing starts, so sizes up to 10^8 need several GiB.
+
+Each invocation is appended to ``--results`` together with the commit,
+host and library versions. A measurement is flagged as a regression when
+it is more than ``--threshold`` slower than the median of the last five
+runs of the same benchmark on the same host; the script then exits with
+status 1.
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from davpy import (  # noqa: E402
+    Histogram,
+    KeyIndex,
+    Moments,
+    crosstab,
+    describe_wide,
+    frequency_table,
+    merge_indexed,
+    merge_sorted,
+    summarize,
+    synthetic,
+)
+
+HISTORY = 5
+NOISE_FLOOR = 1e-3
+
+
+def column(rng, size, dtype, cardinality):
+    """Return ``size`` values of ``dtype`` with at most ``cardinality`` distinct."""
+    if dtype == "float64":
+        return pd.Series(rng.normal(20, 5, size))
+    codes = rng.integers(0, min(cardinality, size), size)
+    if dtype == "int64":
+        return pd.Series(codes)
+    labels = np.array([f"label-{i}" for i in range(min(cardinality, size))], dtype=object)
+    if dtype == "category":
+        return pd.Series(pd.Categorical.from_codes(codes, labels))
+    return pd.Series(labels[codes])
+
+
+def value_counts_case(rng, size, dtype, cardinality):
+    s = column(rng, size, dtype, cardinality)
+    return {
+        "naive": lambda: s.value_counts(),
+        "davpy": lambda: frequency_table(s).value_counts(),
+    }
+
+
+def crosstab_case(rng, size, dtype, cardinality):
+    frame = pd.DataFrame({
+        "row": column(rng, size, dtype, cardinality),
+        "col": column(rng, size, dtype, 10),
+    })
+    return {
+        "naive": lambda: pd.crosstab(frame["row"], frame["col"]),
+        "davpy": lambda: crosstab(frame, "row", "col").to_frame(),
+    }
+
+
+def merge_case(rng, size, dtype, cardinality):
+    dim_rows = min(cardinality, size)
+    dim = pd.DataFrame({"key": rng.permutation(dim_rows), "attr": rng.random(dim_rows)})
+    fact = pd.DataFrame({"key": rng.integers(0, dim_rows, size), "value": rng.random(size)})
+    index = KeyIndex.build(dim["key"].to_numpy())
+    fact_sorted = fact.sort_values("key", kind="stable", ignore_index=True)
+    dim_sorted = dim.sort_values("key", ignore_index=True)
+    return {
+        "naive": lambda: fact.merge(dim, on="key"),
+        "davpy": lambda: merge_indexed(fact, dim, "key", index),
+        "davpy-sorted": lambda: merge_sorted(fact_sorted, dim_sorted, "key"),
+    }
+
+
+def quantile_case(rng, size, dtype, cardinality):
+    s = column(rng, size, dtype, cardinality)
+    return {
+        "naive": lambda: (s.quantile([0.25, 0.5, 0.75]), s.quantile(0.75) - s.quantile(0.25)),
+        "davpy": lambda: (lambda summary: (summary.quantile([0.25, 0.5, 0.75]), summary.iqr()))(
+            summarize(s)
+        ),
+    }
+
+
+def var_std_case(rng, size, dtype, cardinality):
+    s = column(rng, size, dtype, cardinality)
+
+    def moments():
+        m = Moments()
+        m.update(s.to_numpy())
+        return m.var(), m.std()
+
+    return {"naive": lambda: (s.var(), s.std()), "davpy": moments}
+
+
+def describe_case(rng, size, dtype, cardinality):
+    s = column(rng, size, dtype, cardinality)
+    return {
+        "naive": lambda: s.to_frame("v").describe(),
+        "davpy": lambda: summarize(s).describe("v"),
+    }
+
+
+def describe_wide_case(rng, size, dtype, cardinality):
+    # ``size`` cells spread over ``cardinality`` columns.
+    frame = pd.DataFrame(rng.normal(20, 5, (max(1, size // cardinality), cardinality)))
+    return {
+        "naive": lambda: frame.describe(),
+        "davpy": lambda: describe_wide(frame),
+    }
+
+
+def hist_case(rng, size, dtype, cardinality):
+    values = column(rng, size, dtype, cardinality).to_numpy()
+    return {
+        "naive": lambda: np.histogram(values, bins=50),
+        "davpy": lambda: Histogram(bins=50).update(values),
+    }
+
+
+def mixture_case(rng, size, dtype, cardinality):
+    components = [(0, 0.5), (2, 0.5), (4, 0.5)]
+    size -= size % len(components)
+    each = size // len(components)
+    return {
+        "naive": lambda: pd.concat(
+            [pd.Series(np.random.normal(loc, scale, each)) for loc, scale in components]
+        ),
+        "davpy": lambda: synthetic.mixture(size, components, seed=0),
+    }
+
+
+# name: (setup, [(dtype, cardinality), ...])
+CASES = {
+    "value_counts": (value_counts_case, [("int64", 10), ("int64", 10**4), ("str", 100), ("category", 100)]),
+    "crosstab": (crosstab_case, [("str", 10), ("str", 1000), ("category", 1000)]),
+    "merge": (merge_case, [("int64", 10**3), ("int64", 10**5)]),
+    "quantile": (quantile_case, [("float64", None)]),
+    "var_std": (var_std_case, [("float64", None)]),
+    "describe": (describe_case, [("float64", None)]),
+    "describe_wide": (describe_wide_case, [("float64", 100), ("float64", 1000)]),
+    "hist": (hist_case, [("float64", None)]),
+    "mixture": (mixture_case, [("float64", None)]),
+}
+
+
+def measure(func, repeat=1):
+    """Return the best time of ``repeat`` runs of ``func`` and its peak MiB.
+
+    Memory is traced during one more run, so tracing does not slow the
+    timed ones. The chapter benchmarks (``bench_*.py``) use it too.
+    """
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        seconds.append(time.perf_counter() - start)
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return min(seconds), peak / 2**20
+
+
+def key(result):
+    return (result["case"], result["impl"], result["size"], result["dtype"], result["cardinality"])
+
+
+def regressions(results, history, host, threshold):
+    """Return results slower than ``threshold`` over their recent median on ``host``."""
+    past = {}
+    for run in history:
+        if run["host"] == host:
+            for result in run["results"]:
+                past.setdefault(key(result), []).append(result["seconds"])
+    flagged = []
+    for result in results:
+        previous = past.get(key(result), [])[-HISTORY:]
+        if not previous:
+            continue
+        baseline = statistics.median(previous)
+        if result["seconds"] > baseline * (1 + threshold) and result["seconds"] - baseline > NOISE_FLOOR:
+            flagged.append((result, baseline))
+    return flagged
+
+
+def commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1e3, 1e4, 1e5, 1e6])
+    parser.add_argument("--only", nargs="+", choices=sorted(CASES), default=sorted(CASES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--pandas-max", type=float, default=1e7)
+    parser.add_argument("--threshold", type=float, default=0.25)
+    parser.add_argument("--results", type=Path, default=Path(__file__).with_name("results.json"))
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args()
+
+    host = f"{platform.node()} {platform.machine()}"
+    results = []
+    print(f"{'case':>12} {'impl':>12} {'rows':>12} {'dtype':>9} {'card':>7} {'seconds':>9} {'peak MiB':>9}")
+    for name in args.only:
+        setup, grid = CASES[name]
+        for size in map(int, args.sizes):
+            for dtype, cardinality in grid:
+                runs = setup(np.random.default_rng(0), size, dtype, cardinality)
+                for impl, func in runs.items():
+                    if impl == "naive" and size > args.pandas_max:
+                        continue
+                    seconds, peak = measure(func, args.repeat)
+                    results.append({
+                        "case": name, "impl": impl, "size": size, "dtype": dtype,
+                        "cardinality": cardinality, "seconds": seconds, "peak_mib": peak,
+                    })
+                    print(f"{name:>12} {impl:>12} {size:>12,} {dtype:>9} {cardinality or '':>7} "
+                          f"{seconds:>9.4f} {peak:>9.1f}")
+
+    history = json.loads(args.results.read_text())["runs"] if args.results.exists() else []
+    flagged = regressions(results, history, host, args.threshold)
+    for result, baseline in flagged:
+        print(f"REGRESSION {result['case']}/{result['impl']} rows={result['size']:,} "
+              f"dtype={result['dtype']} card={result['cardinality']}: "
+              f"{result['seconds']:.4f}s vs median {baseline:.4f}s")
+    if not args.no_save:
+        history.append({
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": commit(),
+            "host": host,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "results": results,
+        })
+        args.results.write_text(json.dumps({"runs": history}, indent=1))
+    return 1 if flagged else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
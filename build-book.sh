@@ -1,2 +1,26 @@
-rm -r _build 
-jb build .
\ No newline at end of file
+# Incremental build: unchanged pages reuse _build/.doctrees and unchanged
+# notebooks replay their cached cell outputs. Pass --clean to rebuild from
+# scratch, and --profile to write per-cell and per-phase timings to
+# _build/profile/ (cells replayed from the cache have none; combine with
+# --clean to profile every cell). After the build, the search index is split into shards,
+# figures get responsive WebP/PNG variants and static assets are bundled,
+# fingerprinted and precompressed. Pass --watch to serve the book on
+# http://127.0.0.1:8000/ and rebuild the pages whose sources change.
+set -e
+for arg in "$@"; do
+    case "$arg" in
+        --clean) rm -rf _build ;;
+        --profile) export BOOK_PROFILE=1 ;;
+        --watch) watch=1 ;;
+    esac
+done
+if [ -n "$watch" ]; then
+    exec python _ext/watch.py
+fi
+python _ext/sourcehash.py
+python _ext/execute.py
+python _ext/searchshards.py --restore
+jb build .
+python _ext/searchshards.py
+python _ext/figures.py
+python _ext/assets.py
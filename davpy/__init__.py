@@ -0,0 +1,55 @@
+"""Scalable versions of the computations shown in the book's chapters.
+
+The chapters use small in-memory DataFrames so that every step is visible.
+The modules here compute the same things over data that does not fit in
+memory: they consume chunked input, keep bounded state and merge partial
+results computed by different processes.
+"""
+from . import colcache, synthetic
+from .categorical import compact
+from .chunks import ChunkedArray, iter_chunks, iter_frames, read_csv_chunks, read_parquet_chunks
+from .contingency import Crosstab, crosstab
+from .describe import WideMoments, describe_wide
+from .frequency import FrequencyTable, frequency_table
+from .histogram import Histogram, histogram
+from .join import KeyIndex, merge_indexed, merge_partitioned, merge_sorted
+from .pipeline import Pipeline
+from .reshape import TransposeView, melt, pivot, transpose
+from .sketches import HeavyHitters, HyperLogLog, KLLSketch
+from .summary import Moments, Summary, summarize
+from .timeseries import TimeSeries
+
+__all__ = [
+    "ChunkedArray",
+    "Crosstab",
+    "FrequencyTable",
+    "HeavyHitters",
+    "Histogram",
+    "HyperLogLog",
+    "KLLSketch",
+    "KeyIndex",
+    "Moments",
+    "Pipeline",
+    "Summary",
+    "TimeSeries",
+    "TransposeView",
+    "WideMoments",
+    "colcache",
+    "compact",
+    "crosstab",
+    "describe_wide",
+    "frequency_table",
+    "histogram",
+    "iter_chunks",
+    "iter_frames",
+    "melt",
+    "merge_indexed",
+    "merge_partitioned",
+    "merge_sorted",
+    "pivot",
+    "read_csv_chunks",
+    "read_parquet_chunks",
+    "summarize",
+    "synthetic",
+    "transpose",
+]
@@ -0,0 +1,123 @@
+"""Compact encodings for the qualitative variable types.
+
+The "Types of variables" section of chapter 2 distinguishes nominal,
+binary, dummy and ordinal variables, but the examples store them all as
+Python strings (``smoking`` is "Yes"/"No", ``nationality`` a name).
+``compact`` infers the type of each column and converts it:
+
+- nominal text becomes a categorical, whose codes pandas stores as int8
+  or int16 when there are few enough categories;
+- binary text ("Yes"/"No", "True"/"False", ...) becomes booleans, stored
+  one bit per value (``bool[pyarrow]``) when ``pyarrow`` is installed and
+  one byte per value otherwise;
+- columns named in ``dummies``, whose values must be 0 or 1, become
+  booleans the same way; integer columns are never turned into booleans
+  on their own, since counts and codes can also be all 0s and 1s;
+- columns named in ``ordinals`` become ordered categoricals, so that
+  comparisons and sorting follow the given order.
+
+Frequency tables, contingency tables and joins in this package work on
+the integer codes of categorical columns rather than on the labels.
+"""
+import numpy as np
+import pandas as pd
+
+TRUE_VALUES = frozenset(["yes", "y", "true", "t", "1"])
+FALSE_VALUES = frozenset(["no", "n", "false", "f", "0"])
+
+
+def _binary_labels(uniques):
+    """Return the label meaning True if ``uniques`` look like a yes/no pair."""
+    labels = {str(u).strip().lower(): u for u in uniques}
+    if len(labels) == 2:
+        trues = TRUE_VALUES.intersection(labels)
+        falses = FALSE_VALUES.intersection(labels)
+        if len(trues) == 1 and len(falses) == 1:
+            return labels[next(iter(trues))]
+    return None
+
+
+def infer_kind(series, max_cardinality=0.5):
+    """Classify a column as "binary", "nominal" or None (leave as is).
+
+    Text columns are "nominal" when their distinct values are at most
+    ``max_cardinality`` times their length; free text stays as it is.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return "nominal"
+    if pd.api.types.is_bool_dtype(series.dtype):
+        return None
+    uniques = series.dropna().unique()
+    if series.dtype == object or pd.api.types.is_string_dtype(series.dtype):
+        if _binary_labels(uniques) is not None and not series.isna().any():
+            return "binary"
+        if len(uniques) <= max_cardinality * max(len(series), 1):
+            return "nominal"
+    return None
+
+
+def bits(values):
+    """Return ``values`` as booleans, bit-packed in memory if ``pyarrow`` is installed."""
+    values = np.asarray(values, dtype=bool)
+    try:
+        import pyarrow as pa
+    except ImportError:
+        return values
+    return pd.array(values, dtype=pd.ArrowDtype(pa.bool_()))
+
+
+def compact(frame, ordinals=None, max_cardinality=0.5, downcast=True, dummies=None):
+    """Return ``frame`` with qualitative columns in compact representations.
+
+    Parameters
+    ----------
+    frame : DataFrame
+    ordinals : dict, optional
+        Maps column names to their categories in order, e.g.
+        ``{"satisfaction": ["low", "medium", "high"]}``. A value missing
+        from the list raises ``ValueError`` instead of becoming NaN.
+    max_cardinality : float
+        Largest ratio of distinct values to rows for a text column to be
+        treated as nominal.
+    downcast : bool
+        Also downcast other integer columns to the smallest integer type.
+    dummies : list of str, optional
+        0/1 indicator columns to store as booleans.
+    """
+    ordinals = ordinals or {}
+    dummies = set(dummies or ())
+    columns = {}
+    for name, series in frame.items():
+        if name in ordinals:
+            unknown = set(series.dropna().unique().tolist()) - set(ordinals[name])
+            if unknown:
+                raise ValueError(
+                    f"ordinal column {name!r} holds values not in its categories: {sorted(map(str, unknown))}"
+                )
+            columns[name] = pd.Categorical(series, categories=ordinals[name], ordered=True)
+            continue
+        if name in dummies:
+            if series.isna().any() or not set(series.unique().tolist()) <= {0, 1}:
+                raise ValueError(f"dummy column {name!r} must only hold 0 and 1")
+            columns[name] = bits(series.to_numpy() == 1)
+            continue
+        kind = infer_kind(series, max_cardinality)
+        if kind == "binary":
+            columns[name] = bits(series.to_numpy() == _binary_labels(series.unique()))
+        elif kind == "nominal":
+            columns[name] = series.astype("category")
+        elif downcast and pd.api.types.is_integer_dtype(series.dtype):
+            columns[name] = pd.to_numeric(series, downcast="integer")
+        else:
+            columns[name] = series
+    return pd.DataFrame(columns, index=frame.index)
+
+
+def pack_bits(values):
+    """Pack a boolean array eight values to a byte."""
+    return np.packbits(np.asarray(values, dtype=bool))
+
+
+def unpack_bits(packed, length):
+    """Inverse of ``pack_bits`` for an array of ``length`` values."""
+    return np.unpackbits(np.asarray(packed), count=length).astype(bool)
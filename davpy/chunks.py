@@ -0,0 +1,195 @@
+"""Chunked input: turn files, arrays and generators into a stream of arrays."""
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CHUNKSIZE = 1_000_000
+
+
+def read_csv_chunks(path, column, chunksize=DEFAULT_CHUNKSIZE, **kwargs):
+    """Yield ``column`` of a CSV file as NumPy arrays of ``chunksize`` rows."""
+    reader = pd.read_csv(path, usecols=[column], chunksize=chunksize, **kwargs)
+    for frame in reader:
+        yield frame[column].to_numpy()
+
+
+def read_parquet_chunks(path, column, chunksize=DEFAULT_CHUNKSIZE):
+    """Yield ``column`` of a Parquet file as NumPy arrays, one per batch.
+
+    Requires ``pyarrow``.
+    """
+    import pyarrow.parquet as pq
+
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=[column]):
+        yield batch.column(0).to_numpy(zero_copy_only=False)
+
+
+class ChunkedArray:
+    """Several 1-D arrays presented as one logical column, without copying.
+
+    The bimodal and multimodal examples of chapter 2 build their samples
+    with ``pd.concat``, which copies every earlier sample at each step and
+    repeats the index. ``ChunkedArray.concat`` only keeps references to
+    the buffers, and everything that reads chunks (``summarize``,
+    ``KLLSketch``, ``histogram``, ...) consumes it chunk by chunk::
+
+        >>> distribution_bi = ChunkedArray.concat(s1, s2)
+        >>> distribution_mul = ChunkedArray.concat(distribution_bi, s3)
+        >>> distribution_mul.hist(bins=50)
+    """
+
+    def __init__(self, chunks=()):
+        self.chunks = [_as_array(chunk) for chunk in chunks]
+
+    @classmethod
+    def concat(cls, *parts):
+        """Concatenate arrays, Series and ChunkedArrays by reference."""
+        chunks = []
+        for part in parts:
+            chunks.extend(part.chunks if isinstance(part, ChunkedArray) else [part])
+        return cls(chunks)
+
+    @property
+    def offsets(self):
+        """Start position of each chunk, followed by the total length."""
+        return np.concatenate([[0], np.cumsum([c.size for c in self.chunks])])
+
+    @property
+    def dtype(self):
+        return np.result_type(*self.chunks) if self.chunks else np.dtype(np.float64)
+
+    @property
+    def nbytes(self):
+        return sum(chunk.nbytes for chunk in self.chunks)
+
+    def __len__(self):
+        return int(sum(chunk.size for chunk in self.chunks))
+
+    def __iter__(self):
+        return iter(self.chunks)
+
+    def __getitem__(self, key):
+        offsets = self.offsets
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            if step != 1:
+                raise ValueError("ChunkedArray only supports contiguous slices")
+            views = []
+            for chunk, first in zip(self.chunks, offsets):
+                low, high = max(start - first, 0), min(stop - first, chunk.size)
+                if low < high:
+                    views.append(chunk[low:high])
+            return ChunkedArray(views)
+        position = key + len(self) if key < 0 else key
+        if not 0 <= position < len(self):
+            raise IndexError(key)
+        index = np.searchsorted(offsets, position, side="right") - 1
+        return self.chunks[index][position - offsets[index]]
+
+    def __array__(self, dtype=None, copy=None):
+        return self.to_numpy(dtype)
+
+    def to_numpy(self, dtype=None):
+        """Materialize the column; this is the only method that copies."""
+        if not self.chunks:
+            return np.empty(0, dtype=dtype or np.float64)
+        return np.concatenate(self.chunks).astype(dtype or self.dtype, copy=False)
+
+    def describe(self):
+        from .summary import summarize
+
+        return summarize(self).describe()
+
+    def quantile(self, q):
+        from .sketches import KLLSketch
+
+        sketch = KLLSketch()
+        for chunk in self.chunks:
+            sketch.update(chunk)
+        return sketch.quantile(q)
+
+    def hist(self, bins=50, ax=None, **kwargs):
+        """Plot like ``Series.hist``, binning chunk by chunk."""
+        from .histogram import histogram
+
+        return histogram(self, bins=bins).plot(ax=ax, **kwargs)
+
+    def __repr__(self):
+        return f"ChunkedArray(length={len(self)}, chunks={len(self.chunks)}, dtype={self.dtype})"
+
+
+def _as_array(values):
+    """Return ``values`` as a 1-D ndarray, without copying when possible."""
+    if isinstance(values, pd.Series):
+        values = values.to_numpy()
+    return np.asarray(values).reshape(-1)
+
+
+def _values(series):
+    """Return the values of a Series, keeping categoricals as Categorical."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.array
+    return series.to_numpy()
+
+
+def iter_chunks(source, column=None, chunksize=DEFAULT_CHUNKSIZE):
+    """Yield the values of ``source`` as a sequence of 1-D NumPy arrays.
+
+    Categorical columns are yielded as ``pd.Categorical`` so that consumers
+    can work on their integer codes.
+
+    Parameters
+    ----------
+    source : path, array, Series, DataFrame, ChunkedArray or iterable of arrays
+        CSV and Parquet paths are read in chunks of ``chunksize`` rows;
+        arrays and Series are a single chunk; a ChunkedArray yields its
+        buffers; any other iterable is taken to already yield chunks.
+    column : str, optional
+        Column to read from files and DataFrames.
+    """
+    if isinstance(source, (str, Path)):
+        suffix = Path(source).suffix.lower()
+        if suffix in (".parquet", ".pq"):
+            yield from read_parquet_chunks(source, column, chunksize)
+        else:
+            yield from read_csv_chunks(source, column, chunksize)
+    elif isinstance(source, pd.DataFrame):
+        yield _values(source[column])
+    elif isinstance(source, pd.Series):
+        yield _values(source)
+    elif isinstance(source, np.ndarray):
+        yield source.ravel()
+    elif isinstance(source, ChunkedArray):
+        yield from source.chunks
+    else:
+        for chunk in source:
+            if isinstance(chunk, pd.Series):
+                yield _values(chunk)
+            elif isinstance(chunk, pd.Categorical):
+                yield chunk
+            else:
+                yield np.asarray(chunk).ravel()
+
+
+def iter_frames(source, columns=None, chunksize=DEFAULT_CHUNKSIZE):
+    """Yield DataFrames holding ``columns`` of ``source``, chunk by chunk.
+
+    ``source`` is a CSV or Parquet path, a DataFrame, or an iterable of
+    DataFrames. ``columns=None`` reads every column.
+    """
+    columns = None if columns is None else list(columns)
+    if isinstance(source, (str, Path)):
+        if Path(source).suffix.lower() in (".parquet", ".pq"):
+            import pyarrow.parquet as pq
+
+            batches = pq.ParquetFile(source).iter_batches(batch_size=chunksize, columns=columns)
+            for batch in batches:
+                yield batch.to_pandas()
+        else:
+            yield from pd.read_csv(source, usecols=columns, chunksize=chunksize)
+    elif isinstance(source, pd.DataFrame):
+        yield source if columns is None else source[columns]
+    else:
+        for frame in source:
+            yield frame if columns is None else frame[columns]
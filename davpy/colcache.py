@@ -0,0 +1,211 @@
+"""A memory-mapped columnar cache for loaded datasets.
+
+Chapter 3 describes the loop "data loading, cleaning, formatting,
+transformation" that an analysis goes through again and again. Each pass
+usually starts by parsing the raw source from scratch. ``load`` parses a
+source once, stores every typed column as its own ``.npy`` file keyed on
+a hash of the source and the reader arguments, and on later calls maps
+those files into memory instead of parsing::
+
+    >>> survey = load("survey.csv")               # parses, then caches
+    >>> survey = load("survey.csv")               # maps the cached columns
+
+Numeric and datetime columns are mapped without copying. Text columns
+are stored dictionary-encoded (integer codes plus their labels) and come
+back as categoricals over the mapped codes; text index levels come back
+as text. Boolean columns are stored bit-packed, eight values to a byte,
+and unpacked on load into their original dtype (``bool``, ``boolean`` or
+``bool[pyarrow]``). Timezone-aware datetimes are stored as UTC ticks plus
+their zone, and nullable (``Int64``, ``Float64``, ``boolean``) columns as
+their values plus a bit-packed mask; both are rebuilt, not mapped, on
+load. A source is only cached if it loads back equal to what the reader
+returned, text columns aside; otherwise, e.g. for object columns holding
+anything but strings, it is returned uncached.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .categorical import pack_bits, unpack_bits
+
+DEFAULT_CACHE_DIR = Path(".davpy_cache")
+MASKED_ARRAYS = (pd.arrays.IntegerArray, pd.arrays.FloatingArray, pd.arrays.BooleanArray)
+
+
+def source_key(path, reader, kwargs, quick=False):
+    """Hash the source file and how it is read.
+
+    With ``quick`` the file's size and modification time stand in for its
+    content, which avoids reading it but trusts the file system.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    path = Path(path)
+    if quick:
+        stat = path.stat()
+        digest.update(f"{path.resolve()}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    else:
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 22), b""):
+                digest.update(block)
+    name = getattr(reader, "__qualname__", repr(reader))
+    digest.update(f"{name}:{sorted(kwargs.items())!r}".encode())
+    return digest.hexdigest()
+
+
+def _is_text(dtype):
+    return dtype == object or pd.api.types.is_string_dtype(dtype)
+
+
+def _as_cached(frame):
+    """``frame`` as ``open_frame`` returns it: text columns as categoricals."""
+    text = [name for name, dtype in frame.dtypes.items() if _is_text(dtype)]
+    return frame.astype(dict.fromkeys(text, "category")) if text else frame
+
+
+def save_frame(frame, directory):
+    """Write ``frame`` as one ``.npy`` file per column plus ``meta.json``.
+
+    An index other than the default ``RangeIndex`` is stored as extra
+    columns, one per level, and its names are kept in ``meta.json``.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    index, names = [], []
+    if frame.index.name is not None or not frame.index.equals(pd.RangeIndex(len(frame))):
+        names = list(frame.index.names)
+        index = [f"__index_level_{i}__" for i in range(len(names))]
+        levels = pd.DataFrame(
+            {label: frame.index.get_level_values(i) for i, label in enumerate(index)}
+        )
+        frame = pd.concat([levels, frame.reset_index(drop=True)], axis=1)
+    meta = {"rows": len(frame), "index": index, "index_names": names, "columns": []}
+    for i, (name, column) in enumerate(frame.items()):
+        entry = {"name": name, "file": f"col{i}.npy"}
+        dtype = column.dtype
+        if isinstance(dtype, pd.CategoricalDtype) or _is_text(dtype):
+            if not isinstance(dtype, pd.CategoricalDtype) and (
+                pd.api.types.infer_dtype(column, skipna=True) != "string"
+            ):
+                raise TypeError(f"cannot cache column {name!r}: it holds values other than strings")
+            categorical = column.astype("category")
+            entry["kind"] = "category"
+            entry["dtype"] = str(dtype)
+            entry["ordered"] = bool(categorical.cat.ordered)
+            entry["categories"] = categorical.cat.categories.tolist()
+            values = categorical.cat.codes.to_numpy()
+        elif isinstance(dtype, pd.DatetimeTZDtype):
+            # Stored as UTC ticks; NaT is the minimum int64 like in numpy.
+            entry["kind"] = "datetimetz"
+            entry["unit"] = dtype.unit
+            entry["tz"] = str(dtype.tz)
+            values = column.array.asi8
+        elif pd.api.types.is_bool_dtype(dtype) and not column.isna().any():
+            entry["kind"] = "bits"
+            entry["dtype"] = str(dtype)
+            values = pack_bits(column.to_numpy(dtype=bool))
+        elif isinstance(column.array, MASKED_ARRAYS):
+            # Nullable Int64/Float64/boolean: the values with NA filled,
+            # plus a bit-packed mask.
+            entry["kind"] = "masked"
+            entry["dtype"] = str(dtype)
+            entry["mask"] = f"col{i}.mask.npy"
+            mask = column.isna().to_numpy()
+            np.save(directory / entry["mask"], pack_bits(mask))
+            values = column.to_numpy(dtype=dtype.numpy_dtype, na_value=dtype.numpy_dtype.type(0))
+        elif pd.api.types.is_datetime64_dtype(dtype):
+            entry["kind"] = "datetime"
+            entry["dtype"] = str(dtype)
+            values = column.to_numpy().view(np.int64)
+        else:
+            entry["kind"] = "numeric"
+            values = column.to_numpy()
+        if values.dtype == object:
+            # np.load cannot map object arrays, and pickles them otherwise.
+            raise TypeError(f"cannot cache column {name!r} of dtype {dtype}")
+        np.save(directory / entry["file"], values)
+        meta["columns"].append(entry)
+    (directory / "meta.json").write_text(json.dumps(meta))
+
+
+def open_frame(directory, mmap=True):
+    """Map the columns written by ``save_frame`` back into a DataFrame."""
+    directory = Path(directory)
+    meta = json.loads((directory / "meta.json").read_text())
+    mode = "r" if mmap else None
+    columns = {}
+    for entry in meta["columns"]:
+        values = np.load(directory / entry["file"], mmap_mode=mode)
+        if entry["kind"] == "category":
+            values = pd.Categorical.from_codes(
+                values, entry["categories"], ordered=entry["ordered"], validate=False
+            )
+            if entry["name"] in meta["index"] and entry.get("dtype", "category") != "category":
+                values = values.astype(entry["dtype"])
+        elif entry["kind"] == "bits":
+            values = unpack_bits(values, meta["rows"])
+            if entry.get("dtype", "bool") != "bool":
+                values = pd.array(values, dtype=entry["dtype"])
+        elif entry["kind"] == "datetime":
+            values = values.view(entry["dtype"])
+        elif entry["kind"] == "datetimetz":
+            utc = pd.DatetimeIndex(values.view(f"M8[{entry['unit']}]")).tz_localize("UTC")
+            values = utc.tz_convert(entry["tz"])
+        elif entry["kind"] == "masked":
+            mask = unpack_bits(np.load(directory / entry["mask"]), meta["rows"])
+            array_type = pd.api.types.pandas_dtype(entry["dtype"]).construct_array_type()
+            values = array_type(np.asarray(values), mask)
+        columns[entry["name"]] = values
+    frame = pd.DataFrame(columns, copy=False)
+    if meta.get("index"):
+        frame = frame.set_index(meta["index"])
+        frame.index.names = meta.get("index_names", meta["index"])
+    return frame
+
+
+def load(path, reader=pd.read_csv, cache_dir=DEFAULT_CACHE_DIR, quick=False, **kwargs):
+    """Read ``path`` with ``reader(path, **kwargs)``, through the column cache.
+
+    Parameters
+    ----------
+    path : path
+        Source file.
+    reader : callable
+        Parser returning a DataFrame; ``pd.read_csv`` by default.
+    cache_dir : path
+        Where cached columns are kept, one directory per source key.
+    quick : bool
+        Key on file size and mtime instead of hashing the content.
+    """
+    key = source_key(path, reader, kwargs, quick)
+    entry = Path(cache_dir) / key
+    if (entry / "meta.json").exists():
+        try:
+            return open_frame(entry)
+        except (TypeError, ValueError):
+            # Written by a version that stored columns it cannot load.
+            shutil.rmtree(entry, ignore_errors=True)
+
+    frame = reader(path, **kwargs)
+    Path(cache_dir).mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(dir=cache_dir, prefix=f".{key}-"))
+    try:
+        save_frame(frame, staging)
+        # Only a directory that loads back as ``frame`` is published under the key.
+        pd.testing.assert_frame_equal(open_frame(staging, mmap=False), _as_cached(frame))
+    except (TypeError, ValueError, AssertionError) as error:
+        shutil.rmtree(staging, ignore_errors=True)
+        warnings.warn(f"not caching {path}: {error}", stacklevel=2)
+        return frame
+    try:
+        os.replace(staging, entry)
+    except OSError:
+        # Another process cached the same source first; use its copy.
+        shutil.rmtree(staging, ignore_errors=True)
+    return open_frame(entry)
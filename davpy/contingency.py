@@ -0,0 +1,186 @@
+"""Sparse contingency tables built chunk by chunk.
+
+``pd.crosstab``, used in the "Contingency table" section of chapter 2,
+groups the full frame and pivots it into a dense table. ``Crosstab``
+instead factorizes both columns into integer codes, counts each chunk with
+``np.bincount`` and keeps the table as sparse coordinates (row code,
+column code, count). Tables of different chunks or processes merge, and
+only ``to_frame()`` builds the labelled, dense table wanted for display or
+for ``.plot.bar(stacked=True)``.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from functools import reduce
+
+import numpy as np
+import pandas as pd
+
+from .chunks import iter_frames
+
+# Chunks whose table has fewer cells than this are counted densely with
+# bincount; larger ones go through np.unique on the combined codes.
+DENSE_CELLS = 1 << 22
+
+
+def _translate(codes, mapping):
+    """Map local ``codes`` through ``mapping``, keeping -1 for missing values."""
+    if not len(mapping):
+        return np.full(len(codes), -1, dtype=np.int64)
+    return np.where(codes >= 0, mapping[np.maximum(codes, 0)], -1)
+
+
+class Labels:
+    """A growing mapping from labels to integer codes.
+
+    ``categories`` keeps the category order of categorical input, which
+    ``order`` follows as long as every value seen was categorical.
+    """
+
+    def __init__(self):
+        self.index = pd.Index([])
+        self.categories = None
+        self.plain = False
+
+    def encode(self, values):
+        """Return the codes of ``values``, adding unseen labels; -1 for NaN."""
+        if isinstance(values, pd.Series):
+            values = values.array
+        if isinstance(values, pd.Categorical):
+            self._add_categories(values.categories)
+            return _translate(np.asarray(values.codes), self._extend(values.categories))
+        self.plain = True
+        codes, uniques = pd.factorize(np.asarray(values))
+        return _translate(codes, self._extend(uniques))
+
+    def _add_categories(self, categories):
+        if self.categories is None:
+            self.categories = pd.Index(categories)
+        else:
+            self.categories = self.categories.append(categories[~categories.isin(self.categories)])
+
+    def absorb(self, other):
+        """Take in the labels of ``other``; returns their codes here."""
+        if other.categories is not None:
+            self._add_categories(other.categories)
+        self.plain |= other.plain
+        return self._extend(other.index)
+
+    def order(self, codes):
+        """Sort ``codes`` like ``pd.crosstab``: by category, else by label."""
+        labels = self.index[codes]
+        if self.categories is not None and not self.plain:
+            return codes[np.argsort(self.categories.get_indexer(labels), kind="stable")]
+        return codes[labels.argsort()]
+
+    def _extend(self, labels):
+        """Return the global codes of ``labels``, appending the new ones."""
+        labels = pd.Index(labels)
+        codes = self.index.get_indexer(labels)
+        new = codes < 0
+        if new.any():
+            codes[new] = np.arange(len(self.index), len(self.index) + new.sum())
+            self.index = self.index.append(labels[new]) if len(self.index) else labels[new]
+        return codes
+
+
+class Crosstab:
+    """Accumulate a two-way contingency table of two categorical columns."""
+
+    def __init__(self, rownames=None, colnames=None):
+        self.rownames = rownames
+        self.colnames = colnames
+        self.rows = Labels()
+        self.cols = Labels()
+        self.row_codes = np.empty(0, dtype=np.int64)
+        self.col_codes = np.empty(0, dtype=np.int64)
+        self.counts = np.empty(0, dtype=np.int64)
+
+    def update(self, row_values, col_values):
+        rows = self.rows.encode(row_values)
+        cols = self.cols.encode(col_values)
+        valid = (rows >= 0) & (cols >= 0)
+        rows, cols = rows[valid], cols[valid]
+        if rows.size == 0:
+            return self
+        width = int(cols.max()) + 1
+        height = int(rows.max()) + 1
+        if height * width <= DENSE_CELLS:
+            counts = np.bincount(rows * width + cols, minlength=height * width)
+            cells = np.flatnonzero(counts)
+            counts = counts[cells]
+        else:
+            cells, counts = np.unique(rows * width + cols, return_counts=True)
+        self._add(cells // width, cells % width, counts)
+        return self
+
+    def _add(self, rows, cols, counts):
+        """Append coordinates and sum the duplicates."""
+        rows = np.concatenate([self.row_codes, rows])
+        cols = np.concatenate([self.col_codes, cols])
+        counts = np.concatenate([self.counts, counts])
+        keys, inverse = np.unique((rows << 32) | cols, return_inverse=True)
+        self.counts = np.bincount(inverse.ravel(), weights=counts, minlength=keys.size).astype(np.int64)
+        self.row_codes = keys >> 32
+        self.col_codes = keys & 0xFFFFFFFF
+
+    def merge(self, other):
+        """Fold another table in, translating its codes into this one's."""
+        rows = self.rows.absorb(other.rows)
+        cols = self.cols.absorb(other.cols)
+        self._add(rows[other.row_codes], cols[other.col_codes], other.counts)
+        return self
+
+    @property
+    def shape(self):
+        return len(self.rows.index), len(self.cols.index)
+
+    def to_sparse(self):
+        """Return the counts as a ``scipy.sparse.csr_matrix``, rows and
+        columns in the order labels were first seen (see ``rows.index`` and
+        ``cols.index``)."""
+        from scipy import sparse
+
+        return sparse.coo_matrix(
+            (self.counts, (self.row_codes, self.col_codes)), shape=self.shape
+        ).tocsr()
+
+    def to_frame(self):
+        """Return the labelled table, laid out like ``pd.crosstab``.
+
+        Only labels with a count appear. Categorical input keeps the order
+        of its categories; other labels are sorted.
+        """
+        table = np.zeros(self.shape, dtype=np.int64)
+        table[self.row_codes, self.col_codes] = self.counts
+        rows = self.rows.order(np.unique(self.row_codes))
+        cols = self.cols.order(np.unique(self.col_codes))
+        return pd.DataFrame(
+            table[np.ix_(rows, cols)],
+            index=pd.Index(self.rows.index[rows], name=self.rownames),
+            columns=pd.Index(self.cols.index[cols], name=self.colnames),
+        )
+
+
+def _crosstab_partition(args):
+    source, row, col, chunksize = args
+    table = Crosstab(row, col)
+    for frame in iter_frames(source, [row, col], chunksize):
+        table.update(frame[row], frame[col])
+    return table
+
+
+def crosstab(source, row, col, workers=1, chunksize=1_000_000):
+    """Build a ``Crosstab`` of columns ``row`` and ``col`` of ``source``.
+
+    ``source`` is anything ``iter_frames`` accepts, or a list of file
+    paths, which are treated as partitions and counted by ``workers``
+    processes before being merged.
+    """
+    if isinstance(source, list) and all(isinstance(p, str) for p in source):
+        jobs = [(path, row, col, chunksize) for path in source]
+        if workers > 1:
+            with ProcessPoolExecutor(workers) as pool:
+                parts = list(pool.map(_crosstab_partition, jobs))
+        else:
+            parts = [_crosstab_partition(job) for job in jobs]
+        return reduce(Crosstab.merge, parts, Crosstab(row, col))
+    return _crosstab_partition((source, row, col, chunksize))
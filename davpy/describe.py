@@ -0,0 +1,204 @@
+"""Descriptive statistics of wide tables, column blocks at a time.
+
+The "Summary tables" section of chapter 2 calls ``ages_data.describe()``
+on a handful of columns. On a table with thousands of numeric columns, the
+``Naruto-season-N`` layout of "Anatomy of a data table" scaled up,
+``describe()`` summarizes one column at a time and takes seconds per
+thousand columns. ``describe_wide`` packs the numeric columns into one
+column-major float block instead and splits it into contiguous column
+slices, which a thread pool summarizes side by side (NumPy releases the
+GIL). Within a slice:
+
+- count, mean, M2, min and max come from a single pass over tiles small
+  enough to stay in cache, merged with Chan et al.'s update;
+- quantiles are exact, with pandas' linear interpolation, from one
+  partition (or, when the slice has NaNs, one sort) of a copy of the slice.
+
+The result has the layout of ``DataFrame.describe()``. ``WideMoments``
+holds the moment state alone and merges like ``Moments``, so a wide table
+read in row chunks can be summarized chunk by chunk::
+
+    >>> moments = WideMoments(columns)
+    >>> for chunk in iter_frames("wide.csv"):
+    ...     moments.update(chunk)
+    >>> moments.std()
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Rows and cells per tile of the moment pass, and bytes per column slice.
+TILE_ROWS = 4096
+TILE_CELLS = 2**18
+SLICE_BYTES = 32 * 2**20
+
+
+def _pack(frame):
+    """Return the numeric columns of ``frame`` and a column-major float64 block of them."""
+    numeric = frame.select_dtypes("number")
+    if numeric.shape[1] == 0:
+        raise ValueError("describe_wide needs at least one numeric column")
+    block = numeric.to_numpy(dtype=np.float64, na_value=np.nan)
+    # A consolidated float frame already is column-major; anything else is
+    # copied once here.
+    return numeric.columns, np.asfortranarray(block)
+
+
+class WideMoments:
+    """Count, mean, M2, minimum and maximum of every column of a 2-D block.
+
+    The vectorized counterpart of ``Moments``: ``update`` takes a block of
+    rows (an array or a DataFrame with the same numeric columns) and
+    ``merge`` combines the state of two row partitions.
+    """
+
+    def __init__(self, columns):
+        self.columns = pd.Index(columns)
+        width = len(self.columns)
+        self.count = np.zeros(width, dtype=np.int64)
+        self.mean = np.zeros(width)
+        self.m2 = np.zeros(width)
+        self.min = np.full(width, np.inf)
+        self.max = np.full(width, -np.inf)
+
+    def update(self, block):
+        """Add a block of rows; NaNs are skipped like in pandas."""
+        if isinstance(block, pd.DataFrame):
+            block = _pack(block)[1]
+        rows, width = block.shape
+        # Tiles of contiguous column runs: a row block spanning every
+        # column of a column-major block would stride through all of it.
+        height = max(1, min(rows, TILE_ROWS))
+        step = max(1, TILE_CELLS // height)
+        for left in range(0, width, step):
+            columns = slice(left, left + step)
+            for top in range(0, rows, height):
+                self._update_tile(block[top:top + height, columns], columns)
+        return self
+
+    def _update_tile(self, tile, columns):
+        valid = ~np.isnan(tile)
+        count = valid.sum(axis=0)
+        if count.sum() == tile.size:
+            mean = tile.sum(axis=0) / np.maximum(count, 1)
+            m2 = np.square(tile - mean).sum(axis=0)
+        else:
+            mean = np.where(valid, tile, 0.0).sum(axis=0) / np.maximum(count, 1)
+            m2 = np.where(valid, np.square(tile - mean), 0.0).sum(axis=0)
+        # fmin/fmax skip NaN, and give NaN only for all-NaN columns.
+        self._combine(
+            columns, count, mean, m2, np.fmin.reduce(tile, axis=0), np.fmax.reduce(tile, axis=0)
+        )
+
+    def _combine(self, columns, count, mean, m2, low, high):
+        """Chan et al.'s merge of another partition into ``columns`` of the state."""
+        seen = self.count[columns]
+        total = seen + count
+        safe = np.maximum(total, 1)
+        delta = mean - self.mean[columns]
+        self.mean[columns] += delta * count / safe
+        self.m2[columns] += m2 + delta**2 * seen * count / safe
+        self.count[columns] = total
+        self.min[columns] = np.fmin(self.min[columns], low)
+        self.max[columns] = np.fmax(self.max[columns], high)
+
+    def merge(self, other):
+        """Combine with the moments of another row partition (Chan et al.)."""
+        self._combine(slice(None), other.count, other.mean, other.m2, other.min, other.max)
+        return self
+
+    def var(self, ddof=1):
+        """Variance of every column, NaN where there are not more than ``ddof`` values."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return pd.Series(
+                np.where(self.count > ddof, self.m2 / (self.count - ddof), np.nan),
+                index=self.columns,
+            )
+
+    def std(self, ddof=1):
+        return np.sqrt(self.var(ddof))
+
+    def to_frame(self, ddof=1):
+        """The count, mean, std, min and max rows of ``describe()``."""
+        empty = self.count == 0
+        return pd.DataFrame(
+            [
+                self.count.astype(np.float64),
+                np.where(empty, np.nan, self.mean),
+                self.std(ddof).to_numpy(),
+                np.where(empty, np.nan, self.min),
+                np.where(empty, np.nan, self.max),
+            ],
+            index=["count", "mean", "std", "min", "max"],
+            columns=self.columns,
+        )
+
+
+def _quantiles(block, count, q):
+    """Exact quantiles of every column of ``block``, with linear interpolation."""
+    if block.shape[0] == 0:
+        return np.full((len(q), block.shape[1]), np.nan)
+    if (count == block.shape[0]).all():
+        # np.quantile partitions its input in place when allowed to.
+        return np.quantile(np.array(block, order="F"), q, axis=0, overwrite_input=True)
+    ordered = np.sort(block, axis=0)  # NaNs sort last
+    position = np.multiply.outer(q, np.maximum(count - 1, 0))
+    below = np.floor(position).astype(np.intp)
+    above = np.minimum(below + 1, np.maximum(count - 1, 0))
+    fraction = position - below
+    low = np.take_along_axis(ordered, below, axis=0)
+    high = np.take_along_axis(ordered, above, axis=0)
+    result = low + (high - low) * fraction
+    result[:, count == 0] = np.nan
+    return result
+
+
+def _describe_slice(block, columns, q):
+    moments = WideMoments(columns).update(block)
+    return moments, _quantiles(block, moments.count, q)
+
+
+def _percentiles(percentiles):
+    if percentiles is None:
+        percentiles = [0.25, 0.5, 0.75]
+    q = sorted(set(percentiles))
+    if any(not 0 <= p <= 1 for p in q):
+        raise ValueError("percentiles should all be in the interval [0, 1]")
+    return np.asarray(q, dtype=np.float64)
+
+
+def describe_wide(frame, percentiles=None, workers=None):
+    """Return ``frame.describe()`` for the numeric columns of a wide table.
+
+    Parameters
+    ----------
+    frame : DataFrame
+        Table to summarize; non-numeric (and boolean) columns are left
+        out, as ``describe()`` does for mixed tables.
+    percentiles : list of float, optional
+        Quantiles to include, between 0 and 1. Defaults to the quartiles.
+    workers : int, optional
+        Threads summarizing column slices. Defaults to the number of CPUs.
+    """
+    q = _percentiles(percentiles)
+    columns, block = _pack(frame)
+    rows, width = block.shape
+    workers = workers or os.cpu_count() or 1
+    # Enough slices to balance the threads, each small enough that the
+    # copies the quantiles need stay bounded.
+    per_slice = max(1, min(-(-width // (4 * workers)), SLICE_BYTES // max(8 * rows, 1)))
+    bounds = [(start, min(start + per_slice, width)) for start in range(0, width, per_slice)]
+    with ThreadPoolExecutor(workers) as pool:
+        parts = list(pool.map(
+            lambda bound: _describe_slice(block[:, bound[0]:bound[1]], columns[bound[0]:bound[1]], q),
+            bounds,
+        ))
+    summary = pd.concat([moments.to_frame() for moments, _ in parts], axis=1)
+    quantiles = np.concatenate([values for _, values in parts], axis=1)
+    labels = [f"{100 * p:g}%" for p in q]
+    result = pd.concat(
+        [summary.iloc[:4], pd.DataFrame(quantiles, index=labels, columns=columns), summary.iloc[4:]]
+    )
+    return result
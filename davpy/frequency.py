@@ -0,0 +1,158 @@
+"""Frequency tables for columns with many distinct values.
+
+``Series.value_counts()``, used in the "Frequency table" and "Mode"
+sections of chapter 2, builds a hash table of every distinct value at
+once. ``FrequencyTable`` builds the same table chunk by chunk in one of
+three modes:
+
+``"exact"``
+    Exact counts. Categorical and small-range integer chunks are counted
+    with ``np.bincount`` on their codes instead of hashing.
+``"topk"``
+    The most frequent values only, from a ``HeavyHitters`` summary with a
+    guaranteed bound on the count error.
+``"distinct"``
+    Only the number of distinct values, from a ``HyperLogLog`` sketch.
+
+In every mode the result is a Series shaped like ``value_counts()``, so
+``table.value_counts(sort=False).plot.bar()`` draws the chapter's plot.
+"""
+import numpy as np
+import pandas as pd
+
+from .chunks import iter_chunks
+from .sketches import HeavyHitters, HyperLogLog
+
+MODES = ("exact", "topk", "distinct")
+
+# Integer chunks whose values span less than this are counted by bincount.
+BINCOUNT_SPAN = 1 << 20
+
+
+def _chunk_counts(values):
+    """Exact counts of one chunk, as a Series indexed by value."""
+    if isinstance(values, pd.Series):
+        values = values.array
+    if isinstance(values, (pd.Categorical, pd.arrays.Categorical)):
+        codes = np.asarray(values.codes)
+        counts = np.bincount(codes[codes >= 0], minlength=len(values.categories))
+        series = pd.Series(counts, index=values.categories.to_numpy())
+        return series[series > 0]
+    values = np.asarray(values)
+    if values.dtype.kind in "iu" and values.size:
+        low, high = values.min(), values.max()
+        if int(high) - int(low) < BINCOUNT_SPAN:
+            # Narrow signed dtypes (int8 from ``compact``) would wrap around
+            # in ``values - low``; unsigned ones cannot, as values >= low.
+            if values.dtype.kind == "i":
+                offsets = values.astype(np.int64) - np.int64(low)
+            else:
+                offsets = values - low
+            counts = np.bincount(offsets.astype(np.intp))
+            present = np.flatnonzero(counts)
+            index = (present + int(low)).astype(values.dtype)
+            return pd.Series(counts[present], index=index)
+    return pd.Series(values).value_counts(sort=False, dropna=True)
+
+
+class FrequencyTable:
+    """Accumulate a frequency table over chunks.
+
+    Parameters
+    ----------
+    mode : {"exact", "topk", "distinct"}
+    k : int
+        Number of values returned by ``value_counts()`` in ``"topk"`` mode.
+    capacity : int, optional
+        Counters kept by the heavy-hitter summary; defaults to ``50 * k``.
+    precision : int
+        HyperLogLog precision in ``"distinct"`` mode.
+    name : str, optional
+        Name given to the index of the output, usually the column name.
+    """
+
+    def __init__(self, mode="exact", k=10, capacity=None, precision=14, name=None):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}, got {mode!r}")
+        self.mode = mode
+        self.k = k
+        self.name = name
+        self.n = 0
+        if mode == "exact":
+            self.sketch = pd.Series(dtype=np.int64)
+        elif mode == "topk":
+            self.sketch = HeavyHitters(capacity or 50 * k)
+        else:
+            self.sketch = HyperLogLog(precision)
+
+    def update(self, values):
+        if self.mode == "exact":
+            counts = _chunk_counts(values)
+            self.sketch = self.sketch.add(counts, fill_value=0).astype(np.int64)
+            self.n += int(counts.sum())
+        else:
+            values = np.asarray(values)
+            values = values[~pd.isna(values)]
+            self.sketch.update(values)
+            self.n += values.size
+        return self
+
+    def merge(self, other):
+        if other.mode != self.mode:
+            raise ValueError(f"cannot merge a {other.mode!r} table into a {self.mode!r} one")
+        if self.mode == "exact":
+            self.sketch = self.sketch.add(other.sketch, fill_value=0).astype(np.int64)
+        else:
+            self.sketch.merge(other.sketch)
+        self.n += other.n
+        return self
+
+    @property
+    def error_bound(self):
+        """Worst-case error of the result: 0 for exact counts, the maximum
+        undercount per value for ``"topk"``, and the relative standard error
+        of the distinct count for ``"distinct"``."""
+        if self.mode == "exact":
+            return 0
+        if self.mode == "topk":
+            return self.sketch.error_bound
+        return self.sketch.relative_error
+
+    def value_counts(self, sort=True):
+        """Return counts like ``Series.value_counts()``.
+
+        With ``sort=False`` the values are in ascending order, which is the
+        order wanted for a bar plot of the table.
+        """
+        if self.mode == "distinct":
+            raise ValueError("a 'distinct' table only knows distinct(), not the counts")
+        if self.mode == "exact":
+            counts = self.sketch.copy()
+        else:
+            top = self.sketch.top(self.k)
+            counts = pd.Series([c for _, c in top], index=[v for v, _ in top], dtype=np.int64)
+        counts = counts.sort_values(ascending=False, kind="stable") if sort else counts.sort_index()
+        counts.index.name = self.name
+        counts.name = "count"
+        return counts
+
+    def distinct(self):
+        """Return the number of distinct values, estimated in ``"distinct"`` mode."""
+        if self.mode == "distinct":
+            return self.sketch.count()
+        if self.mode == "exact":
+            return len(self.sketch)
+        raise ValueError("a 'topk' table does not know the number of distinct values")
+
+    def mode_values(self):
+        """Return the most frequent value(s), like ``Series.mode()``."""
+        counts = self.value_counts()
+        return pd.Series(np.sort(counts.index[counts == counts.iloc[0]].to_numpy()))
+
+
+def frequency_table(source, column=None, mode="exact", **kwargs):
+    """Build a ``FrequencyTable`` from anything ``iter_chunks`` accepts."""
+    table = FrequencyTable(mode, name=kwargs.pop("name", column), **kwargs)
+    for chunk in iter_chunks(source, column):
+        table.update(chunk)
+    return table
@@ -0,0 +1,186 @@
+"""Streaming histograms that plot from their bin counts.
+
+Every plot in the "Data distribution" section of chapter 2 is a
+``Series.hist(bins=50)`` over a fully materialized series. ``Histogram``
+keeps only the bin counts: it is updated chunk by chunk, partial histograms
+computed by different workers merge, and ``plot()`` draws from the counts,
+so several overlaid histograms never need their raw samples in memory at
+the same time::
+
+    >>> ax = None
+    >>> for sigma, alpha in [(3, 0.8), (2, 0.5), (1, 0.5)]:
+    ...     h = Histogram(bins=50)
+    ...     for chunk in chunks_of_normal(1, sigma):
+    ...         h.update(chunk)
+    ...     ax = h.plot(ax=ax, alpha=alpha)
+
+Binning is either fixed, from explicit ``edges`` or a ``range``, or
+adaptive: the range is taken from the first chunk and, when later values
+fall outside it, the bin width is doubled (merging pairs of bins) until
+every value fits, so the number of bins never changes.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from functools import reduce
+
+import numpy as np
+
+from .chunks import iter_chunks
+
+
+class Histogram:
+    """Bin counts over fixed or adaptive edges.
+
+    Parameters
+    ----------
+    bins : int
+        Number of bins; rounded up to an even number in adaptive mode.
+    range : (float, float), optional
+        Fixed range of uniform bins. Values outside it are counted in
+        ``underflow`` and ``overflow``.
+    edges : array_like, optional
+        Fixed, possibly non-uniform, bin edges. Overrides ``bins`` and
+        ``range``.
+    """
+
+    def __init__(self, bins=50, range=None, edges=None):
+        self.adaptive = edges is None and range is None
+        if edges is not None:
+            self.edges = np.asarray(edges, dtype=np.float64)
+        elif range is not None:
+            self.edges = np.linspace(range[0], range[1], bins + 1)
+        else:
+            self.edges = None
+            bins += bins % 2
+        self.bins = bins if self.edges is None else self.edges.size - 1
+        self.counts = np.zeros(self.bins, dtype=np.int64)
+        self.underflow = self.overflow = 0
+        # Values equal to the last edge, counted in the last bin because it
+        # is closed on the right; they move up when that edge stops being last.
+        self.on_last_edge = 0
+
+    @property
+    def uniform(self):
+        widths = np.diff(self.edges)
+        return np.allclose(widths, widths[0])
+
+    def _widen(self, low, high):
+        """Double the bin width until [low, high] fits (adaptive mode)."""
+        while low < self.edges[0] or high > self.edges[-1]:
+            width = self.edges[1] - self.edges[0]
+            pairs = self.counts.reshape(-1, 2).sum(axis=1)
+            # Every other old edge is kept as is, so the merged pairs hold
+            # exactly the values that fall between the new edges.
+            kept = self.edges[::2]
+            added = 2 * width * np.arange(1, self.bins // 2 + 1)
+            if low < self.edges[0]:
+                # Grow to the left: the old bins become the right half.
+                self.edges = np.concatenate([kept[0] - added[::-1], kept])
+                self.counts = np.concatenate([np.zeros(self.bins // 2, np.int64), pairs])
+            else:
+                self.edges = np.concatenate([kept, kept[-1] + added])
+                self.counts = np.concatenate([pairs, np.zeros(self.bins // 2, np.int64)])
+                self.counts[self.bins // 2 - 1] -= self.on_last_edge
+                self.counts[self.bins // 2] += self.on_last_edge
+                self.on_last_edge = 0
+
+    def update(self, values):
+        """Add a chunk of values; NaNs are skipped."""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return self
+        low, high = values.min(), values.max()
+        if self.edges is None:
+            if high == low:
+                low, high = low - 0.5, high + 0.5
+            self.edges = np.linspace(low, high, self.bins + 1)
+        elif self.adaptive:
+            self._widen(low, high)
+
+        first, last = self.edges[0], self.edges[-1]
+        self.underflow += int(np.count_nonzero(values < first))
+        self.overflow += int(np.count_nonzero(values > last))
+        self.on_last_edge += int(np.count_nonzero(values == last))
+        values = values[(values >= first) & (values <= last)]
+        if self.uniform:
+            index = ((values - first) * (self.bins / (last - first))).astype(np.intp)
+            np.minimum(index, self.bins - 1, out=index)
+            # Rounding can put values next to an edge in the neighbouring
+            # bin; correct against the edges like np.histogram does.
+            index -= values < self.edges[index]
+            index += (values >= self.edges[index + 1]) & (index != self.bins - 1)
+        else:
+            index = np.searchsorted(self.edges, values, side="right") - 1
+        # The last bin is closed on the right, as in np.histogram.
+        np.minimum(index, self.bins - 1, out=index)
+        self.counts += np.bincount(index, minlength=self.bins)
+        return self
+
+    def merge(self, other):
+        """Add another histogram's counts.
+
+        Identical edges add exactly. Otherwise each of ``other``'s bins is
+        added to the bin of this histogram containing its centre, after
+        widening this one to cover ``other`` when it is adaptive.
+        """
+        if other.edges is None:
+            return self
+        if self.edges is None:
+            self.edges = other.edges.copy()
+            self.bins = other.bins
+            self.counts = np.zeros(self.bins, dtype=np.int64)
+            self.adaptive = self.adaptive and self.bins % 2 == 0
+        if self.edges.shape == other.edges.shape and np.allclose(self.edges, other.edges):
+            self.counts += other.counts
+            self.on_last_edge += other.on_last_edge
+        else:
+            if self.adaptive:
+                self._widen(other.edges[0], other.edges[-1])
+            centres = (other.edges[:-1] + other.edges[1:]) / 2
+            index = np.clip(np.searchsorted(self.edges, centres, side="right") - 1, 0, self.bins - 1)
+            self.counts += np.bincount(index, weights=other.counts, minlength=self.bins).astype(np.int64)
+        self.underflow += other.underflow
+        self.overflow += other.overflow
+        return self
+
+    @property
+    def total(self):
+        return int(self.counts.sum()) + self.underflow + self.overflow
+
+    def plot(self, ax=None, grid=True, **kwargs):
+        """Draw the histogram like ``Series.hist`` and return the axes.
+
+        Extra keyword arguments such as ``alpha`` go to ``Axes.hist``.
+        """
+        import matplotlib.pyplot as plt
+
+        ax = ax or plt.gca()
+        ax.hist(self.edges[:-1], bins=self.edges, weights=self.counts, **kwargs)
+        ax.grid(grid)
+        return ax
+
+
+def _histogram_partition(args):
+    source, column, kwargs = args
+    hist = Histogram(**kwargs)
+    for chunk in iter_chunks(source, column):
+        hist.update(chunk)
+    return hist
+
+
+def histogram(source, column=None, workers=1, **kwargs):
+    """Build a ``Histogram`` from anything ``iter_chunks`` accepts.
+
+    A list of file paths is treated as partitions, binned by ``workers``
+    processes and merged; pass fixed ``edges`` or ``range`` so that the
+    partial histograms merge exactly.
+    """
+    if isinstance(source, list) and all(isinstance(p, str) for p in source):
+        jobs = [(path, column, kwargs) for path in source]
+        if workers > 1:
+            with ProcessPoolExecutor(workers) as pool:
+                parts = list(pool.map(_histogram_partition, jobs))
+        else:
+            parts = [_histogram_partition(job) for job in jobs]
+        return reduce(Histogram.merge, parts, Histogram(**kwargs))
+    return _histogram_partition((source, column, kwargs))
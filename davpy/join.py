@@ -0,0 +1,244 @@
+"""Join paths for fact tables joined against dimension tables.
+
+The "Relational database" section of chapter 2 joins two survey tables
+with ``tabular_data.merge(tabular_data_2, on='Name')``. ``DataFrame.merge``
+builds a hash table of the keys on every call and needs both tables in
+memory. This module offers three alternatives:
+
+``KeyIndex`` / ``merge_indexed``
+    A sorted index of a dimension table's keys, built once, saved to disk
+    and memory-mapped back, then reused for every join against it.
+``merge_sorted``
+    A merge for inputs that are already sorted on the key, which skips
+    sorting and hashing altogether.
+``merge_partitioned``
+    A grace hash join: both inputs are read chunk by chunk, hash
+    partitioned into spill files on disk, and the partitions are joined
+    independently by a process pool.
+
+All three return the same frame as ``DataFrame.merge`` for ``how="inner"``
+and ``how="left"`` (up to row order for ``merge_partitioned``).
+"""
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .chunks import iter_frames
+
+HOWS = ("inner", "left")
+
+
+def _keys(values):
+    """Return join keys as an array that sorts and searches natively."""
+    values = np.asarray(values)
+    return values.astype(str) if values.dtype == object else values
+
+
+class KeyIndex:
+    """Sorted keys of a table plus the row position of each sorted key."""
+
+    def __init__(self, keys, order):
+        self.keys = keys
+        self.order = order
+        self.unique = bool(keys.size < 2 or (keys[1:] != keys[:-1]).all())
+
+    @classmethod
+    def build(cls, keys, presorted=False):
+        keys = _keys(keys)
+        if presorted:
+            return cls(keys, np.arange(keys.size))
+        order = np.argsort(keys, kind="stable")
+        return cls(keys[order], order)
+
+    def save(self, path):
+        """Write the index as ``<path>/keys.npy`` and ``<path>/order.npy``."""
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        np.save(path / "keys.npy", self.keys)
+        np.save(path / "order.npy", self.order)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Load a saved index, memory-mapped unless ``mmap`` is False."""
+        mode = "r" if mmap else None
+        path = Path(path)
+        return cls(np.load(path / "keys.npy", mmap_mode=mode), np.load(path / "order.npy", mmap_mode=mode))
+
+    def lookup(self, values, how="inner"):
+        """Match ``values`` against the index.
+
+        Returns ``(left, right)`` row positions of every matching pair, in
+        the order of ``values``. With ``how="left"``, unmatched values get
+        one pair with a right position of -1.
+        """
+        if how not in HOWS:
+            raise ValueError(f"how must be one of {HOWS}, got {how!r}")
+        values = _keys(values)
+        if not self.keys.size:
+            left = np.arange(values.size) if how == "left" else np.empty(0, dtype=np.intp)
+            return left, np.full(left.size, -1, dtype=np.intp)
+        low = np.searchsorted(self.keys, values, side="left")
+        if self.unique:
+            # Each value matches at most one key: test the insertion point
+            # instead of searching a second time for the end of the run.
+            found = np.asarray(self.keys)[np.minimum(low, self.keys.size - 1)] == values
+            matches = (found & (low < self.keys.size)).astype(np.intp)
+            if how == "inner" or matches.all():
+                left = np.flatnonzero(matches) if how == "inner" else np.arange(values.size)
+                return left, np.asarray(self.order)[low[left]]
+        else:
+            matches = np.searchsorted(self.keys, values, side="right") - low
+        counts = np.maximum(matches, 1) if how == "left" else matches
+        left = np.repeat(np.arange(values.size), counts)
+        within = np.arange(left.size) - np.repeat(np.cumsum(counts) - counts, counts)
+        sorted_pos = np.repeat(low, counts) + within
+        right = np.where(
+            np.repeat(matches, counts) > 0,
+            np.asarray(self.order)[np.minimum(sorted_pos, self.keys.size - 1)],
+            -1,
+        )
+        return left, right
+
+
+def _assemble(left, right, on, left_pos, right_pos, suffixes=("_x", "_y")):
+    """Build the merged frame from matched row positions, like ``merge``."""
+    left_part = left.iloc[left_pos].reset_index(drop=True)
+    right_part = right.drop(columns=[on]).reset_index(drop=True)
+    if (right_pos < 0).any():
+        right_part = right_part.reindex(right_pos).reset_index(drop=True)
+    else:
+        right_part = right_part.iloc[right_pos].reset_index(drop=True)
+    overlap = left_part.columns.intersection(right_part.columns)
+    if len(overlap):
+        left_part = left_part.rename(columns={c: f"{c}{suffixes[0]}" for c in overlap})
+        right_part = right_part.rename(columns={c: f"{c}{suffixes[1]}" for c in overlap})
+    return pd.concat([left_part, right_part], axis=1)
+
+
+def _join_keys(left, right):
+    """Return comparable key arrays for two key columns.
+
+    Two categorical columns are compared on integer codes: ``left``'s codes
+    are translated into ``right``'s categories (-2 where a category is
+    missing from ``right``), so no labels are hashed or compared.
+    """
+    if isinstance(left.dtype, pd.CategoricalDtype) and isinstance(right.dtype, pd.CategoricalDtype):
+        mapping = right.cat.categories.get_indexer(left.cat.categories)
+        mapping = np.where(mapping < 0, -2, mapping)
+        codes = left.cat.codes.to_numpy()
+        return np.where(codes >= 0, mapping[codes], -1), right.cat.codes.to_numpy()
+    return left.to_numpy(), right.to_numpy()
+
+
+def merge_indexed(left, right, on, index=None, how="inner"):
+    """Join ``left`` to ``right`` on ``on`` through a ``KeyIndex`` of ``right``.
+
+    Pass a prebuilt (or loaded) ``index`` to avoid indexing ``right`` again.
+    It must have been built from the same representation of the keys,
+    i.e. from the codes when both key columns are categorical.
+    """
+    left_keys, right_keys = _join_keys(left[on], right[on])
+    index = index or KeyIndex.build(right_keys)
+    left_pos, right_pos = index.lookup(left_keys, how)
+    return _assemble(left, right, on, left_pos, right_pos)
+
+
+def merge_sorted(left, right, on, how="inner", check=True):
+    """Join two frames that are already sorted on ``on``.
+
+    Nothing is sorted or hashed: ``right``'s key column is searched in
+    place. With ``check`` the sortedness of ``right`` is verified first.
+    """
+    keys = _keys(_join_keys(left[on], right[on])[1])
+    if check and keys.size and not (keys[1:] >= keys[:-1]).all():
+        raise ValueError(f"right is not sorted on {on!r}")
+    return merge_indexed(left, right, on, KeyIndex.build(keys, presorted=True), how)
+
+
+def _partition_keys(keys):
+    """Return ``keys`` in a representation that hashes equal values equally.
+
+    ``pd.util.hash_array`` hashes by dtype, so an int32 and an int64 key of
+    equal value (after ``compact``), or a float and an int key (from CSV
+    chunks), would land in different partitions and never meet. Numeric
+    keys are hashed as float64 and categorical keys as their labels.
+    """
+    if isinstance(keys.dtype, pd.CategoricalDtype):
+        keys = keys.astype(keys.cat.categories.dtype)
+    if pd.api.types.is_numeric_dtype(keys.dtype):
+        return keys.to_numpy(dtype=np.float64, na_value=np.nan)
+    return _keys(keys.to_numpy())
+
+
+def _partition(source, on, side, partitions, spill_dir, chunksize):
+    """Hash-partition ``source`` into ``<spill_dir>/<side>-<p>-<chunk>.pkl``.
+
+    Returns an empty frame with the columns and dtypes of ``source``, or
+    None if it yields no chunk at all.
+    """
+    schema = None
+    for chunk_no, frame in enumerate(iter_frames(source, chunksize=chunksize)):
+        if schema is None:
+            schema = frame.iloc[:0]
+        buckets = pd.util.hash_array(_partition_keys(frame[on])) % partitions
+        for p in np.unique(buckets):
+            frame[buckets == p].to_pickle(Path(spill_dir) / f"{side}-{p}-{chunk_no}.pkl")
+    return schema
+
+
+def _join_partition(args):
+    spill_dir, p, on, how, right_schema = args
+    spill_dir = Path(spill_dir)
+
+    def read(side):
+        files = sorted(spill_dir.glob(f"{side}-{p}-*.pkl"))
+        return pd.concat([pd.read_pickle(f) for f in files], ignore_index=True) if files else None
+
+    left, right = read("left"), read("right")
+    if left is None or (right is None and how == "inner"):
+        return None
+    return merge_indexed(left, right_schema if right is None else right, on, how=how)
+
+
+def merge_partitioned(left, right, on, how="inner", partitions=16, workers=None,
+                      spill_dir=None, chunksize=1_000_000):
+    """Grace hash join of two inputs that may not fit in memory together.
+
+    Parameters
+    ----------
+    left, right : DataFrame, CSV/Parquet path or iterable of DataFrames
+        Read chunk by chunk and spilled to disk by key hash.
+    partitions : int
+        Number of hash partitions; each must fit in a worker's memory.
+    workers : int, optional
+        Processes joining partitions; defaults to the number of cores.
+    spill_dir : path, optional
+        Where partitions are spilled, in a fresh subdirectory removed
+        afterwards; the system temporary directory by default.
+    """
+    if how not in HOWS:
+        raise ValueError(f"how must be one of {HOWS}, got {how!r}")
+    if spill_dir is not None:
+        Path(spill_dir).mkdir(parents=True, exist_ok=True)
+    # A directory of its own, so spills of earlier or concurrent joins into
+    # the same ``spill_dir`` are never read back.
+    spill_dir = Path(tempfile.mkdtemp(prefix="davpy-join-", dir=spill_dir))
+    try:
+        left_schema = _partition(left, on, "left", partitions, spill_dir, chunksize)
+        right_schema = _partition(right, on, "right", partitions, spill_dir, chunksize)
+        jobs = [(str(spill_dir), p, on, how, right_schema) for p in range(partitions)]
+        with ProcessPoolExecutor(workers or os.cpu_count()) as pool:
+            parts = [part for part in pool.map(_join_partition, jobs) if part is not None]
+    finally:
+        shutil.rmtree(spill_dir, ignore_errors=True)
+    if parts:
+        return pd.concat(parts, ignore_index=True)
+    if left_schema is None or right_schema is None:
+        raise ValueError("cannot join an input that yields no chunks")
+    # Nothing matched: an empty frame with the columns ``merge`` would give.
+    return merge_indexed(left_schema, right_schema, on, how=how)
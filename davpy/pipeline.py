@@ -0,0 +1,468 @@
+"""Lazy, planned pipelines for the cleaning and transformation stages.
+
+With eager pandas, every step of the workflow described in chapter 3
+materializes a full intermediate frame. A ``Pipeline`` only records
+declarative stages and builds a plan when it is collected::
+
+    >>> survey = (
+    ...     Pipeline("survey.csv")
+    ...     .filter("Age", ">=", 18)
+    ...     .derive("mean-score", lambda f: f.filter(like="Naruto").mean(axis=1),
+    ...             columns=[f"Naruto-season-{i}" for i in range(1, 6)])
+    ...     .groupby_agg("Age", {"score": ("mean-score", "mean"), "n": ("Name", "count")})
+    ... )
+    >>> print(survey.explain())
+    >>> result = survey.collect()
+
+Before running, the plan is optimized:
+
+- filters are pushed ahead of derived columns and selections they do not
+  depend on (predicate pushdown), and consecutive filters are fused into
+  one mask;
+- only the columns some stage reads are loaded from the source
+  (projection pushdown);
+- elementwise stages between two aggregations run as one fused pass over
+  each chunk, so no full intermediate frame is built.
+
+The output of every aggregation, and of the whole pipeline, is kept in a
+cache keyed on a fingerprint of the plan up to that point. Pipelines are
+immutable and share that cache, so editing a stage and collecting again
+only recomputes what comes after the last unchanged aggregation, which
+suits the back-and-forth loop of an analysis. The fingerprint covers the
+content of an in-memory source frame and, for ``derive`` functions, the
+values they close over and the globals they read. Plans over iterators,
+or calling functions that refer to objects without a stable ``repr``,
+are not cached.
+"""
+import hashlib
+import operator
+import types
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from .chunks import iter_frames
+
+OPERATORS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "in": lambda column, values: column.isin(values),
+}
+AGGREGATES = ("sum", "count", "size", "mean", "min", "max")
+
+
+class _Unfingerprintable(Exception):
+    """A plan part whose output may change without its description changing."""
+
+
+def _content_digest(data):
+    """Digest of the values, index, labels and dtypes of a pandas object."""
+    try:
+        rows = pd.util.hash_pandas_object(data, index=True).to_numpy()
+    except TypeError as error:
+        raise _Unfingerprintable from error
+    digest = hashlib.sha256(rows.tobytes())
+    labels = data.columns if isinstance(data, pd.DataFrame) else [data.name]
+    dtypes = data.dtypes if isinstance(data, pd.DataFrame) else [data.dtype]
+    digest.update(repr((list(labels), [str(dtype) for dtype in dtypes])).encode())
+    return digest.hexdigest()
+
+
+def _global_names(code):
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names |= _global_names(const)
+    return names
+
+
+def _describe(value, seen):
+    """A description of ``value`` that changes whenever its behaviour can.
+
+    Functions are described by their bytecode, constants, defaults, the
+    contents of their closure cells and the globals they refer to, so
+    changing ``factor`` in ``lambda f: f["x"] * factor`` changes the
+    fingerprint. Objects with no stable ``repr`` raise ``_Unfingerprintable``.
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series, pd.Index)):
+        return (type(value).__name__, _content_digest(value))
+    if isinstance(value, np.ndarray):
+        if value.dtype == object:
+            return ("ndarray", [_describe(item, seen) for item in value.ravel()], value.shape)
+        contiguous = np.ascontiguousarray(value)
+        return ("ndarray", value.dtype.str, value.shape, hashlib.sha256(contiguous.tobytes()).hexdigest())
+    if isinstance(value, types.ModuleType):
+        return ("module", value.__name__)
+    if isinstance(value, types.CodeType):
+        consts = tuple(_describe(const, seen) for const in value.co_consts)
+        return ("code", value.co_code, consts, value.co_names)
+    if isinstance(value, types.FunctionType):
+        if value in seen:
+            return ("function", value.__module__, value.__qualname__)
+        seen.add(value)
+        closure = []
+        for cell in value.__closure__ or ():
+            try:
+                closure.append(_describe(cell.cell_contents, seen))
+            except ValueError:  # a cell not assigned yet
+                closure.append(None)
+        referenced = sorted(_global_names(value.__code__) & value.__globals__.keys())
+        return (
+            "function", value.__module__, value.__qualname__,
+            _describe(value.__code__, seen),
+            _describe(value.__defaults__, seen),
+            _describe(value.__kwdefaults__, seen),
+            tuple(closure),
+            tuple((name, _describe(value.__globals__[name], seen)) for name in referenced),
+        )
+    if isinstance(value, (types.BuiltinFunctionType, np.ufunc, type)):
+        name = getattr(value, "__qualname__", value.__name__)
+        return ("builtin", getattr(value, "__module__", None), name)
+    if isinstance(value, (list, tuple)):
+        return (type(value).__name__, tuple(_describe(item, seen) for item in value))
+    if isinstance(value, (set, frozenset)):
+        return (type(value).__name__, tuple(sorted(repr(_describe(item, seen)) for item in value)))
+    if isinstance(value, dict):
+        return ("dict", tuple(sorted(
+            (repr(_describe(k, seen)), _describe(v, seen)) for k, v in value.items()
+        )))
+    text = repr(value)
+    if " at 0x" in text:
+        # The default repr: nothing tells two states of the object apart.
+        raise _Unfingerprintable(text)
+    return text
+
+
+def _fingerprint(*parts):
+    """Return a digest of ``parts``, or None if one of them cannot be fingerprinted."""
+    digest = hashlib.sha256()
+    seen = set()
+    try:
+        for part in parts:
+            digest.update(repr(_describe(part, seen)).encode())
+    except _Unfingerprintable:
+        return None
+    return digest.hexdigest()
+
+
+class Stage:
+    """Base class: ``reads`` and ``writes`` drive the optimizer."""
+
+    elementwise = True
+    reads = frozenset()
+    writes = frozenset()
+
+    def apply(self, frame):
+        raise NotImplementedError
+
+    def fingerprint(self):
+        raise NotImplementedError
+
+
+class Filter(Stage):
+    """Keep rows where every condition holds; conditions are (column, op, value)."""
+
+    def __init__(self, conditions):
+        self.conditions = tuple(conditions)
+        self.reads = frozenset(column for column, _, _ in self.conditions)
+
+    def mask(self, frame):
+        mask = np.ones(len(frame), dtype=bool)
+        for column, op, value in self.conditions:
+            mask &= np.asarray(OPERATORS[op](frame[column], value))
+        return mask
+
+    def apply(self, frame):
+        return frame[self.mask(frame)]
+
+    def fingerprint(self):
+        return _fingerprint("filter", self.conditions)
+
+    def __repr__(self):
+        return "Filter(" + " & ".join(f"{c} {op} {v!r}" for c, op, v in self.conditions) + ")"
+
+
+class Select(Stage):
+    def __init__(self, columns):
+        self.columns = tuple(columns)
+        self.reads = frozenset(self.columns)
+
+    def apply(self, frame):
+        return frame[list(self.columns)]
+
+    def fingerprint(self):
+        return _fingerprint("select", self.columns)
+
+    def __repr__(self):
+        return f"Select({', '.join(self.columns)})"
+
+
+class Derive(Stage):
+    """Add column ``name`` computed row by row by ``func(frame[columns])``."""
+
+    def __init__(self, name, func, columns):
+        self.name = name
+        self.func = func
+        self.columns = tuple(columns)
+        self.reads = frozenset(self.columns)
+        self.writes = frozenset([name])
+
+    def apply(self, frame):
+        frame = frame.copy(deep=False)
+        frame[self.name] = np.asarray(self.func(frame[list(self.columns)]))
+        return frame
+
+    def fingerprint(self):
+        return _fingerprint("derive", self.name, self.func, self.columns)
+
+    def __repr__(self):
+        return f"Derive({self.name} <- {', '.join(self.columns)})"
+
+
+class GroupByAgg(Stage):
+    """Group by ``by`` and aggregate; ``aggs`` maps output -> (column, function).
+
+    Aggregates are computed per chunk and merged, so the input is never
+    held in memory at once.
+    """
+
+    elementwise = False
+
+    def __init__(self, by, aggs):
+        self.by = [by] if isinstance(by, str) else list(by)
+        self.aggs = dict(aggs)
+        for column, func in self.aggs.values():
+            if func not in AGGREGATES:
+                raise ValueError(f"unsupported aggregate {func!r}; use one of {AGGREGATES}")
+        self.reads = frozenset(self.by) | {column for column, _ in self.aggs.values()}
+        self.writes = frozenset(self.aggs)
+
+    def partial(self, frame):
+        """Per-chunk partial aggregates that ``combine`` can merge."""
+        groups = frame.groupby(self.by, sort=False, observed=True)
+        parts = {}
+        for out, (column, func) in self.aggs.items():
+            if func == "mean":
+                parts[f"{out}__sum"] = groups[column].sum()
+                parts[f"{out}__count"] = groups[column].count()
+            elif func == "size":
+                parts[out] = groups.size()
+            else:
+                parts[out] = getattr(groups[column], func)()
+        return pd.DataFrame(parts)
+
+    def combine(self, partials):
+        stacked = pd.concat(partials)
+        groups = stacked.groupby(level=list(range(len(self.by))), sort=True)
+        result = {}
+        for out, (_, func) in self.aggs.items():
+            if func == "mean":
+                result[out] = groups[f"{out}__sum"].sum() / groups[f"{out}__count"].sum()
+            elif func in ("count", "size", "sum"):
+                result[out] = groups[out].sum()
+            else:
+                result[out] = getattr(groups[out], func)()
+        frame = pd.DataFrame(result)
+        frame.index.names = self.by
+        return frame.reset_index()
+
+    def fingerprint(self):
+        return _fingerprint("groupby", self.by, sorted(self.aggs.items()))
+
+    def __repr__(self):
+        aggs = ", ".join(f"{out}={func}({col})" for out, (col, func) in self.aggs.items())
+        return f"GroupByAgg(by={', '.join(self.by)}: {aggs})"
+
+
+def _commutes(stage, before):
+    """Whether filter ``stage`` may run before ``before`` with the same result.
+
+    A filter cannot move above the stage deriving a column it reads, nor
+    above a selection that drops one, which must keep raising KeyError.
+    """
+    if isinstance(before, Select):
+        return stage.reads <= frozenset(before.columns)
+    return isinstance(before, Derive) and not stage.reads & before.writes
+
+
+def optimize(stages):
+    """Push filters down and fuse consecutive filters; returns a new list."""
+    stages = list(stages)
+    changed = True
+    while changed:
+        changed = False
+        for i in range(1, len(stages)):
+            stage, before = stages[i], stages[i - 1]
+            if isinstance(stage, Filter) and _commutes(stage, before):
+                stages[i - 1], stages[i] = stage, before
+                changed = True
+    fused = []
+    for stage in stages:
+        if isinstance(stage, Filter) and fused and isinstance(fused[-1], Filter):
+            fused[-1] = Filter(fused[-1].conditions + stage.conditions)
+        else:
+            fused.append(stage)
+    return fused
+
+
+def required_columns(stages):
+    """Columns the plan reads from its source, or None for all of them."""
+    needed = None
+    for stage in reversed(stages):
+        if isinstance(stage, GroupByAgg):
+            needed = set(stage.reads)
+        elif isinstance(stage, Select):
+            needed = set(stage.columns) if needed is None else needed & set(stage.columns)
+        elif needed is not None:
+            needed = (needed - stage.writes) | stage.reads
+    return needed
+
+
+class PlanCache:
+    """A small LRU of materialized plan outputs keyed on plan fingerprints."""
+
+    def __init__(self, maxsize=32):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = self.misses = 0
+
+    def get(self, key):
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key]
+        self.misses += 1
+        return None
+
+    def put(self, key, frame):
+        self.entries[key] = frame
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+
+_default_cache = PlanCache()
+
+
+def _source_fingerprint(source):
+    """Fingerprint a path by its size and mtime and a frame by its content.
+
+    Other sources (iterables of frames) return None and are not cached.
+    """
+    from pathlib import Path
+
+    if isinstance(source, (str, Path)):
+        stat = Path(source).stat()
+        return _fingerprint("file", str(Path(source).resolve()), stat.st_size, stat.st_mtime_ns)
+    if isinstance(source, pd.DataFrame):
+        return _fingerprint("frame", source)
+    return None
+
+
+class Pipeline:
+    """An immutable chain of stages over a chunked source.
+
+    Parameters
+    ----------
+    source : CSV/Parquet path, DataFrame or iterable of DataFrames
+    chunksize : int
+        Rows per chunk when reading files.
+    cache : PlanCache, optional
+        Where aggregation and final outputs are kept; shared by default.
+    """
+
+    def __init__(self, source, chunksize=1_000_000, cache=None, stages=()):
+        self.source = source
+        self.chunksize = chunksize
+        self.cache = cache if cache is not None else _default_cache
+        self.stages = tuple(stages)
+
+    def _then(self, stage):
+        return Pipeline(self.source, self.chunksize, self.cache, self.stages + (stage,))
+
+    def filter(self, column, op, value):
+        if op not in OPERATORS:
+            raise ValueError(f"unsupported operator {op!r}; use one of {list(OPERATORS)}")
+        return self._then(Filter([(column, op, value)]))
+
+    def select(self, *columns):
+        return self._then(Select(columns))
+
+    def derive(self, name, func, columns):
+        return self._then(Derive(name, func, columns))
+
+    def groupby_agg(self, by, aggs):
+        return self._then(GroupByAgg(by, aggs))
+
+    def replace(self, index, stage):
+        """Return a copy with stage ``index`` swapped for ``stage``."""
+        stages = list(self.stages)
+        stages[index] = stage
+        return Pipeline(self.source, self.chunksize, self.cache, stages)
+
+    def plan(self):
+        return optimize(self.stages)
+
+    def explain(self):
+        plan = self.plan()
+        columns = required_columns(plan)
+        lines = [f"Scan(columns={sorted(columns) if columns is not None else 'all'})"]
+        lines += [f"  {stage!r}" for stage in plan]
+        return "\n".join(lines)
+
+    def collect(self):
+        """Run the plan and return the result as a DataFrame."""
+        plan = self.plan()
+        # A None key (an unfingerprintable source or stage) is never
+        # cached, nor is anything after it.
+        keys, key = [], _source_fingerprint(self.source)
+        for stage in plan:
+            stage_key = stage.fingerprint()
+            key = None if key is None or stage_key is None else _fingerprint(key, stage_key)
+            keys.append(key)
+
+        cached = self.cache.get(keys[-1]) if keys and keys[-1] is not None else None
+        if cached is not None:
+            # A copy, so that callers editing the result leave the cache intact.
+            return cached.copy()
+
+        # Resume after the last aggregation whose output is still cached.
+        start, chunks = 0, None
+        for i in reversed(range(len(plan))):
+            if not plan[i].elementwise and keys[i] is not None:
+                frame = self.cache.get(keys[i])
+                if frame is not None:
+                    start, chunks = i + 1, [frame]
+                    break
+        if chunks is None:
+            chunks = iter_frames(self.source, required_columns(plan), self.chunksize)
+
+        segment = []
+        for i in range(start, len(plan)):
+            stage = plan[i]
+            if stage.elementwise:
+                segment.append(stage)
+                continue
+            partials = [stage.partial(_run(segment, chunk)) for chunk in chunks]
+            frame = stage.combine(partials)
+            if keys[i] is not None:
+                self.cache.put(keys[i], frame)
+            chunks, segment = [frame], []
+
+        outputs = [_run(segment, chunk) for chunk in chunks]
+        result = pd.concat(outputs, ignore_index=True) if outputs else pd.DataFrame()
+        if keys and keys[-1] is not None:
+            self.cache.put(keys[-1], result.copy())
+        return result
+
+
+def _run(segment, frame):
+    """Apply a fused run of elementwise stages to one chunk."""
+    for stage in segment:
+        frame = stage.apply(frame)
+    return frame
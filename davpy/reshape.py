@@ -0,0 +1,186 @@
+"""Long/wide reshaping on typed column buffers.
+
+The "Anatomy of a table" section of chapter 2 stores one column per
+``Naruto-season-N`` and shows ``time_series.T``. ``DataFrame.melt`` and
+``DataFrame.T`` copy the whole frame, and a transpose of columns with
+different types (a date next to sales figures) upcasts everything to
+``object``. The functions here keep every output column typed:
+
+- ``melt`` writes numeric value columns into one preallocated array of
+  their common type, and encodes the identifier and variable columns as
+  categoricals, so it never creates Python objects per cell;
+- ``pivot`` scatters long data into one 2-D array per value type;
+- ``transpose`` returns a view that groups the columns by type and
+  transposes each group separately, without copying until asked to.
+"""
+import numpy as np
+import pandas as pd
+
+
+def _common_dtype(frame, columns):
+    """The NumPy type holding every column, or None unless all are numeric."""
+    dtypes = {frame[c].dtype for c in columns}
+    if dtypes and all(isinstance(d, np.dtype) and d.kind in "biuf" for d in dtypes):
+        return np.result_type(*dtypes)
+    return None
+
+
+def _repeat(values, repeats):
+    """Tile a column ``repeats`` times, keeping numbers typed.
+
+    Text and categorical columns are tiled through their integer codes and
+    come back as categoricals.
+    """
+    if isinstance(values.dtype, np.dtype) and values.dtype.kind in "biufmM":
+        return np.tile(values.to_numpy(), repeats)
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes, categories = values.cat.codes.to_numpy(), values.cat.categories
+    else:
+        codes, categories = pd.factorize(values)
+    return pd.Categorical.from_codes(np.tile(codes, repeats), categories)
+
+
+def _codes(values):
+    """Return (integer codes, sorted labels) for a key column."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy(), pd.Index(values.cat.categories)
+    return pd.factorize(values, sort=True)
+
+
+def melt(frame, id_vars=(), value_vars=None, var_name="variable", value_name="value"):
+    """Unpivot ``frame`` from wide to long, like ``DataFrame.melt``.
+
+    The result has one row per (row, value column), in the same order as
+    pandas. Numeric ``value_vars`` are stored in a single array of their
+    common type; other value columns are concatenated by pandas and get
+    the type ``DataFrame.melt`` gives them.
+
+    Unlike ``DataFrame.melt``, the ``var_name`` column and text ``id_vars``
+    are categoricals rather than strings; ``astype(str)`` turns them back.
+    """
+    id_vars = list(id_vars)
+    if value_vars is None:
+        value_vars = [c for c in frame.columns if c not in id_vars]
+    value_vars = list(value_vars)
+    n = len(frame)
+    dtype = _common_dtype(frame, value_vars)
+    if dtype is None:
+        values = pd.concat([frame[c] for c in value_vars], ignore_index=True).array
+    else:
+        values = np.empty(n * len(value_vars), dtype=dtype)
+        for i, column in enumerate(value_vars):
+            values[i * n:(i + 1) * n] = frame[column].to_numpy()
+    codes = np.repeat(np.arange(len(value_vars), dtype=np.int32), n)
+    result = {column: _repeat(frame[column], len(value_vars)) for column in id_vars}
+    result[var_name] = pd.Categorical.from_codes(codes, pd.Index(value_vars))
+    result[value_name] = values
+    return pd.DataFrame(result)
+
+
+def pivot(frame, index, columns, values):
+    """Reshape long data to wide, like ``DataFrame.pivot``.
+
+    Each name in ``values`` (a label or list of labels) becomes a group of
+    output columns. Labels of the same type share one 2-D array; integer
+    and boolean values become floats only when some cells are missing.
+    Rows whose ``index`` or ``columns`` key is missing are dropped, as
+    ``DataFrame.pivot_table`` does.
+    """
+    multiple = isinstance(values, (list, tuple))
+    values = list(values) if multiple else [values]
+    keyed = frame[index].notna() & frame[columns].notna()
+    if not keyed.all():
+        frame = frame[keyed]
+    row_codes, row_labels = _codes(frame[index])
+    col_codes, col_labels = _codes(frame[columns])
+    shape = (len(row_labels), len(col_labels))
+    cell = row_codes.astype(np.int64) * shape[1] + col_codes
+    filled = np.bincount(cell, minlength=shape[0] * shape[1])
+    if (filled > 1).any():
+        raise ValueError("index contains duplicate entries, cannot reshape")
+    complete = bool(filled.all())
+
+    by_dtype = {}
+    for name in values:
+        by_dtype.setdefault(frame[name].dtype, []).append(name)
+    parts = {}
+    for dtype, names in by_dtype.items():
+        if not isinstance(dtype, np.dtype):
+            dtype = np.dtype(object)
+        if not complete and dtype.kind in "biu":
+            dtype = np.dtype(np.float64)
+        block = np.empty((len(names), shape[0], shape[1]), dtype=dtype)
+        if dtype.kind in "fcO":
+            block.fill(np.nan)
+        for i, name in enumerate(names):
+            block[i].reshape(-1)[cell] = frame[name].to_numpy()
+        for i, name in enumerate(names):
+            parts[name] = block[i]
+    labels = pd.Index(row_labels, name=index)
+    if not multiple:
+        return pd.DataFrame(parts[values[0]], index=labels, columns=pd.Index(col_labels, name=columns))
+    column_index = pd.MultiIndex.from_product([values, col_labels], names=[None, columns])
+    return pd.concat(
+        [pd.DataFrame(parts[name], index=labels) for name in values], axis=1
+    ).set_axis(column_index, axis=1)
+
+
+class TransposeView:
+    """Lazy transpose of a DataFrame, grouped by column type.
+
+    The rows of the view are the columns of ``frame``. Columns of the same
+    type form one group whose transpose is a typed array; mixed groups are
+    never combined into an ``object`` array unless ``to_frame`` is asked
+    for explicitly.
+    """
+
+    def __init__(self, frame):
+        self.frame = frame
+        self.groups = {}
+        for column, dtype in frame.dtypes.items():
+            self.groups.setdefault(dtype, []).append(column)
+
+    @property
+    def shape(self):
+        return self.frame.shape[::-1]
+
+    @property
+    def index(self):
+        return self.frame.columns
+
+    @property
+    def columns(self):
+        return self.frame.index
+
+    def block(self, dtype):
+        """Return the transpose of the columns of type ``dtype``."""
+        names = self.groups[dtype]
+        return pd.DataFrame(
+            self.frame[names].to_numpy().T, index=pd.Index(names), columns=self.frame.index
+        )
+
+    def blocks(self):
+        """Yield ``(dtype, transposed frame)`` for each group of columns."""
+        for dtype in self.groups:
+            yield dtype, self.block(dtype)
+
+    def row(self, label):
+        """Return original column ``label`` with its own type."""
+        return self.frame[label]
+
+    def to_frame(self):
+        """Materialise the full transpose, like ``DataFrame.T``."""
+        if len(self.groups) == 1:
+            return self.block(next(iter(self.groups)))
+        return self.frame.T
+
+    def __repr__(self):
+        return "\n\n".join(repr(block) for _, block in self.blocks())
+
+    def _repr_html_(self):
+        return "".join(block._repr_html_() for _, block in self.blocks())
+
+
+def transpose(frame):
+    """Return a ``TransposeView`` of ``frame``."""
+    return TransposeView(frame)
@@ -0,0 +1,197 @@
+"""One-pass, mergeable summary statistics.
+
+``Summary`` computes the statistics of the "Descriptive statistics" section
+of chapter 2 (count, mean, median, mode, range, IQR, variance, standard
+deviation and the ``describe()`` table) in a single pass over chunked
+input. Its state is small and mergeable, so partitions can be summarized
+in separate processes and reduced afterwards::
+
+    >>> summary = summarize("ages.csv", column="age")
+    >>> summary.describe()
+
+Mean and variance are computed exactly within a chunk, in two passes over
+the chunk's values (the mean, then the squared deviations from it), and
+combined across chunks with Chan et al.'s pairwise merge, which stays
+numerically stable for long streams. Quantiles come from a ``KLLSketch``, so they are exact while the
+sketch still holds every value and within its rank error afterwards.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from functools import reduce
+
+import numpy as np
+import pandas as pd
+
+from .chunks import iter_chunks
+from .frequency import FrequencyTable
+from .sketches import KLLSketch
+
+
+class Moments:
+    """Count, mean, sum of squared deviations (M2), minimum and maximum."""
+
+    __slots__ = ("count", "mean", "m2", "min", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values):
+        """Add a chunk of values; NaNs are skipped like in pandas.
+
+        The chunk's own mean and M2 are computed in two passes over it and
+        then merged in.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return self
+        chunk = Moments()
+        chunk.count = values.size
+        chunk.mean = values.mean()
+        chunk.m2 = np.square(values - chunk.mean).sum()
+        chunk.min = values.min()
+        chunk.max = values.max()
+        return self.merge(chunk)
+
+    def merge(self, other):
+        """Combine with the moments of another partition (Chan et al.)."""
+        count = self.count + other.count
+        if count == 0:
+            return self
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta**2 * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def var(self, ddof=1):
+        return self.m2 / (self.count - ddof) if self.count > ddof else np.nan
+
+    def std(self, ddof=1):
+        return np.sqrt(self.var(ddof))
+
+
+class Summary:
+    """Mergeable state behind the chapter's descriptive statistics.
+
+    Parameters
+    ----------
+    k : int
+        Size parameter of the quantile sketch; see ``KLLSketch``.
+    mode : bool
+        Whether to count every distinct value so that ``mode()`` can be
+        answered. Memory grows with the number of distinct values.
+    """
+
+    def __init__(self, k=200, mode=False):
+        self.moments = Moments()
+        self.quantiles = KLLSketch(k)
+        self.counts = FrequencyTable("exact") if mode else None
+
+    def update(self, values):
+        self.moments.update(values)
+        self.quantiles.update(values)
+        if self.counts is not None:
+            self.counts.update(values)
+        return self
+
+    def merge(self, other):
+        self.moments.merge(other.moments)
+        self.quantiles.merge(other.quantiles)
+        if self.counts is not None and other.counts is not None:
+            self.counts.merge(other.counts)
+        return self
+
+    @property
+    def count(self):
+        return self.moments.count
+
+    def mean(self):
+        return self.moments.mean if self.count else np.nan
+
+    def var(self, ddof=1):
+        return self.moments.var(ddof)
+
+    def std(self, ddof=1):
+        return self.moments.std(ddof)
+
+    def min(self):
+        return self.moments.min if self.count else np.nan
+
+    def max(self):
+        return self.moments.max if self.count else np.nan
+
+    def range(self):
+        return self.max() - self.min()
+
+    def quantile(self, q):
+        return self.quantiles.quantile(q)
+
+    def median(self):
+        return self.quantile(0.5)
+
+    def iqr(self):
+        return self.quantile(0.75) - self.quantile(0.25)
+
+    def mode(self):
+        """Return the most frequent values, like ``Series.mode()``."""
+        if self.counts is None:
+            raise ValueError("create the Summary with mode=True to compute the mode")
+        if not self.counts.n:
+            return pd.Series([], dtype=float)
+        return self.counts.mode_values()
+
+    def describe(self, name=None):
+        """Return the same table as ``Series.describe()``."""
+        return pd.Series(
+            [
+                self.count,
+                self.mean(),
+                self.std(),
+                self.min(),
+                self.quantile(0.25),
+                self.median(),
+                self.quantile(0.75),
+                self.max(),
+            ],
+            index=["count", "mean", "std", "min", "25%", "50%", "75%", "max"],
+            name=name,
+        )
+
+
+def _summarize_partition(args):
+    source, column, kwargs = args
+    summary = Summary(**kwargs)
+    for chunk in iter_chunks(source, column):
+        summary.update(chunk)
+    return summary
+
+
+def summarize(source, column=None, workers=1, **kwargs):
+    """Summarize ``source`` in one pass over its chunks.
+
+    Parameters
+    ----------
+    source : path, array, Series, iterable of arrays, or list of paths
+        Anything ``iter_chunks`` accepts. A list of file paths is treated
+        as partitions, which are summarized by ``workers`` processes and
+        merged.
+    column : str, optional
+        Column to summarize in files and DataFrames.
+    **kwargs
+        Passed to ``Summary``.
+    """
+    if isinstance(source, list) and all(isinstance(p, str) for p in source):
+        jobs = [(path, column, kwargs) for path in source]
+        if workers > 1:
+            with ProcessPoolExecutor(workers) as pool:
+                parts = list(pool.map(_summarize_partition, jobs))
+        else:
+            parts = [_summarize_partition(job) for job in jobs]
+        return reduce(Summary.merge, parts, Summary(**kwargs))
+    return _summarize_partition((source, column, kwargs))
@@ -0,0 +1,119 @@
+"""Reproducible, parallel generation of the chapter's synthetic samples.
+
+The "Data distribution" section of chapter 2 draws its samples with
+``skewnorm.rvs`` and ``np.random.normal``/``uniform`` on the global random
+state, so the numbers (and figures) change on every run. The generators
+here take a seed and split the output into fixed-size blocks, each drawn
+from its own ``np.random.Generator`` seeded by ``SeedSequence.spawn``.
+Blocks are filled concurrently by a thread pool (NumPy releases the GIL
+while filling), and because the blocks do not depend on the number of
+workers, the output for a given seed is bit-for-bit identical whatever
+``workers`` is.
+
+Samples are written into ``out`` when given, e.g. a memory-mapped array
+from ``open_memmap``, so billions of samples never need to fit in memory::
+
+    >>> out = open_memmap("multimodal.npy", 3 * 10**9)
+    >>> mixture(3 * 10**9, [(0, 0.5), (2, 0.5), (4, 0.5)], seed=42, out=out)
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+BLOCK = 1 << 20
+
+
+def open_memmap(path, size, dtype=np.float64):
+    """Create a ``.npy`` file of ``size`` values, mapped into memory."""
+    return np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=(size,))
+
+
+def _seed_sequence(seed):
+    if isinstance(seed, np.random.SeedSequence):
+        return seed
+    return np.random.SeedSequence(seed)
+
+
+def _fill(size, seed, fill_block, workers=None, out=None):
+    """Fill ``out`` block by block; ``fill_block(rng, block)`` fills one block."""
+    if out is None:
+        out = np.empty(size, dtype=np.float64)
+    elif out.shape != (size,):
+        raise ValueError(f"out has shape {out.shape}, expected ({size},)")
+    starts = range(0, size, BLOCK)
+    seeds = _seed_sequence(seed).spawn(len(starts))
+
+    def task(i):
+        fill_block(np.random.default_rng(seeds[i]), out[starts[i]:starts[i] + BLOCK])
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(starts) == 1:
+        for i in range(len(starts)):
+            task(i)
+    else:
+        with ThreadPoolExecutor(workers) as pool:
+            list(pool.map(task, range(len(starts))))
+    return out
+
+
+def normal(size, loc=0.0, scale=1.0, seed=None, workers=None, out=None):
+    """Draw ``size`` samples of N(loc, scale**2), like ``np.random.normal``."""
+
+    def fill(rng, block):
+        rng.standard_normal(out=block)
+        block *= scale
+        block += loc
+
+    return _fill(size, seed, fill, workers, out)
+
+
+def uniform(size, low=0.0, high=1.0, seed=None, workers=None, out=None):
+    """Draw ``size`` samples from U[low, high), like ``np.random.uniform``."""
+
+    def fill(rng, block):
+        rng.random(out=block)
+        block *= high - low
+        block += low
+
+    return _fill(size, seed, fill, workers, out)
+
+
+def skewnorm(size, a, loc=0.0, scale=1.0, seed=None, workers=None, out=None):
+    """Draw ``size`` samples of a skew-normal distribution with shape ``a``.
+
+    Matches the distribution of ``scipy.stats.skewnorm.rvs(a, loc, scale)``
+    without needing SciPy: with ``u`` and ``v`` standard normal and
+    ``delta = a / sqrt(1 + a**2)``, ``delta * |u| + sqrt(1 - delta**2) * v``
+    is skew-normal.
+    """
+    delta = a / np.sqrt(1 + a * a)
+
+    def fill(rng, block):
+        rng.standard_normal(out=block)
+        np.abs(block, out=block)
+        block *= delta
+        block += np.sqrt(1 - delta * delta) * rng.standard_normal(block.size)
+        block *= scale
+        block += loc
+
+    return _fill(size, seed, fill, workers, out)
+
+
+def mixture(size, components, seed=None, workers=None, out=None):
+    """Concatenate equal-sized normal samples, one per ``(loc, scale)``.
+
+    Builds the chapter's bimodal (two components) and multimodal (three)
+    distributions in one array instead of repeated ``pd.concat``. ``size``
+    must be a multiple of the number of components.
+    """
+    parts = len(components)
+    if size % parts:
+        raise ValueError(f"size {size} is not a multiple of {parts} components")
+    if out is None:
+        out = np.empty(size, dtype=np.float64)
+    each = size // parts
+    seeds = _seed_sequence(seed).spawn(parts)
+    for i, (loc, scale) in enumerate(components):
+        normal(each, loc, scale, seeds[i], workers, out[i * each:(i + 1) * each])
+    return out
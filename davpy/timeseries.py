@@ -0,0 +1,286 @@
+"""Time series with incremental rolling and resampled aggregates.
+
+The "Time-series" example of chapter 2 keeps monthly sales with string
+dates in a DataFrame. ``TimeSeries`` parses the dates once into int64
+epoch nanoseconds and keeps every series in its own contiguous column of
+a column-major block, so thousands of series at per-second resolution
+stay compact. Rows are appended in time order, and rolling and resampled
+aggregates are updated from the new rows alone::
+
+    >>> ts = TimeSeries.from_frame(time_series, "date", window=3, period="MS")
+    >>> ts.append(["2020-06-15"], [[600, 250, 350]])
+    >>> ts.rolling_mean()[-1]
+    >>> ts.resampled("mean")
+
+Rolling statistics are kept as running sums over the last ``window``
+rows, adding each new row and subtracting the one that leaves the
+window, so each new row costs O(1) per series no matter the window
+length. Missing values are skipped.
+"""
+import numpy as np
+import pandas as pd
+
+AGGREGATES = ("count", "sum", "mean", "var", "std", "min", "max", "last")
+
+
+def to_epoch(times):
+    """Parse dates (strings, datetimes or epoch ns) into an int64 ns array."""
+    times = np.asarray(times)
+    if times.dtype.kind in "iu":
+        return times.astype(np.int64)
+    return pd.to_datetime(times).to_numpy("datetime64[ns]").view(np.int64)
+
+
+def bucket_ids(times, period):
+    """Map epoch-ns ``times`` to resampling buckets.
+
+    ``period`` is a fixed duration understood by ``pd.Timedelta`` ("1s",
+    "5min", "1D") or a calendar unit: "MS" (months) or "YS" (years).
+    Returns ``(ids, starts)``: the bucket of each time, and a function
+    giving the start time of bucket ids.
+    """
+    if period in ("MS", "YS"):
+        unit = "M" if period == "MS" else "Y"
+        ids = times.view("datetime64[ns]").astype(f"datetime64[{unit}]").view(np.int64)
+        return ids, lambda b: b.view(f"datetime64[{unit}]").astype("datetime64[ns]")
+    step = pd.Timedelta(period).value
+    return np.floor_divide(times, step), lambda b: (b * step).view("datetime64[ns]")
+
+
+class Rolling:
+    """Rolling count, mean and variance over the last ``window`` rows.
+
+    Keeps, per series, the running sum, sum of squares and count of the
+    non-missing values in the window, and the last ``window`` rows in a
+    ring buffer so that the rows leaving the window can be subtracted.
+    Missing values are skipped: a window's statistics use the values it
+    holds, like ``rolling(window, min_periods=1)``, and are NaN only when
+    it holds none (fewer than two for the variance).
+    """
+
+    def __init__(self, window, width):
+        self.window = window
+        self.ring = np.zeros((window, width))
+        self.ring_valid = np.zeros((window, width), dtype=bool)
+        # Sums are of values shifted by the first value of each series,
+        # which keeps the sum of squares well conditioned.
+        self.ref = np.full(width, np.nan)
+        self.count = np.zeros(width)
+        self.sum = np.zeros(width)
+        self.sumsq = np.zeros(width)
+        self._seen = 0
+
+    def update(self, block):
+        """Return rolling (count, mean, var) for each row of ``block``.
+
+        Costs O(1) per row and series, whatever the window length.
+        """
+        rows, width = block.shape
+        valid = ~np.isnan(block)
+        unset = np.isnan(self.ref) & valid.any(axis=0)
+        self.ref[unset] = block[valid[:, unset].argmax(axis=0), np.flatnonzero(unset)]
+        values = np.where(valid, block - np.nan_to_num(self.ref), 0.0)
+
+        # The row leaving the window as each row of the block enters it:
+        # from the ring for the first ``window`` rows, then from the block.
+        gone = np.zeros_like(values)
+        gone_valid = np.zeros_like(valid)
+        first = min(rows, max(0, self.window - self._seen))
+        from_ring = np.arange(first, min(rows, self.window))
+        slots = (self._seen + from_ring) % self.window
+        gone[from_ring] = self.ring[slots]
+        gone_valid[from_ring] = self.ring_valid[slots]
+        if rows > self.window:
+            gone[self.window:] = values[:-self.window]
+            gone_valid[self.window:] = valid[:-self.window]
+
+        count = self.count + np.cumsum(valid, axis=0) - np.cumsum(gone_valid, axis=0)
+        total = self.sum + np.cumsum(values - gone, axis=0)
+        squares = self.sumsq + np.cumsum(values * values - gone * gone, axis=0)
+        self.count, self.sum, self.sumsq = count[-1], total[-1], squares[-1]
+
+        kept = np.arange(max(0, rows - self.window), rows)
+        slots = (self._seen + kept) % self.window
+        self.ring[slots] = values[kept]
+        self.ring_valid[slots] = valid[kept]
+        self._seen += rows
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(count > 0, total / count, np.nan)
+            var = np.where(count > 1, (squares - total * mean) / (count - 1), np.nan)
+        return count, mean + self.ref, np.maximum(var, 0)
+
+
+class Resampler:
+    """Per-bucket count, sum, sum of squares, min, max and last value.
+
+    Sums are of values shifted by the first value of each series, as in
+    ``Rolling``, so the variance of large values keeps its precision.
+    """
+
+    def __init__(self, period, width):
+        self.period = period
+        self.ids = np.empty(0, dtype=np.int64)
+        self.ref = np.full(width, np.nan)
+        self.state = {
+            "count": np.empty((0, width)),
+            "sum": np.empty((0, width)),
+            "sumsq": np.empty((0, width)),
+            "min": np.empty((0, width)),
+            "max": np.empty((0, width)),
+            "last": np.empty((0, width)),
+        }
+
+    def update(self, times, block):
+        ids, self._starts = bucket_ids(times, self.period)
+        starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+        valid = ~np.isnan(block)
+        unset = np.isnan(self.ref) & valid.any(axis=0)
+        self.ref[unset] = block[valid[:, unset].argmax(axis=0), np.flatnonzero(unset)]
+        filled = np.where(valid, block - np.nan_to_num(self.ref), 0.0)
+        new = {
+            "count": np.add.reduceat(valid.astype(np.float64), starts),
+            "sum": np.add.reduceat(filled, starts),
+            "sumsq": np.add.reduceat(filled * filled, starts),
+            "min": np.fmin.reduceat(np.where(valid, block, np.inf), starts),
+            "max": np.fmax.reduceat(np.where(valid, block, -np.inf), starts),
+            "last": block[np.r_[starts[1:], ids.size] - 1],
+        }
+        new_ids = ids[starts]
+        if self.ids.size and new_ids[0] == self.ids[-1]:
+            # The block continues the last open bucket: fold its first run in.
+            for key in ("count", "sum", "sumsq"):
+                self.state[key][-1] += new[key][0]
+            self.state["min"][-1] = np.fmin(self.state["min"][-1], new["min"][0])
+            self.state["max"][-1] = np.fmax(self.state["max"][-1], new["max"][0])
+            self.state["last"][-1] = new["last"][0]
+            new = {key: value[1:] for key, value in new.items()}
+            new_ids = new_ids[1:]
+        self.ids = np.concatenate([self.ids, new_ids])
+        for key, value in new.items():
+            self.state[key] = np.concatenate([self.state[key], value])
+
+    def aggregate(self, how):
+        s = self.state
+        count = np.where(s["count"] > 0, s["count"], np.nan)
+        if how in ("count", "min", "max", "last"):
+            result = s[how].copy()
+            if how in ("min", "max"):
+                result[~np.isfinite(result)] = np.nan
+            return result
+        ref = np.nan_to_num(self.ref)
+        if how == "sum":
+            return s["sum"] + s["count"] * ref
+        mean = s["sum"] / count
+        if how == "mean":
+            return mean + ref
+        var = (s["sumsq"] - s["sum"] * mean) / np.where(count > 1, count - 1, np.nan)
+        return np.maximum(var, 0) if how == "var" else np.sqrt(np.maximum(var, 0))
+
+    def index(self):
+        return pd.DatetimeIndex(self._starts(self.ids))
+
+
+class TimeSeries:
+    """Many aligned series sharing one time axis.
+
+    Parameters
+    ----------
+    columns : list of str
+        Names of the series.
+    window : int, optional
+        Length of the rolling window, in rows.
+    period : str, optional
+        Resampling period; see ``bucket_ids``.
+    capacity : int
+        Rows allocated up front; storage doubles when it fills up.
+    """
+
+    def __init__(self, columns, window=None, period=None, capacity=1024):
+        self.columns = list(columns)
+        width = len(self.columns)
+        self.length = 0
+        self.times = np.empty(capacity, dtype=np.int64)
+        self.values = np.empty((capacity, width), order="F")
+        self.rolling = Rolling(window, width) if window else None
+        self.resampler = Resampler(period, width) if period else None
+        self._rolling = {
+            key: np.empty((capacity, width), order="F") for key in ("count", "mean", "var")
+        }
+
+    @classmethod
+    def from_frame(cls, frame, time_column, **kwargs):
+        """Build from a DataFrame with a date column and one column per series."""
+        columns = [c for c in frame.columns if c != time_column]
+        series = cls(columns, capacity=max(len(frame), 1), **kwargs)
+        series.append(frame[time_column].to_numpy(), frame[columns].to_numpy(dtype=np.float64))
+        return series
+
+    def _grow(self, rows):
+        capacity = self.times.size
+        if self.length + rows <= capacity:
+            return
+        while capacity < self.length + rows:
+            capacity *= 2
+        self.times = np.resize(self.times, capacity)
+        grown = np.empty((capacity, len(self.columns)), order="F")
+        grown[: self.length] = self.values[: self.length]
+        self.values = grown
+        for key, old in self._rolling.items():
+            grown = np.empty((capacity, len(self.columns)), order="F")
+            grown[: self.length] = old[: self.length]
+            self._rolling[key] = grown
+
+    def append(self, times, values):
+        """Append rows; ``times`` must not go back before the last row."""
+        times = to_epoch(times)
+        values = np.asarray(values, dtype=np.float64).reshape(times.size, len(self.columns))
+        if times.size == 0:
+            return self
+        if (np.diff(times) < 0).any() or (self.length and times[0] < self.times[self.length - 1]):
+            raise ValueError("rows must be appended in time order")
+        self._grow(times.size)
+        rows = slice(self.length, self.length + times.size)
+        self.times[rows] = times
+        self.values[rows] = values
+        if self.rolling is not None:
+            count, mean, var = self.rolling.update(values)
+            self._rolling["count"][rows] = count
+            self._rolling["mean"][rows] = mean
+            self._rolling["var"][rows] = var
+        if self.resampler is not None:
+            self.resampler.update(times, values)
+        self.length += times.size
+        return self
+
+    def __len__(self):
+        return self.length
+
+    def _require(self, attribute, setting):
+        if getattr(self, attribute) is None:
+            raise ValueError(f"create the TimeSeries with {setting}= to use this")
+
+    def rolling_mean(self):
+        self._require("rolling", "window")
+        return self._rolling["mean"][: self.length]
+
+    def rolling_var(self):
+        self._require("rolling", "window")
+        return self._rolling["var"][: self.length]
+
+    def rolling_sum(self):
+        self._require("rolling", "window")
+        return self.rolling_mean() * self._rolling["count"][: self.length]
+
+    def resampled(self, how="mean"):
+        """Return the per-period aggregate ``how`` as a DataFrame."""
+        self._require("resampler", "period")
+        if how not in AGGREGATES:
+            raise ValueError(f"how must be one of {AGGREGATES}, got {how!r}")
+        return pd.DataFrame(
+            self.resampler.aggregate(how), index=self.resampler.index(), columns=self.columns
+        )
+
+    def to_frame(self):
+        index = pd.DatetimeIndex(self.times[: self.length].view("datetime64[ns]"))
+        return pd.DataFrame(self.values[: self.length], index=index, columns=self.columns)
@@ -0,0 +1,64 @@
+"""Bundling and fingerprinting of the built site's static assets."""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "_ext"))
+import assets  # noqa: E402
+from assets import Assets, process_page  # noqa: E402
+
+MYSTNB = "mystnb." + "ab" * 32 + ".css"
+PAGE = f"""<html><head>
+<link rel="stylesheet" href="_static/pygments.css?v=1a2b3c4d" type="text/css" />
+<link rel="stylesheet" href="_static/theme.css?digest=0123456789" type="text/css" />
+<link rel="stylesheet" href="_static/{MYSTNB}" type="text/css" />
+<script src="_static/doctools.js?v=9f8e7d6c"></script>
+<script src="_static/sphinx_highlight.js?v=1a1a1a1a"></script>
+<script async="async" src="_static/thebe.js?v=5"></script>
+</head><body></body></html>
+"""
+
+
+def build(tmp_path):
+    static = tmp_path / "_static"
+    static.mkdir()
+    for name in ("pygments.css", "theme.css", MYSTNB):
+        (static / name).write_text(f".{name.split('.')[0]} {{ color: red; }}\n")
+    for name in ("doctools.js", "sphinx_highlight.js", "thebe.js"):
+        (static / name).write_text(f"var {name.split('.')[0]} = 1;\n")
+    page = tmp_path / "page.html"
+    page.write_text(PAGE)
+    return page
+
+
+def test_query_strings_are_bundled(tmp_path):
+    page = build(tmp_path)
+    assert process_page(page, tmp_path, Assets(tmp_path))
+    html = page.read_text()
+    assert html.count("_static/bundle.") == 2
+    assert "?v=" not in html and "?digest=" not in html
+    # A script with attributes is fingerprinted, not bundled.
+    assert "thebe." in html and "thebe.js?v=5" not in html
+
+
+def test_hashed_names_are_not_fingerprinted_again(tmp_path):
+    build(tmp_path)
+    assets = Assets(tmp_path)
+    path = (tmp_path / "_static" / MYSTNB).resolve()
+    assert assets.fingerprint(path) == path
+    assert assets.written == 0
+
+
+def test_second_run_changes_nothing(tmp_path):
+    page = build(tmp_path)
+    process_page(page, tmp_path, Assets(tmp_path))
+    assert not process_page(page, tmp_path, Assets(tmp_path))
+
+
+def test_missing_optional_modules_are_reported(tmp_path, monkeypatch, capsys):
+    build(tmp_path)
+    (tmp_path / "_static" / "large.js").write_text("var large = 1;\n" * 100)
+    monkeypatch.setattr(assets.importlib.util, "find_spec", lambda name: None)
+    assert assets.main([str(tmp_path)]) == 0
+    err = capsys.readouterr().err
+    assert "rjsmin is not installed" in err and "brotli is not installed" in err
+    assert list(tmp_path.rglob("*.gz")) and not list(tmp_path.rglob("*.br"))
@@ -0,0 +1,51 @@
+"""Type inference and encodings of ``compact``."""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from davpy import compact  # noqa: E402
+
+FRAME = pd.DataFrame({
+    "smoking": ["Yes", "No"] * 50,
+    "visits": [0, 1] * 50,
+    "treated": [1, 0] * 50,
+    "nationality": ["Mexican", "Chilean", "Peruvian", "Mexican"] * 25,
+})
+
+
+def test_integer_columns_of_zeros_and_ones_stay_integers():
+    result = compact(FRAME)
+    assert pd.api.types.is_integer_dtype(result["visits"].dtype)
+    assert pd.api.types.is_integer_dtype(result["treated"].dtype)
+
+
+def test_binary_and_dummy_columns_become_booleans():
+    result = compact(FRAME, dummies=["treated"])
+    for name, expected in (("smoking", FRAME["smoking"] == "Yes"), ("treated", FRAME["treated"] == 1)):
+        assert pd.api.types.is_bool_dtype(result[name].dtype)
+        np.testing.assert_array_equal(result[name].to_numpy(dtype=bool), expected.to_numpy())
+    assert isinstance(result["nationality"].dtype, pd.CategoricalDtype)
+
+
+def test_booleans_are_bit_packed_with_pyarrow():
+    pytest.importorskip("pyarrow")
+    result = compact(FRAME, dummies=["treated"])
+    assert result["smoking"].memory_usage(index=False) < len(FRAME) / 4
+
+
+def test_dummy_column_must_hold_zeros_and_ones():
+    with pytest.raises(ValueError):
+        compact(FRAME, dummies=["nationality"])
+
+
+def test_ordinal_values_must_be_listed():
+    frame = pd.DataFrame({"satisfaction": ["low", "high", None, "medium"]})
+    result = compact(frame, ordinals={"satisfaction": ["low", "medium", "high"]})
+    assert result["satisfaction"].cat.ordered
+    assert result["satisfaction"].isna().sum() == 1
+    with pytest.raises(ValueError, match="'medium'"):
+        compact(frame, ordinals={"satisfaction": ["low", "high"]})
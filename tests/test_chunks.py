@@ -0,0 +1,59 @@
+"""``ChunkedArray`` against the concatenated arrays it stands for."""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from davpy import ChunkedArray, iter_chunks  # noqa: E402
+
+# The samples of the bimodal and multimodal examples of chapter 2.
+rng = np.random.default_rng(0)
+S1, S2, S3 = rng.normal(1, 3, 1000), pd.Series(rng.normal(10, 2, 500)), rng.normal(-5, 1, 250)
+
+
+@pytest.fixture
+def mixture():
+    return ChunkedArray.concat(ChunkedArray.concat(S1, S2), S3)
+
+
+def test_concat_keeps_references(mixture):
+    assert len(mixture.chunks) == 3
+    assert np.shares_memory(mixture.chunks[0], S1)
+    assert np.shares_memory(mixture.chunks[1], S2.to_numpy())
+    assert mixture.nbytes == S1.nbytes + S2.to_numpy().nbytes + S3.nbytes
+
+
+def test_matches_np_concatenate(mixture):
+    whole = np.concatenate([S1, S2.to_numpy(), S3])
+    assert len(mixture) == whole.size
+    np.testing.assert_array_equal(mixture.to_numpy(), whole)
+    np.testing.assert_array_equal(np.asarray(mixture), whole)
+    for position in (0, 999, 1000, 1499, 1500, -1, -1750):
+        assert mixture[position] == whole[position]
+    for start, stop in ((0, 10), (990, 1010), (900, 1600), (1700, 1750), (5, 5)):
+        np.testing.assert_array_equal(mixture[start:stop].to_numpy(), whole[start:stop])
+    with pytest.raises(IndexError):
+        mixture[len(whole)]
+    with pytest.raises(ValueError):
+        mixture[::2]
+
+
+def test_statistics_read_chunk_by_chunk(mixture):
+    whole = pd.Series(mixture.to_numpy())
+    assert [chunk.size for chunk in iter_chunks(mixture)] == [1000, 500, 250]
+    exact = ["count", "mean", "std", "min", "max"]
+    pd.testing.assert_series_equal(mixture.describe()[exact], whole.describe()[exact],
+                                   check_names=False, rtol=1e-12)
+    # Quantiles come from a sketch, within its rank error.
+    for q in (0.25, 0.5, 0.75):
+        assert np.mean(whole <= mixture.quantile(q)) == pytest.approx(q, abs=0.02)
+
+
+def test_dtype_follows_numpy_promotion():
+    mixed = ChunkedArray.concat(np.arange(3), np.array([0.5]))
+    assert mixed.dtype == np.float64
+    np.testing.assert_array_equal(mixed.to_numpy(), [0, 1, 2, 0.5])
+    assert ChunkedArray().to_numpy().size == 0
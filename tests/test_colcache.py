@@ -0,0 +1,77 @@
+"""Round trips through the column cache."""
+import sys
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from davpy.colcache import load, open_frame, save_frame  # noqa: E402
+
+
+@pytest.fixture
+def csv(tmp_path):
+    path = tmp_path / "source.csv"
+    pd.DataFrame({
+        "when": ["2024-01-01T00:00:00+02:00", "2024-06-01T12:00:00+02:00", ""],
+        "count": [1, None, 3],
+        "flag": ["True", "", "False"],
+        "value": [1.5, 2.0, 3.0],
+    }).to_csv(path, index=False)
+    return path
+
+
+def test_tz_aware_and_nullable_columns_load_from_cache(csv, tmp_path):
+    kwargs = dict(parse_dates=["when"], dtype={"count": "Int64", "flag": "boolean"})
+    expected = pd.read_csv(csv, **kwargs)
+    for _ in range(2):  # parse and cache, then map the cached columns
+        result = load(csv, cache_dir=tmp_path / "cache", **kwargs)
+        pd.testing.assert_frame_equal(result, expected)
+
+
+def test_boolean_dtypes_round_trip(tmp_path):
+    frame = pd.DataFrame({
+        "numpy": np.arange(20) % 3 == 0,
+        "boolean": pd.array([True, False] * 10, dtype="boolean"),
+    })
+    save_frame(frame, tmp_path / "entry")
+    pd.testing.assert_frame_equal(open_frame(tmp_path / "entry", mmap=False), frame)
+
+
+def test_uncacheable_source_is_returned_and_not_published(tmp_path):
+    path = tmp_path / "lists.pkl"
+    pd.DataFrame({"items": [[1], [2, 3]]}).to_pickle(path)
+    cache = tmp_path / "cache"
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        result = load(path, reader=pd.read_pickle, cache_dir=cache)
+    assert result["items"].tolist() == [[1], [2, 3]]
+    assert caught
+    assert not list(cache.iterdir())
+
+
+@pytest.mark.parametrize("index", [
+    pd.Index(["a", "b", "c"]),
+    pd.Index([10, 20, 30], name="id"),
+    pd.RangeIndex(5, 8),
+    pd.MultiIndex.from_arrays([["x", "x", "y"], [1, 2, 1]], names=["g", None]),
+])
+def test_index_round_trips(tmp_path, index):
+    frame = pd.DataFrame({"index": [1.0, 2.0, 3.0], "text": ["u", "v", "u"]}, index=index)
+    save_frame(frame, tmp_path / "entry")
+    result = open_frame(tmp_path / "entry", mmap=False)
+    pd.testing.assert_index_equal(result.index, frame.index, exact="equiv")
+    pd.testing.assert_frame_equal(result, frame.astype({"text": "category"}))
+
+
+def test_mixed_object_column_is_not_cached(tmp_path):
+    path = tmp_path / "mixed.pkl"
+    frame = pd.DataFrame({"mixed": pd.array([1, "1", 2.5], dtype=object)})
+    frame.to_pickle(path)
+    cache = tmp_path / "cache"
+    with pytest.warns(UserWarning, match="not caching"):
+        result = load(path, reader=pd.read_pickle, cache_dir=cache)
+    assert result["mixed"].tolist() == [1, "1", 2.5]
+    assert not list(cache.iterdir())
@@ -0,0 +1,56 @@
+"""``Crosstab`` against ``pd.crosstab``."""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from davpy import Crosstab, crosstab  # noqa: E402
+
+# Shaped like the "Contingency table" example of chapter 2.
+SURVEY = pd.DataFrame({
+    "Education": ["High school", "Bachelor", "Master", "Bachelor", None, "Master", "Bachelor"],
+    "Sex": ["F", "M", "F", "F", "M", None, "M"],
+})
+
+
+def expected(frame):
+    table = pd.crosstab(frame["Education"], frame["Sex"])
+    table.index, table.columns = list(table.index), list(table.columns)
+    return table
+
+
+def labelled(table):
+    return table.set_axis(list(table.index), axis=0).set_axis(list(table.columns), axis=1)
+
+
+def test_text_columns_match_pandas_in_chunks():
+    chunks = [SURVEY.iloc[:3], SURVEY.iloc[3:]]
+    result = crosstab(chunks, "Education", "Sex").to_frame()
+    pd.testing.assert_frame_equal(labelled(result), expected(SURVEY))
+    assert result.index.name == "Education" and result.columns.name == "Sex"
+
+
+def test_categorical_columns_keep_category_order():
+    levels = ["High school", "Bachelor", "Master", "PhD"]
+    frame = SURVEY.assign(Education=pd.Categorical(SURVEY["Education"], categories=levels))
+    result = crosstab(frame, "Education", "Sex").to_frame()
+    assert list(result.index) == ["High school", "Bachelor", "Master"]
+    pd.testing.assert_frame_equal(labelled(result), expected(frame))
+
+
+def test_merged_parts_keep_category_order():
+    levels = ["High school", "Bachelor", "Master"]
+    frame = SURVEY.assign(Education=pd.Categorical(SURVEY["Education"], categories=levels))
+    parts = [crosstab(frame.iloc[:4], "Education", "Sex"), crosstab(frame.iloc[4:], "Education", "Sex")]
+    merged = Crosstab("Education", "Sex").merge(parts[1]).merge(parts[0]).to_frame()
+    pd.testing.assert_frame_equal(labelled(merged), expected(frame))
+
+
+def test_categoricals_without_categories():
+    empty = pd.Categorical([None, None], categories=[])
+    table = Crosstab().update(empty, np.array(["a", "b"]))
+    assert table.to_frame().shape == (0, 0)
+    table.update(pd.Categorical(["x", "y"]), np.array(["a", "a"]))
+    assert table.to_frame().to_numpy().tolist() == [[1], [1]]
@@ -0,0 +1,48 @@
+"""``describe_wide`` and ``WideMoments`` against pandas."""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from davpy import WideMoments, describe_wide  # noqa: E402
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame(rng.normal(20, 5, (3000, 6)), columns=[f"Naruto-season-{i}" for i in range(6)])
+    frame.iloc[::3, 1] = np.nan
+    frame["Naruto-season-5"] = np.nan
+    frame["Name"] = "Luis"
+    frame["Age"] = np.arange(3000)
+    return frame
+
+
+@pytest.mark.parametrize("percentiles", [None, [0.1, 0.9]])
+@pytest.mark.parametrize("workers", [1, 3])
+def test_matches_describe(frame, percentiles, workers):
+    pd.testing.assert_frame_equal(
+        describe_wide(frame, percentiles=percentiles, workers=workers),
+        frame.describe(percentiles=percentiles),
+        rtol=1e-9,
+    )
+
+
+def test_empty_frame():
+    frame = pd.DataFrame({"a": pd.Series(dtype=float), "b": pd.Series(dtype=float)})
+    pd.testing.assert_frame_equal(describe_wide(frame), frame.describe())
+
+
+def test_no_numeric_columns():
+    with pytest.raises(ValueError):
+        describe_wide(pd.DataFrame({"Name": ["Luis", "Ana"]}))
+
+
+def test_moments_merge_row_chunks(frame):
+    numeric = frame.select_dtypes("number")
+    first = WideMoments(numeric.columns).update(numeric.iloc[:1000])
+    second = WideMoments(numeric.columns).update(numeric.iloc[1000:])
+    np.testing.assert_allclose(first.merge(second).std(), numeric.std(), rtol=1e-9)
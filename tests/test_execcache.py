@@ -0,0 +1,83 @@
+"""The per-cell output cache and its blob store."""
+import base64
+import sys
+from pathlib import Path
+
+import nbformat
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "_ext"))
+from execcache import CellCache, cell_keys, environment_digest  # noqa: E402
+from execute import kernel_name, replay_notebook  # noqa: E402
+
+PNG = base64.b64encode(bytes(range(256)) * 200).decode("ascii")
+
+
+def figure(text="<Figure>"):
+    return {
+        "output_type": "display_data",
+        "metadata": {},
+        "data": {"image/png": PNG, "text/plain": text},
+    }
+
+
+def test_large_outputs_round_trip_and_are_stored_once(tmp_path):
+    cache = CellCache(tmp_path, blob_min_bytes=1024)
+    cache.put("a" * 64, [figure("first")])
+    cache.put("b" * 64, [figure("second")])
+    cache.save()
+    blobs = list((tmp_path / "blobs").glob("*/*"))
+    assert len(blobs) == 1
+    assert blobs[0].stat().st_size == len(base64.b64decode(PNG))
+    reopened = CellCache(tmp_path, blob_min_bytes=1024)
+    assert reopened.get("a" * 64) == [figure("first")]
+    assert reopened.get("b" * 64) == [figure("second")]
+
+
+def test_evicted_entries_release_their_blobs(tmp_path):
+    cache = CellCache(tmp_path, max_bytes=0, blob_min_bytes=1024)
+    cache.put("a" * 64, [figure()])
+    cache.save()
+    assert cache.evictions == 1
+    assert not list((tmp_path / "blobs").glob("*/*"))
+    assert cache.get("a" * 64) is None
+
+
+def notebook(*sources):
+    nb = nbformat.v4.new_notebook()
+    nb.cells = [nbformat.v4.new_markdown_cell("# Title")]
+    nb.cells += [nbformat.v4.new_code_cell(source) for source in sources]
+    return nb
+
+
+def test_a_changed_cell_changes_its_key_and_every_later_one():
+    keys = cell_keys(notebook("a = 1", "b = 2", "a + b"), "env")
+    assert sorted(keys) == [1, 2, 3]
+    edited = cell_keys(notebook("a = 1", "b = 3", "a + b"), "env")
+    assert edited[1] == keys[1]
+    assert edited[2] != keys[2] and edited[3] != keys[3]
+    prose = notebook("a = 1", "b = 2", "a + b")
+    prose.cells[0].source = "# Another title"
+    assert cell_keys(prose, "env") == keys
+    assert cell_keys(notebook("a = 1", "b = 2", "a + b"), "other env") != keys
+
+
+def test_notebook_is_replayed_only_when_every_cell_hits(tmp_path):
+    path = tmp_path / "chapter.ipynb"
+    nb = notebook("x = 21", "x * 2")
+    nbformat.write(nb, str(path))
+    cache = CellCache(tmp_path / "cache")
+    keys = cell_keys(nb, environment_digest(kernel_name=kernel_name(nb)))
+    result = {"output_type": "execute_result", "execution_count": 2, "metadata": {},
+              "data": {"text/plain": "42"}}
+    cache.put(keys[1], [])
+    assert replay_notebook(path, cache) is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    cache.put(keys[2], [result])
+    replayed = replay_notebook(path, cache)
+    assert replayed.cells[2].outputs == [nbformat.from_dict(result)]
+    assert (cache.hits, cache.misses) == (3, 1)
+
+    nb.cells[2].source = "x * 3"
+    nbformat.write(nb, str(path))
+    assert replay_notebook(path, cache) is None
@@ -0,0 +1,100 @@
+"""Executing notebooks ahead of ``jb build``."""
+import sys
+from pathlib import Path
+
+import nbformat
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "_ext"))
+import execute  # noqa: E402
+from execute import execute_notebooks, load_config, pool_size, run_notebook  # noqa: E402
+
+
+def test_pool_size():
+    assert pool_size(4, 2) == 2
+    assert pool_size("2", 5) == 2
+    assert pool_size(0, 3) == 1
+    assert 1 <= pool_size("auto", 3) <= 3
+
+
+def test_defaults_and_settings_come_from_config(tmp_path):
+    (tmp_path / "_config.yml").write_text("title: Book\n")
+    config = load_config(tmp_path)
+    assert (config["timeout"], config["notebook_timeout"], config["workers"]) == (30, -1, "auto")
+    (tmp_path / "_config.yml").write_text("execute:\n  timeout: -1\n  workers: 2\n")
+    config = load_config(tmp_path)
+    assert (config["timeout"], config["workers"]) == (-1, 2)
+
+
+@pytest.fixture
+def config(tmp_path):
+    (tmp_path / "_config.yml").write_text(
+        "execute:\n"
+        f"  cache: {tmp_path / 'jupyter_cache'}\n"
+        f"  cell_cache: {tmp_path / 'cell_cache'}\n"
+        f"  logs: {tmp_path / 'logs'}\n"
+        "  notebook_timeout: 20\n"
+        "  workers: 2\n"
+        "  warm_kernels: false\n"
+    )
+    return load_config(tmp_path)
+
+
+def write_notebook(path, *sources):
+    nb = nbformat.v4.new_notebook()
+    nb.cells = [nbformat.v4.new_code_cell(source) for source in sources]
+    nbformat.write(nb, str(path))
+    return path
+
+
+def test_failures_are_reported_and_successes_replayed(tmp_path, config, capsys):
+    good = write_notebook(tmp_path / "good.ipynb", "x = 21", "x * 2")
+    bad = write_notebook(tmp_path / "bad.ipynb", "raise RuntimeError('boom')")
+    assert execute_notebooks([good, bad], config) == [bad]
+    assert (tmp_path / "logs" / "bad.log").read_text().count("RuntimeError")
+    capsys.readouterr()
+
+    assert execute_notebooks([good], config) == []
+    assert "good.ipynb: replayed from cell cache" in capsys.readouterr().out
+
+
+def test_notebook_timeout_bounds_the_whole_notebook(tmp_path, config):
+    # Either cell alone fits in the budget, both do not.
+    slow = write_notebook(tmp_path / "slow.ipynb", "import time; time.sleep(2)", "time.sleep(2)")
+    config.update(timeout=-1, notebook_timeout=3)
+    assert execute_notebooks([slow], config) == [slow]
+
+
+def outputs(text):
+    """The text outputs of an executed notebook, one list per code cell."""
+    nb = nbformat.reads(text, as_version=4)
+    return [[o.get("text", "").strip() for o in cell.outputs] for cell in nb.cells]
+
+
+def test_warm_kernel_is_reused_and_reset_between_notebooks(tmp_path, config):
+    config.update(warm_kernels=True, preload=["wave"])
+    (tmp_path / "other").mkdir()
+    report = (
+        "import os, sys; print(os.getpid()); print(os.path.basename(os.getcwd()))\n"
+        "print('x' in dir(), 'wave' in sys.modules)"
+    )
+    first = write_notebook(tmp_path / "first.ipynb", "x = 1", report)
+    second = write_notebook(tmp_path / "other" / "second.ipynb", report)
+    failing = write_notebook(tmp_path / "failing.ipynb", "1 / 0")
+    try:
+        text, _, _ = run_notebook(first, config)
+        pid, cwd, state = outputs(text)[1][0].splitlines()
+        assert (cwd, state) == (tmp_path.name, "True True")
+
+        text, _, _ = run_notebook(second, config)
+        nb = nbformat.reads(text, as_version=4)
+        assert nb.cells[0].execution_count == 1
+        assert outputs(text)[0][0].splitlines() == [pid, "other", "False True"]
+
+        with pytest.raises(Exception):
+            run_notebook(failing, config)
+        assert "python3" not in execute._kernels
+        text, _, _ = run_notebook(second, config)
+        assert outputs(text)[0][0].splitlines()[0] != pid
+    finally:
+        execute.shutdown_kernels()
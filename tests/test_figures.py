@@ -0,0 +1,58 @@
+"""Responsive variants and deduplication of the built figures."""
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "_ext"))
+import figures  # noqa: E402
+from figures import link_duplicates, variant_widths  # noqa: E402
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def figure(path, size=(800, 600), dpi=144):
+    image = Image.new("RGB", size, "white")
+    image.paste((31, 119, 180), (100, 100, 500, 400))
+    image.save(path, dpi=(dpi, dpi))
+    return path
+
+
+def test_retina_figures_get_display_and_full_widths(tmp_path):
+    with Image.open(figure(tmp_path / "retina.png")) as image:
+        assert variant_widths(image) == (400, [400, 600, 800])
+    with Image.open(figure(tmp_path / "plain.png", dpi=72)) as image:
+        assert variant_widths(image) == (800, [800])
+
+
+def test_identical_images_are_hardlinked(tmp_path):
+    executed, images = tmp_path / "jupyter_execute", tmp_path / "_images"
+    executed.mkdir()
+    images.mkdir()
+    figure(executed / "chapter_1_0.png")
+    figure(images / "chapter_1_0.png")
+    figure(images / "other.png", size=(200, 100))
+    assert link_duplicates(executed, images) == 1
+    assert os.path.samefile(executed / "chapter_1_0.png", images / "chapter_1_0.png")
+    assert link_duplicates(executed, images) == 0
+
+
+def test_pages_get_picture_elements(tmp_path):
+    html = tmp_path / "html"
+    (html / "_images").mkdir(parents=True)
+    (html / "chapters").mkdir()
+    figure(html / "_images" / "hist.png")
+    page = html / "chapters" / "page.html"
+    page.write_text('<p><img alt="hist" src="../_images/hist.png" /></p>')
+    assert figures.main([str(tmp_path)]) == 0
+
+    text = page.read_text()
+    assert text.startswith('<p><picture><source type="image/webp" srcset="../_images/hist.400w.webp 400w')
+    assert 'width="400" height="300" loading="lazy"' in text
+    assert (html / "_images" / "hist.800w.png").exists()
+    with Image.open(html / "_images" / "hist.600w.webp") as variant:
+        assert variant.size == (600, 450)
+    # A second run leaves rewritten pages alone.
+    figures.main([str(tmp_path)])
+    assert page.read_text() == text
@@ -0,0 +1,26 @@
+"""Exact frequency tables of integer and compacted columns."""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from davpy import FrequencyTable, compact  # noqa: E402
+
+
+@pytest.mark.parametrize("dtype", [np.int8, np.int16, np.int32, np.int64])
+def test_narrow_signed_integers(dtype):
+    values = np.array([-100, 100, 5, 100], dtype=dtype)
+    counts = FrequencyTable().update(values).value_counts()
+    assert counts.to_dict() == {100: 2, -100: 1, 5: 1}
+
+
+def test_compacted_column_matches_value_counts():
+    frame = pd.DataFrame({"age": np.random.default_rng(0).integers(-120, 120, 1000)})
+    column = compact(frame)["age"]
+    assert column.dtype == np.int8
+    expected = frame["age"].value_counts()
+    result = FrequencyTable(name="age").update(column).value_counts()
+    pd.testing.assert_series_equal(result.sort_index(), expected.sort_index(), check_index_type=False)
@@ -0,0 +1,61 @@
+"""``Histogram`` over chunks against ``np.histogram`` on the whole sample."""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from davpy import Histogram, histogram  # noqa: E402
+
+
+@pytest.fixture
+def sample():
+    rng = np.random.default_rng(0)
+    return np.concatenate([rng.normal(1, 3, 5000), rng.normal(8, 1, 3000)])
+
+
+def test_fixed_range_matches_numpy(sample):
+    result = histogram(np.array_split(sample, 9), bins=50, range=(-10, 12))
+    counts, edges = np.histogram(sample, bins=50, range=(-10, 12))
+    np.testing.assert_array_equal(result.counts, counts)
+    np.testing.assert_allclose(result.edges, edges)
+    assert result.underflow == np.count_nonzero(sample < -10)
+    assert result.overflow == np.count_nonzero(sample > 12)
+
+
+def test_non_uniform_edges_match_numpy(sample):
+    edges = [-15, -2, 0, 1, 5, 9, 20]
+    result = histogram(np.array_split(sample, 4), edges=edges)
+    np.testing.assert_array_equal(result.counts, np.histogram(sample, bins=edges)[0])
+
+
+def test_adaptive_bins_widen_to_cover_every_chunk(sample):
+    # The first chunk covers a narrow part of the range only.
+    chunks = [np.sort(sample)[3000:3100], sample]
+    result = histogram(chunks, bins=50)
+    assert result.bins == 50
+    assert result.underflow == result.overflow == 0
+    assert result.edges[0] <= sample.min() and result.edges[-1] >= sample.max()
+    everything = np.concatenate(chunks)
+    np.testing.assert_array_equal(result.counts, np.histogram(everything, bins=result.edges)[0])
+
+
+def test_partitions_merge_exactly(tmp_path, sample):
+    paths = []
+    for i, part in enumerate(np.array_split(sample, 3)):
+        paths.append(str(tmp_path / f"part{i}.csv"))
+        pd.DataFrame({"x": part}).to_csv(paths[-1], index=False)
+    merged = histogram(paths, column="x", workers=2, bins=40, range=(-10, 12))
+    np.testing.assert_array_equal(merged.counts, Histogram(bins=40, range=(-10, 12)).update(sample).counts)
+
+
+def test_plot_draws_the_counts(sample):
+    pytest.importorskip("matplotlib")
+    import matplotlib
+
+    matplotlib.use("Agg")
+    result = histogram(sample, bins=20)
+    ax = result.plot()
+    np.testing.assert_array_equal([patch.get_height() for patch in ax.patches], result.counts)
@@ -0,0 +1,48 @@
+"""Partitioned joins against ``DataFrame.merge``."""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from davpy import merge_partitioned  # noqa: E402
+
+LEFT = pd.DataFrame({"key": [1, 2, 3, 4], "a": [10, 20, 30, 40]})
+RIGHT = pd.DataFrame({"key": [1, 2, 2, 9], "b": [5, 6, 7, 8]})
+
+
+def joined(spill_dir):
+    result = merge_partitioned(LEFT, RIGHT, "key", partitions=3, workers=1, spill_dir=spill_dir)
+    return result.sort_values(["key", "b"], ignore_index=True)
+
+
+def test_matches_merge():
+    expected = LEFT.merge(RIGHT, on="key").sort_values(["key", "b"], ignore_index=True)
+    pd.testing.assert_frame_equal(joined(None), expected, check_dtype=False)
+
+
+def test_reused_spill_dir_does_not_leak_between_runs(tmp_path):
+    first, second = joined(tmp_path), joined(tmp_path)
+    pd.testing.assert_frame_equal(first, second)
+    assert not list(tmp_path.iterdir())
+
+
+def test_keys_of_different_dtypes_meet():
+    left = pd.DataFrame({"key": np.array([-1, -2, 3, 4], dtype=np.int32), "a": range(4)})
+    right = pd.DataFrame({"key": np.array([-1, -2, 3, 9], dtype=np.int64), "b": range(4)})
+    for right_keys in (right, right.astype({"key": np.float64})):
+        result = merge_partitioned(left, right_keys, "key", partitions=7, workers=1)
+        expected = left.merge(right_keys, on="key")
+        pd.testing.assert_frame_equal(
+            result.sort_values("a", ignore_index=True), expected, check_dtype=False
+        )
+
+
+def test_empty_results_keep_the_columns_of_merge():
+    expected = LEFT.merge(RIGHT, on="key", how="left")
+    result = merge_partitioned(LEFT, RIGHT, "key", how="left", partitions=16, workers=1)
+    assert list(result.columns) == list(expected.columns)
+    nothing = merge_partitioned(LEFT, RIGHT[RIGHT.key > 100], "key", partitions=3, workers=1)
+    assert list(nothing.columns) == list(LEFT.merge(RIGHT, on="key").columns)
+    assert nothing.empty
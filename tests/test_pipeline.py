@@ -0,0 +1,69 @@
+"""Plan-cache invalidation of ``Pipeline``."""
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from davpy import Pipeline  # noqa: E402
+from davpy.pipeline import PlanCache  # noqa: E402
+
+
+def test_closure_change_is_not_served_from_cache():
+    cache = PlanCache()
+    frame = pd.DataFrame({"x": [1, 2, 3]})
+    factor = 2
+
+    def collect():
+        return Pipeline(frame, cache=cache).derive("y", lambda f: f["x"] * factor, ["x"]).collect()
+
+    assert collect()["y"].tolist() == [2, 4, 6]
+    factor = 10
+    assert collect()["y"].tolist() == [10, 20, 30]
+
+
+def test_in_place_edit_of_source_is_not_served_from_cache():
+    cache = PlanCache()
+    frame = pd.DataFrame({"g": [1, 1, 2], "x": [1, 2, 3]})
+    plan = Pipeline(frame, cache=cache).groupby_agg("g", {"s": ("x", "sum")})
+    assert plan.collect()["s"].tolist() == [3, 3]
+    frame.loc[0, "x"] = 100
+    assert plan.collect()["s"].tolist() == [102, 3]
+
+
+def test_unchanged_plan_hits_cache():
+    cache = PlanCache()
+    frame = pd.DataFrame({"x": [1, 2, 3]})
+    plan = Pipeline(frame, cache=cache).filter("x", ">", 1)
+    plan.collect()
+    plan.collect()
+    assert cache.hits == 1
+
+
+def test_unfingerprintable_closure_is_not_cached():
+    cache = PlanCache()
+    frame = pd.DataFrame({"x": [1, 2, 3]})
+    marker = object()
+    Pipeline(frame, cache=cache).derive("y", lambda f: f["x"] * (marker is not None), ["x"]).collect()
+    assert not cache.entries
+
+
+def test_editing_a_result_leaves_the_cache_intact():
+    cache = PlanCache()
+    plan = Pipeline(pd.DataFrame({"x": [1, 2, 3]}), cache=cache).filter("x", ">", 1)
+    for _ in range(2):
+        result = plan.collect()
+        result.loc[:, "x"] = 0
+    assert plan.collect()["x"].tolist() == [2, 3]
+
+
+def test_filter_on_a_dropped_column_raises_like_pandas():
+    frame = pd.DataFrame({"x": [1, 2, 3], "y": [4, 5, 6]})
+    plan = Pipeline(frame, cache=PlanCache()).select("x").filter("y", ">", 4)
+    assert "Filter" in plan.explain().splitlines()[-1]
+    with pytest.raises(KeyError):
+        plan.collect()
+    kept = Pipeline(frame, cache=PlanCache()).select("x", "y").filter("y", ">", 4)
+    assert kept.explain().splitlines()[1].strip().startswith("Filter")
+    assert kept.collect()["x"].tolist() == [2, 3]
@@ -0,0 +1,27 @@
+"""Per-cell peak memory of ``profiling``."""
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "_ext"))
+from profiling import process_memory, reset_peak  # noqa: E402
+
+
+@pytest.mark.skipif(not Path("/proc/self/clear_refs").exists(), reason="needs Linux /proc")
+def test_reset_peak_forgets_earlier_allocations():
+    code = "import numpy, sys, time; numpy.ones(2**25); print(flush=True); time.sleep(5)"
+    child = subprocess.Popen([sys.executable, "-c", code], stdout=subprocess.PIPE)
+    try:
+        child.stdout.readline()  # the 256 MiB array has been freed
+        rss, peak = process_memory(child.pid)
+        assert peak > rss + 200
+        assert reset_peak(child.pid)
+        time.sleep(0.1)
+        rss, peak = process_memory(child.pid)
+        assert peak < rss + 50
+    finally:
+        child.kill()
+        child.wait()
@@ -0,0 +1,77 @@
+"""``melt`` and ``pivot`` against ``DataFrame.melt`` and ``pivot_table``."""
+import sys
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from davpy import melt, pivot, transpose  # noqa: E402
+
+# The wide table of the "Anatomy of a table" section of chapter 2.
+WIDE = pd.DataFrame({
+    "Name": ["Ana", "Luis", "Marta"],
+    "Age": [20, 31, 17],
+    "Naruto-season-1": [8, 6, 9],
+    "Naruto-season-2": [7.5, np.nan, 9.0],
+})
+
+
+def as_strings(frame):
+    """Categorical columns as their labels, as ``DataFrame.melt`` returns them."""
+    return frame.apply(lambda c: c.astype(str) if isinstance(c.dtype, pd.CategoricalDtype) else c)
+
+
+def test_melt_matches_pandas():
+    seasons = ["Naruto-season-1", "Naruto-season-2"]
+    result = melt(WIDE, id_vars=["Name", "Age"], value_vars=seasons, var_name="season")
+    expected = WIDE.melt(id_vars=["Name", "Age"], value_vars=seasons, var_name="season")
+    assert isinstance(result["season"].dtype, pd.CategoricalDtype)
+    pd.testing.assert_frame_equal(as_strings(result), expected)
+
+
+def test_melt_of_text_values_matches_pandas():
+    result = melt(WIDE, id_vars=["Age"], value_vars=["Name"])
+    expected = WIDE.melt(id_vars=["Age"], value_vars=["Name"])
+    pd.testing.assert_frame_equal(as_strings(result), expected)
+    mixed = melt(WIDE, value_vars=["Name", "Age"])
+    pd.testing.assert_frame_equal(as_strings(mixed), WIDE.melt(value_vars=["Name", "Age"]))
+
+
+def test_pivot_round_trips_melt():
+    long = melt(WIDE, id_vars=["Name"], value_vars=["Naruto-season-1", "Naruto-season-2"])
+    expected = WIDE.set_index("Name")[["Naruto-season-1", "Naruto-season-2"]].astype(float)
+    result = pivot(long, "Name", "variable", "value")
+    pd.testing.assert_frame_equal(result, expected, check_names=False, check_index_type=False,
+                                  check_column_type=False)
+
+
+def test_pivot_drops_missing_keys_like_pivot_table():
+    long = pd.DataFrame({
+        "row": ["a", "a", None, "b"],
+        "col": ["x", "y", "x", None],
+        "value": [1.0, 2.0, 3.0, 4.0],
+    })
+    expected = long.pivot_table(index="row", columns="col", values="value")
+    pd.testing.assert_frame_equal(pivot(long, "row", "col", "value"), expected, check_names=False)
+
+
+def test_pivot_of_several_values_keeps_integers_and_warns_about_nothing():
+    long = pd.DataFrame({"row": [1, 1, 2, 2], "col": ["x", "y", "x", "y"],
+                         "a": [1, 2, 3, 4], "b": [0.5, 1.5, 2.5, 3.5]})
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        result = pivot(long, "row", "col", ["a", "b"])
+    assert result[("a", "x")].dtype == np.int64
+    expected = long.pivot(index="row", columns="col", values=["a", "b"])
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+def test_transpose_keeps_each_group_typed():
+    view = transpose(WIDE)
+    assert {str(dtype) for dtype, _ in view.blocks()} >= {"int64", "float64"}
+    assert view.block(np.dtype(np.int64)).to_numpy().dtype == np.int64
+    with pytest.raises(KeyError):
+        view.block(np.dtype(np.complex128))
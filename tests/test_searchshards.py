@@ -0,0 +1,88 @@
+"""Sharding the search index, and the loader's shard lookup."""
+import json
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "_ext"))
+from searchshards import LOADER, main, parse_index, shard  # noqa: E402
+
+# Enough terms for three shards; "w10..." straddles the first boundary.
+TERMS = {f"w{i:04d}": [i % 7, (i * 3) % 7] if i % 5 else i % 7 for i in range(3000)}
+INDEX = {
+    "docnames": [f"page{i}" for i in range(7)],
+    "titles": [f"Page {i}" for i in range(7)],
+    "terms": TERMS,
+    "titleterms": {"w1000": 2, "orphan": []},
+}
+
+# Runs the loader against the shards on disk and prints the terms it hands
+# to searchtools.js for the query in argv.
+NODE = """
+const fs = require("fs"), path = require("path");
+const [root, text] = process.argv.slice(1);
+global.DOCUMENTATION_OPTIONS = {URL_ROOT: root + "/"};
+global.fetch = (url) => Promise.resolve({json: () => JSON.parse(fs.readFileSync(url, "utf8"))});
+global.Stemmer = function () { this.stemWord = (word) => word; };
+global.Search = {
+  setIndex: (index) => { Search._index = index; },
+  query: () => console.log(JSON.stringify([Search._index.terms, Search._index.titleterms])),
+};
+eval(fs.readFileSync(path.join(root, "searchindex.js"), "utf8"));
+eval(fs.readFileSync(path.join(root, "_static", "searchshards.js"), "utf8"));
+Search.query(text);
+"""
+
+
+@pytest.fixture
+def html(tmp_path):
+    root = tmp_path / "html"
+    (root / "_static").mkdir(parents=True)
+    (root / "searchindex.js").write_text(f"Search.setIndex({json.dumps(INDEX)})")
+    (root / "search.html").write_text(
+        '<script src="_static/searchtools.js"></script>\n</body>'
+    )
+    return root
+
+
+def test_shards_are_sorted_runs_of_delta_encoded_postings():
+    first, shards = shard(json.loads(json.dumps(INDEX)), size=1024)
+    assert first == ["w0000", "w1024", "w2048"]
+    terms = [term for s in shards for term in s["terms"]]
+    assert terms == sorted(TERMS)  # "orphan" has no pages and is dropped
+    position = shards[0]["terms"].index("w0012")
+    assert shards[0]["postings"][position] == [1, 4]  # pages 1 and 5
+    assert shards[0]["titles"][position] is None
+
+
+def test_main_shards_and_restore_puts_the_index_back(html, capsys):
+    original = (html / "searchindex.js").read_text()
+    assert main([str(html)]) == 0
+    index = parse_index((html / "searchindex.js").read_text())
+    assert index["terms"] == {} and len(index["shards"]) == 3
+    assert index["docnames"] == INDEX["docnames"]
+    assert LOADER.name in (html / "search.html").read_text()
+    assert main([str(html)]) == 0
+    assert "already sharded" in capsys.readouterr().out
+    assert main(["--restore", str(html)]) == 0
+    assert (html / "searchindex.js").read_text() == original
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="needs node")
+@pytest.mark.parametrize("query", ["w10", "w0012", "w2999", "W1024", "absent"])
+def test_loader_finds_every_term_with_the_query_prefix(html, query):
+    main([str(html)])
+    result = subprocess.run(
+        ["node", "-e", NODE, str(html), query], capture_output=True, text=True, check=True
+    )
+    terms, titleterms = json.loads(result.stdout)
+    word = query.lower()
+    expected = {
+        term: sorted(pages if isinstance(pages, list) else [pages])
+        for term, pages in TERMS.items() if term.startswith(word)
+    }
+    assert terms == expected
+    assert titleterms == ({"w1000": [2]} if "w1000".startswith(word) else {})
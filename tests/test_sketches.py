@@ -0,0 +1,96 @@
+"""Accuracy of ``KLLSketch`` against ``Series.quantile``.
+
+Run from the book root with ``python -m pytest tests``. The distributions
+are those of the "Data distribution" section of chapter 2, as in
+``benchmarks/bench_quantiles.py``, at a size that keeps the run short.
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.stats import skewnorm
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from davpy import KLLSketch  # noqa: E402
+
+ROWS = 200_000
+PERCENTILES = np.arange(1, 100) / 100
+
+
+def distribution(name, rows=ROWS, seed=0):
+    rng = np.random.default_rng(seed)
+    third = rows // 3
+    return {
+        "center": lambda: skewnorm.rvs(0, size=rows, random_state=rng),
+        "skewed right": lambda: skewnorm.rvs(10, size=rows, random_state=rng),
+        "skewed left": lambda: skewnorm.rvs(-10, size=rows, random_state=rng),
+        "bimodal": lambda: np.concatenate(
+            [rng.normal(0, 0.5, rows // 2), rng.normal(2, 0.5, rows // 2)]
+        ),
+        "multimodal": lambda: np.concatenate([rng.normal(mu, 0.5, third) for mu in (0, 2, 4)]),
+        "uniform": lambda: rng.uniform(-1, 1, rows),
+    }[name]()
+
+
+def chunked_sketch(values, chunks=20, k=200):
+    """Sketch ``values`` chunk by chunk, merging each part through ``to_bytes``."""
+    sketch = KLLSketch(k, seed=0)
+    for chunk in np.array_split(values, chunks):
+        part = KLLSketch(k, seed=1).update(chunk)
+        sketch.merge(KLLSketch.from_bytes(part.to_bytes()))
+    return sketch
+
+
+@pytest.mark.parametrize(
+    "name", ["center", "skewed right", "skewed left", "bimodal", "multimodal", "uniform"]
+)
+def test_rank_error_within_bound(name):
+    values = distribution(name)
+    sketch = chunked_sketch(values)
+    exact = np.sort(values)
+    ranks = np.searchsorted(exact, sketch.quantile(PERCENTILES), side="right") / exact.size
+    assert np.abs(ranks - PERCENTILES).max() <= sketch.rank_error()
+    # The IQR of the chapter is within the same rank error of the exact one.
+    series = pd.Series(values)
+    low, high = series.quantile([0.25 - sketch.rank_error(), 0.75 + sketch.rank_error()])
+    assert sketch.iqr() <= high - low
+
+
+def test_exact_before_compaction():
+    values = distribution("skewed right", rows=150)
+    sketch = KLLSketch(200).update(values)
+    expected = pd.Series(values).quantile(PERCENTILES)
+    np.testing.assert_allclose(sketch.quantile(PERCENTILES), expected)
+
+
+def test_bytes_round_trip():
+    sketch = KLLSketch(64, seed=0).update(distribution("bimodal", rows=20_000))
+    restored = KLLSketch.from_bytes(sketch.to_bytes())
+    for attribute in ("k", "n", "min", "max"):
+        assert getattr(restored, attribute) == getattr(sketch, attribute)
+    assert len(restored.levels) == len(sketch.levels)
+    for ours, theirs in zip(sketch.levels, restored.levels):
+        np.testing.assert_array_equal(ours, theirs)
+    assert restored.to_bytes() == sketch.to_bytes()
+    np.testing.assert_array_equal(restored.quantile(PERCENTILES), sketch.quantile(PERCENTILES))
+
+
+def test_merge_of_round_tripped_parts_matches_merge_of_parts():
+    values = distribution("multimodal", rows=30_000)
+    parts = [KLLSketch(64, seed=1).update(chunk) for chunk in np.array_split(values, 3)]
+    direct, restored = KLLSketch(64, seed=0), KLLSketch(64, seed=0)
+    for part in parts:
+        direct.merge(part)
+        restored.merge(KLLSketch.from_bytes(part.to_bytes()))
+    assert direct.n == restored.n == values.size
+    assert (direct.min, direct.max) == (values.min(), values.max())
+    np.testing.assert_array_equal(direct.quantile(PERCENTILES), restored.quantile(PERCENTILES))
+
+
+def test_nan_and_empty():
+    assert np.isnan(KLLSketch().quantile(0.5))
+    sketch = KLLSketch().update([1.0, np.nan, 3.0])
+    assert sketch.n == 2
+    assert sketch.median() == pd.Series([1.0, np.nan, 3.0]).median()
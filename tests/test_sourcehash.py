@@ -0,0 +1,69 @@
+"""Which notebook edits change the digest that ``sourcehash`` keeps."""
+import copy
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "_ext"))
+from sourcehash import notebook_digest  # noqa: E402
+
+NOTEBOOK = {
+    "nbformat": 4,
+    "nbformat_minor": 5,
+    "metadata": {"kernelspec": {"name": "python3", "display_name": "Python 3", "language": "python"}},
+    "cells": [
+        {
+            "cell_type": "markdown",
+            "id": "a",
+            "metadata": {},
+            "source": ["# Title\n", "![](attachment:x.png)"],
+            "attachments": {"x.png": {"image/png": "iVBORw0KGgo="}},
+        },
+        {
+            "cell_type": "code",
+            "id": "b",
+            "metadata": {},
+            "source": "1 + 1",
+            "execution_count": 1,
+            "outputs": [{
+                "output_type": "execute_result",
+                "execution_count": 1,
+                "data": {"text/plain": "2"},
+                "metadata": {},
+            }],
+        },
+    ],
+}
+
+
+def digest(tmp_path, edit):
+    nb = copy.deepcopy(NOTEBOOK)
+    edit(nb)
+    path = tmp_path / "nb.ipynb"
+    path.write_text(json.dumps(nb))
+    return notebook_digest(path)
+
+
+def rerun(nb):
+    nb["cells"][1].update(execution_count=7, outputs=[])
+    nb["cells"][1]["metadata"]["execution"] = {"iopub.execute_input": "2024-01-01T00:00:00Z"}
+
+
+def test_outputs_and_run_metadata_are_ignored(tmp_path):
+    assert digest(tmp_path, rerun) == digest(tmp_path, lambda nb: None)
+
+
+@pytest.mark.parametrize(
+    "edit",
+    [
+        lambda nb: nb["cells"][1]["metadata"].update(tags=["remove-input"]),
+        lambda nb: nb["metadata"].update(mystnb={"execution_mode": "off"}),
+        lambda nb: nb["cells"][0]["attachments"]["x.png"].update({"image/png": "AAAA"}),
+        lambda nb: nb["cells"][1].update(source="1 + 2"),
+    ],
+    ids=["cell tags", "notebook metadata", "attachment", "source"],
+)
+def test_page_changing_edits(tmp_path, edit):
+    assert digest(tmp_path, edit) != digest(tmp_path, lambda nb: None)
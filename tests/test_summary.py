@@ -0,0 +1,54 @@
+"""``summarize`` over chunks against pandas on the whole column."""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from davpy import Moments, Summary, summarize  # noqa: E402
+
+
+@pytest.fixture
+def ages():
+    rng = np.random.default_rng(0)
+    values = rng.integers(15, 70, 180).astype(float)
+    values[::7] = np.nan
+    return pd.Series(values, name="age")
+
+
+def test_chunked_summary_matches_describe(ages):
+    chunks = np.array_split(ages.to_numpy(), 7)
+    result = summarize(chunks, mode=True)
+    pd.testing.assert_series_equal(result.describe(name="age"), ages.describe(), rtol=1e-12)
+    assert result.var() == pytest.approx(ages.var(), rel=1e-12)
+    assert result.iqr() == ages.quantile(0.75) - ages.quantile(0.25)
+    assert result.range() == ages.max() - ages.min()
+    np.testing.assert_array_equal(result.mode().to_numpy(), ages.mode().to_numpy())
+
+
+def test_csv_partitions_merge_like_one_pass(tmp_path, ages):
+    paths = []
+    for i, start in enumerate(range(0, len(ages), 60)):
+        paths.append(str(tmp_path / f"part{i}.csv"))
+        ages.iloc[start:start + 60].to_frame().to_csv(paths[-1], index=False)
+    merged = summarize(paths, column="age", workers=2)
+    single = summarize(ages)
+    pd.testing.assert_series_equal(merged.describe(), single.describe(), rtol=1e-12)
+
+
+def test_moments_stay_precise_far_from_zero():
+    rng = np.random.default_rng(1)
+    values = 1e9 + rng.normal(0, 1, 100_000)
+    moments = Moments()
+    for chunk in np.array_split(values, 1000):
+        moments.update(chunk)
+    assert moments.mean == pytest.approx(values.mean(), rel=1e-15)
+    assert moments.var() == pytest.approx(values.var(ddof=1), rel=1e-8)
+
+
+def test_empty_input():
+    summary = Summary().update(np.array([np.nan]))
+    assert summary.count == 0
+    assert np.isnan(summary.mean()) and np.isnan(summary.var())
@@ -0,0 +1,55 @@
+"""Seeded, block-parallel sampling in ``synthetic``."""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from davpy import synthetic  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def small_blocks(monkeypatch):
+    # Many blocks for few samples, so that the workers share the work.
+    monkeypatch.setattr(synthetic, "BLOCK", 1000)
+
+
+@pytest.mark.parametrize("draw", [
+    lambda **kw: synthetic.normal(10_500, 1, 3, **kw),
+    lambda **kw: synthetic.uniform(10_500, -1, 1, **kw),
+    lambda **kw: synthetic.skewnorm(10_500, -4, 2, 0.5, **kw),
+    lambda **kw: synthetic.mixture(10_500, [(0, 0.5), (2, 0.5), (4, 0.5)], **kw),
+])
+def test_same_seed_same_samples_whatever_the_workers(draw):
+    first = draw(seed=42, workers=1)
+    for workers in (2, 3, 8):
+        np.testing.assert_array_equal(draw(seed=42, workers=workers), first)
+    assert not np.array_equal(draw(seed=43, workers=1), first)
+
+
+def test_samples_follow_the_distribution():
+    values = synthetic.uniform(100_000, 2, 5, seed=0, workers=2)
+    assert values.min() >= 2 and values.max() < 5
+    a = 4
+    values = synthetic.skewnorm(200_000, a, seed=0, workers=2)
+    mean = np.sqrt(2 / np.pi) * a / np.sqrt(1 + a * a)
+    assert values.mean() == pytest.approx(mean, abs=0.01)
+    assert values.var() == pytest.approx(1 - mean**2, abs=0.01)
+
+
+def test_writes_into_a_memory_map(tmp_path):
+    out = synthetic.open_memmap(tmp_path / "mixture.npy", 3000)
+    result = synthetic.mixture(3000, [(0, 1), (10, 1)], seed=7, workers=2, out=out)
+    assert result is out
+    out.flush()
+    stored = np.load(tmp_path / "mixture.npy")
+    np.testing.assert_array_equal(stored, synthetic.mixture(3000, [(0, 1), (10, 1)], seed=7))
+    assert stored[:1500].mean() < 1 < 9 < stored[1500:].mean()
+
+
+def test_sizes_are_checked():
+    with pytest.raises(ValueError):
+        synthetic.mixture(10, [(0, 1), (1, 1), (2, 1)])
+    with pytest.raises(ValueError):
+        synthetic.normal(10, out=np.empty(5))
@@ -0,0 +1,52 @@
+"""Incremental rolling statistics of ``TimeSeries`` against pandas."""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from davpy import TimeSeries  # noqa: E402
+
+
+def test_nan_only_affects_windows_holding_it():
+    values = np.arange(10.0)
+    values[2] = np.nan
+    series = TimeSeries(["a"], window=3)
+    series.append(pd.date_range("2024", periods=10, freq="s"), values[:, None])
+    expected = pd.Series(values).rolling(3, min_periods=1).mean()
+    np.testing.assert_allclose(series.rolling_mean()[:, 0], expected)
+    np.testing.assert_allclose(series.rolling_mean()[5:, 0], [4, 5, 6, 7, 8])
+
+
+@pytest.mark.parametrize("window", [1, 3, 64])
+def test_appends_of_any_size_match_pandas(window):
+    rng = np.random.default_rng(0)
+    values = rng.normal(1e6, 1, (3000, 3))
+    values[rng.random(values.shape) < 0.1] = np.nan
+    values[:80, 1] = np.nan
+    times = pd.date_range("2024", periods=len(values), freq="s")
+    series = TimeSeries(["a", "b", "c"], window=window)
+    start = 0
+    for size in [1, 2, 100, 3, 1000, 1, 1893]:
+        series.append(times[start:start + size], values[start:start + size])
+        start += size
+    expected = pd.DataFrame(values).rolling(window, min_periods=1)
+    np.testing.assert_allclose(series.rolling_mean(), expected.mean(), rtol=1e-12)
+    np.testing.assert_allclose(series.rolling_sum(), expected.sum(), rtol=1e-12)
+    np.testing.assert_allclose(series.rolling_var(), expected.var(), atol=1e-6)
+
+
+@pytest.mark.parametrize("how", ["sum", "mean", "var", "std", "min", "max", "count"])
+def test_resampled_large_values_match_pandas(how):
+    rng = np.random.default_rng(1)
+    values = rng.normal(1e8, 1, (4000, 2))
+    values[rng.random(values.shape) < 0.05] = np.nan
+    times = pd.date_range("2024", periods=len(values), freq="s")
+    series = TimeSeries(["a", "b"], period="10min")
+    for start in range(0, len(values), 700):
+        series.append(times[start:start + 700], values[start:start + 700])
+    expected = getattr(pd.DataFrame(values, index=times).resample("10min"), how)()
+    rtol = 1e-6 if how in ("var", "std") else 1e-9
+    np.testing.assert_allclose(series.resampled(how), expected, rtol=rtol)